@@ -0,0 +1,132 @@
+# app/admission.py
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List
+
+from app.monitoring import REVIEW_ADMISSION_QUEUE_DEPTH, REVIEWS_IN_FLIGHT, REVIEWS_REJECTED
+
+logger = logging.getLogger("ai-pr-reviewer")
+
+REJECT_QUEUE_FULL = "queue_full"
+REJECT_QUEUE_TIMEOUT = "queue_timeout"
+
+
+class Overloaded(Exception):
+    """Raised when a review is not admitted; the client should retry after retry_after seconds."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Review capacity exhausted ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounds the reviews a worker runs at once. Up to max_concurrent run; up to max_queue
+    more wait (lowest priority value first, then in arrival order) for at most
+    queue_timeout seconds. Anything beyond that is rejected straight away with Overloaded,
+    so a traffic spike is shed instead of piling up in memory.
+    """
+
+    def __init__(self, max_concurrent: int = 32, max_queue: int = 64,
+                 queue_timeout: float = 30.0, retry_after: float = 5.0,
+                 prioritize_small_diffs: bool = False):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.prioritize_small_diffs = prioritize_small_diffs
+        self.in_flight = 0
+        self._waiters: List[list] = []  # Heap of [priority, seq, future]
+        self._seq = itertools.count()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def saturated(self) -> bool:
+        """True if a new review would have to wait (or be rejected)."""
+        return self.in_flight >= self.max_concurrent or bool(self._waiters)
+
+    def queue_full(self) -> bool:
+        """True if a new review would be rejected straight away."""
+        return self.saturated() and len(self._waiters) >= self.max_queue
+
+    def _update_gauges(self) -> None:
+        REVIEWS_IN_FLIGHT.set(self.in_flight)
+        REVIEW_ADMISSION_QUEUE_DEPTH.set(len(self._waiters))
+
+    def _reject(self, reason: str) -> Overloaded:
+        REVIEWS_REJECTED.labels(reason=reason).inc()
+        logger.warning(
+            f"Review rejected: {reason} ({self.in_flight} running, {self.queued} queued)")
+        return Overloaded(reason, self.retry_after)
+
+    async def _acquire(self, priority: float) -> None:
+        if not self.saturated():
+            self.in_flight += 1
+            self._update_gauges()
+            return
+        if self.queue_full():
+            raise self._reject(REJECT_QUEUE_FULL)
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._seq), future]
+        heapq.heappush(self._waiters, entry)
+        self._update_gauges()
+        try:
+            await asyncio.wait({future}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # Client went away while queued; hand on the slot if it had just been given one
+            if future.done():
+                self._release()
+            else:
+                self._forget(entry)
+            raise
+        if not future.done():
+            self._forget(entry)
+            raise self._reject(REJECT_QUEUE_TIMEOUT)
+
+    def _forget(self, entry: list) -> None:
+        self._waiters.remove(entry)
+        heapq.heapify(self._waiters)
+        self._update_gauges()
+
+    def _release(self) -> None:
+        # Hand the slot straight to the next waiter, so in_flight never dips below the limit
+        while self._waiters:
+            future = heapq.heappop(self._waiters)[2]
+            if not future.done():
+                future.set_result(None)
+                self._update_gauges()
+                return
+        self.in_flight -= 1
+        self._update_gauges()
+
+    @asynccontextmanager
+    async def admit(self, priority: float = 0) -> AsyncIterator[None]:
+        """Hold a review slot for the enclosed work; raises Overloaded if none is available."""
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+
+def build_admission_controller() -> AdmissionController:
+    """Build the /review admission controller from environment configuration."""
+    return AdmissionController(
+        max_concurrent=int(os.getenv("REVIEW_MAX_CONCURRENCY", "32")),
+        max_queue=int(os.getenv("REVIEW_MAX_QUEUE", "64")),
+        queue_timeout=float(os.getenv("REVIEW_QUEUE_TIMEOUT_SECONDS", "30")),
+        retry_after=float(os.getenv("REVIEW_RETRY_AFTER_SECONDS", "5")),
+        prioritize_small_diffs=(
+            os.getenv("REVIEW_PRIORITIZE_SMALL_DIFFS", "false").lower() == "true"),
+    )
+
+
+review_admission = build_admission_controller()
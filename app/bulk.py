@@ -0,0 +1,111 @@
+# app/bulk.py
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterable, Optional
+
+import httpx
+
+from app.github import get_github_client
+
+logger = logging.getLogger("ai-pr-reviewer")
+
+# PRs reviewed at once by a single bulk request
+BULK_REVIEW_CONCURRENCY = int(os.getenv("BULK_REVIEW_CONCURRENCY", "4"))
+
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _has_labels(pull: dict, labels: Iterable[str]) -> bool:
+    """True if the PR carries every one of labels (case-insensitive, like GitHub)."""
+    names = {label["name"].lower() for label in pull.get("labels", [])}
+    return all(label.lower() in names for label in labels)
+
+
+async def _review_pull(owner: str, repo: str, pull: dict, **options) -> dict:
+    """One NDJSON line for a PR: its review, or the error that stopped it."""
+    from app.review import review_github_pr  # Imported on first use, as in app/main.py
+
+    line = {"event": "review", "pr_number": pull["number"], "title": pull.get("title", "")}
+    try:
+        line["analysis"] = await review_github_pr(owner, repo, pull["number"], **options)
+    except Exception as e:
+        logger.exception(f"Bulk review of {owner}/{repo} PR#{pull['number']} failed: {e}")
+        line.update(event="error", error=f"Internal server error: {e}")
+    return line
+
+
+async def review_repo(owner: str, repo: str, state: str = "open", labels: Iterable[str] = (),
+                      updated_since: Optional[datetime] = None, max_prs: Optional[int] = None,
+                      concurrency: Optional[int] = None, **options) -> AsyncIterator[dict]:
+    """
+    Review a repository's pull requests concurrently, yielding one line per PR as its
+    review finishes and a final summary line. The summary's errors counts failed reviews
+    plus a failed PR listing, whose message is also kept in listing_error. At most
+    `concurrency` reviews run at once and the PR list is paged only as fast as reviews
+    start, so memory stays flat however many PRs match. options are passed on to
+    review_github_pr.
+    """
+    concurrency = concurrency or BULK_REVIEW_CONCURRENCY
+    if updated_since is not None and updated_since.tzinfo is None:
+        updated_since = updated_since.replace(tzinfo=timezone.utc)
+    slots = asyncio.Semaphore(concurrency)
+    results: asyncio.Queue = asyncio.Queue()
+    reviews = set()
+    listed_all = object()
+    started = 0
+
+    async def review(pull: dict) -> None:
+        try:
+            line = await _review_pull(owner, repo, pull, **options)
+        finally:
+            slots.release()
+        results.put_nowait(line)
+
+    async def produce() -> None:
+        nonlocal started
+        try:
+            async for pull in get_github_client().list_pulls(owner, repo, state):
+                if updated_since is not None and \
+                        _parse_timestamp(pull["updated_at"]) < updated_since:
+                    break  # Listed by last update, so every remaining PR is older
+                if not _has_labels(pull, labels):
+                    continue
+                await slots.acquire()
+                started += 1
+                task = asyncio.ensure_future(review(pull))
+                reviews.add(task)
+                task.add_done_callback(reviews.discard)
+                if max_prs is not None and started >= max_prs:
+                    break
+        except (httpx.HTTPError, KeyError, ValueError) as e:
+            results.put_nowait({"event": "error", "error": f"GitHub API request failed: {e}"})
+        finally:
+            results.put_nowait(listed_all)
+
+    producer = asyncio.ensure_future(produce())
+    listing, finished, errors, listing_error = True, 0, 0, ""
+    try:
+        while listing or finished < started:
+            line = await results.get()
+            if line is listed_all:
+                listing = False
+                continue
+            if "pr_number" in line:
+                finished += 1
+                errors += line["event"] == "error" or bool(line["analysis"].get("error"))
+            else:
+                # Listing failed: the PRs after it were never reviewed
+                errors += 1
+                listing_error = line["error"]
+            yield line
+        yield {"event": "summary", "reviewed": finished, "errors": errors,
+               "listing_error": listing_error}
+    finally:
+        # Client went away (or we are done): stop listing and drop unfinished reviews
+        producer.cancel()
+        for task in list(reviews):
+            task.cancel()
@@ -0,0 +1,217 @@
+# app/cache.py
+import copy
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.diff import file_path
+from app.monitoring import REVIEW_CACHE_EVICTIONS, REVIEW_CACHE_HITS, REVIEW_CACHE_MISSES
+
+logger = logging.getLogger("ai-pr-reviewer")
+
+
+# === Cache keys ===
+def normalize_diff(diff: str) -> str:
+    """Normalize line endings and trailing whitespace so equivalent diffs hash the same."""
+    lines = diff.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def make_review_key(diff: str, model: str, prompt_version: str) -> str:
+    """Content address for a review: hash of the normalized diff, model and prompt version."""
+    digest = hashlib.sha256()
+    for part in (model, prompt_version, normalize_diff(diff)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return f"review:{digest.hexdigest()}"
+
+
+def make_file_key(pr: str, file_diff: str, model: str, prompt_version: str) -> str:
+    """
+    Key for the AI review of one file's patch in a pull request (used by incremental
+    reviews): the PR, the file's path and the hash of its patch.
+    """
+    return f"file:{pr}:{file_path(file_diff)}:{make_review_key(file_diff, model, prompt_version)}"
+
+
+def make_pr_key(owner: str, repo: str, pr_number: int, head_sha: str,
+                model: str, prompt_version: str) -> str:
+    """Key for the stored review of a pull request at a specific head commit."""
+    return f"pr:{owner}/{repo}#{pr_number}@{head_sha}:{model}:{prompt_version}"
+
+
+# === Shared backend ===
+class SQLiteCacheBackend:
+    """
+    Cache entries stored in a SQLite file, so every uvicorn worker on the same host sees
+    the same reviews. Not for volumes shared between hosts: WAL mode needs shared memory,
+    which network filesystems do not provide.
+
+    Expired rows are pruned at most every prune_interval seconds on write, and the table
+    is capped at max_rows (the entries closest to expiry go first).
+    """
+
+    def __init__(self, path: str, max_rows: int = 100000, prune_interval: float = 60):
+        self.path = path
+        self.max_rows = max_rows
+        self.prune_interval = prune_interval
+        self._pruned_at = 0.0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS review_cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS review_cache_expires_at ON review_cache (expires_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM review_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= time.time():
+                conn.execute("DELETE FROM review_cache WHERE key = ?", (key,))
+                REVIEW_CACHE_EVICTIONS.labels(reason="expired").inc()
+                return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value: dict, expires_at: float) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO review_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at),
+            )
+        if time.monotonic() - self._pruned_at >= self.prune_interval:
+            self.prune()
+
+    def prune(self) -> None:
+        """Delete expired rows, then the rows closest to expiry beyond max_rows."""
+        self._pruned_at = time.monotonic()
+        with self._connect() as conn:
+            expired = conn.execute(
+                "DELETE FROM review_cache WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+            over = conn.execute("SELECT COUNT(*) FROM review_cache").fetchone()[0] - self.max_rows
+            if over > 0:
+                conn.execute(
+                    "DELETE FROM review_cache WHERE key IN ("
+                    " SELECT key FROM review_cache ORDER BY expires_at LIMIT ?)",
+                    (over,),
+                )
+        if expired:
+            REVIEW_CACHE_EVICTIONS.labels(reason="expired").inc(expired)
+        if over > 0:
+            REVIEW_CACHE_EVICTIONS.labels(reason="size").inc(over)
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM review_cache")
+
+
+# === Review cache ===
+class ReviewCache:
+    """In-memory LRU + TTL cache with an optional shared backend behind it."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600,
+                 backend: Optional[SQLiteCacheBackend] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend = backend
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                REVIEW_CACHE_HITS.labels(layer="memory").inc()
+                return copy.deepcopy(value)
+            del self._entries[key]
+            REVIEW_CACHE_EVICTIONS.labels(reason="expired").inc()
+
+        if self.backend is not None:
+            try:
+                value = self.backend.get(key)
+            except sqlite3.Error as e:
+                logger.warning(f"Review cache backend read failed: {e}")
+                value = None
+            if value is not None:
+                REVIEW_CACHE_HITS.labels(layer="shared").inc()
+                self._store(key, value, time.time() + self.ttl)
+                return copy.deepcopy(value)
+
+        REVIEW_CACHE_MISSES.inc()
+        return None
+
+    def set(self, key: str, value: dict) -> None:
+        expires_at = time.time() + self.ttl
+        self._store(key, copy.deepcopy(value), expires_at)
+        if self.backend is not None:
+            try:
+                self.backend.set(key, value, expires_at)
+            except sqlite3.Error as e:
+                logger.warning(f"Review cache backend write failed: {e}")
+
+    def clear(self) -> None:
+        self._entries.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def _store(self, key: str, value: dict, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            REVIEW_CACHE_EVICTIONS.labels(reason="lru").inc()
+
+
+def build_cache_backend() -> Optional[SQLiteCacheBackend]:
+    """The shared SQLite backend if REVIEW_CACHE_DB is set."""
+    db_path = os.getenv("REVIEW_CACHE_DB", "")
+    if not db_path:
+        return None
+    return SQLiteCacheBackend(db_path,
+                              max_rows=int(os.getenv("REVIEW_CACHE_DB_MAX_ROWS", "100000")))
+
+
+def build_review_cache() -> ReviewCache:
+    """Build the review cache from environment configuration."""
+    backend = build_cache_backend()
+    return ReviewCache(
+        max_entries=int(os.getenv("REVIEW_CACHE_MAX_ENTRIES", "1024")),
+        ttl=float(os.getenv("REVIEW_CACHE_TTL_SECONDS", "3600")),
+        backend=backend,
+    )
+
+
+def build_file_review_cache() -> ReviewCache:
+    """
+    Build the store for per-file incremental results. It has its own size and retention,
+    so a PR that sees a push after hours, or busy traffic in review_cache, still finds its
+    unchanged files; with REVIEW_CACHE_DB set it shares that file.
+    """
+    backend = build_cache_backend()
+    return ReviewCache(
+        max_entries=int(os.getenv("FILE_REVIEW_CACHE_MAX_ENTRIES", "16384")),
+        ttl=float(os.getenv("FILE_REVIEW_CACHE_TTL_SECONDS", "604800")),
+        backend=backend,
+    )
+
+
+review_cache = build_review_cache()
+file_review_cache = build_file_review_cache()
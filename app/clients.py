@@ -0,0 +1,61 @@
+# app/clients.py
+import logging
+from typing import TYPE_CHECKING, Optional
+
+import httpx
+
+from app.ratelimit import reset_schedulers
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger("ai-pr-reviewer")
+
+# Pool sizing for outbound connections, shared by every request on a worker
+HTTP_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+_http_client: Optional[httpx.AsyncClient] = None
+_openai_client: Optional["AsyncOpenAI"] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared async HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS)
+    return _http_client
+
+
+def get_openai_client() -> "AsyncOpenAI":
+    """Return the shared AsyncOpenAI client, creating it on first use."""
+    global _openai_client
+    if _openai_client is None:
+        # Imported here: the SDK takes about half a second to import (see app/readiness.py)
+        from openai import AsyncOpenAI
+
+        # Retries are handled by the upstream scheduler (app/ratelimit.py)
+        _openai_client = AsyncOpenAI(max_retries=0)
+    return _openai_client
+
+
+def init_clients() -> None:
+    """Create the shared clients up front (called from the app lifespan)."""
+    get_http_client()
+    try:
+        get_openai_client()
+    except Exception as e:
+        # Missing credentials should not stop the app; reviews fall back to heuristics
+        logger.warning(f"OpenAI client not initialised: {e}")
+
+
+async def close_clients() -> None:
+    """Close the shared clients and release pooled connections."""
+    global _http_client, _openai_client
+    reset_schedulers()
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    if _openai_client is not None:
+        await _openai_client.close()
+        _openai_client = None
@@ -0,0 +1,95 @@
+# app/diff.py
+from typing import List, Tuple
+
+FILE_HEADER = "diff --git "
+HUNK_HEADER = "@@"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token) used for chunk budgeting."""
+    return len(text) // 4 + 1
+
+
+def split_files(diff: str) -> List[str]:
+    """Split a unified diff into one section per file, keeping each file's header lines."""
+    files: List[List[str]] = []
+    for line in diff.splitlines(keepends=True):
+        if line.startswith(FILE_HEADER) or not files:
+            files.append([])
+        files[-1].append(line)
+    return ["".join(lines) for lines in files]
+
+
+def file_path(file_diff: str) -> str:
+    """Path (b/ side) from a file's "diff --git" header line, or from a split_files section."""
+    header = file_diff.split("\n", 1)[0]
+    if not header.startswith(FILE_HEADER):
+        return ""
+    return header[len(FILE_HEADER):].rsplit(" b/", 1)[-1].strip()
+
+
+def split_hunks(file_diff: str) -> Tuple[str, List[str]]:
+    """Split a single file's diff into its header and its hunks."""
+    header: List[str] = []
+    hunks: List[List[str]] = []
+    for line in file_diff.splitlines(keepends=True):
+        if line.startswith(HUNK_HEADER):
+            hunks.append([])
+        if hunks:
+            hunks[-1].append(line)
+        else:
+            header.append(line)
+    return "".join(header), ["".join(lines) for lines in hunks]
+
+
+def _pack(pieces: List[str], max_tokens: int, prefix: str = "") -> List[str]:
+    """Greedily pack consecutive pieces into chunks of at most ~max_tokens each."""
+    chunks: List[str] = []
+    current: List[str] = []
+    size = estimate_tokens(prefix)
+    for piece in pieces:
+        piece_size = len(piece) // 4
+        if current and size + piece_size > max_tokens:
+            chunks.append(prefix + "".join(current))
+            current = []
+            size = estimate_tokens(prefix)
+        current.append(piece)
+        size += piece_size
+    if current or not chunks:
+        chunks.append(prefix + "".join(current))
+    return chunks
+
+
+def _split_file(file_diff: str, max_tokens: int) -> List[str]:
+    """Split an oversized file on hunk boundaries, repeating the file header in each piece."""
+    header, hunks = split_hunks(file_diff)
+    if not hunks:
+        return _pack(file_diff.splitlines(keepends=True), max_tokens)
+    budget = max(max_tokens - estimate_tokens(header), 1)
+    pieces: List[str] = []
+    for hunk in hunks:
+        if estimate_tokens(hunk) <= budget:
+            pieces.append(hunk)
+        else:
+            # Last resort for a single oversized hunk: split it on line boundaries,
+            # repeating the @@ header so each piece still says where it applies
+            hunk_header, *lines = hunk.splitlines(keepends=True)
+            pieces.extend(_pack(lines, budget, prefix=hunk_header))
+    return _pack(pieces, max_tokens, prefix=header)
+
+
+def chunk_diff(diff: str, max_tokens: int) -> List[str]:
+    """
+    Split a diff into chunks of at most ~max_tokens, on file boundaries where possible
+    and on hunk boundaries for files that do not fit on their own.
+    """
+    if estimate_tokens(diff) <= max_tokens:
+        return [diff]
+
+    pieces: List[str] = []
+    for file_diff in split_files(diff):
+        if estimate_tokens(file_diff) <= max_tokens:
+            pieces.append(file_diff)
+        else:
+            pieces.extend(_split_file(file_diff, max_tokens))
+    return _pack(pieces, max_tokens)
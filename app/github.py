@@ -0,0 +1,204 @@
+# app/github.py
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Tuple
+
+import httpx
+
+from app.clients import get_http_client
+from app.ingest import IngestedDiff, ingest_diff_stream
+from app.monitoring import GITHUB_API_CALLS
+from app.ratelimit import DeadlineExceeded, Throttled, get_scheduler, parse_duration
+from app.resilience import time_left
+
+logger = logging.getLogger("ai-pr-reviewer")
+
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+
+JSON_MEDIA_TYPE = "application/vnd.github+json"
+DIFF_MEDIA_TYPE = "application/vnd.github.v3.diff"
+
+
+def _header_int(resp: httpx.Response, name: str) -> Optional[int]:
+    value = resp.headers.get(name)
+    return int(value) if value and value.isdigit() else None
+
+
+def _check_throttled(resp: httpx.Response) -> None:
+    """Raise Throttled for rate-limited (429, 403 with no quota left) and 5xx responses."""
+    remaining = _header_int(resp, "X-RateLimit-Remaining")
+    retry_after = parse_duration(resp.headers.get("Retry-After"))
+    rate_limited = resp.status_code == 429 or (
+        resp.status_code == 403 and (remaining == 0 or retry_after is not None)
+    )
+    if not rate_limited and resp.status_code < 500:
+        return
+    if retry_after is None and remaining == 0:
+        reset_at = _header_int(resp, "X-RateLimit-Reset")
+        retry_after = max(reset_at - time.time(), 0) if reset_at else None
+    try:
+        resp.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        raise Throttled(e, retry_after=retry_after, rate_limited=rate_limited)
+
+
+async def _read_text(resp: httpx.Response) -> str:
+    await resp.aread()
+    return resp.text
+
+
+def _body_size(body: Any) -> int:
+    """Approximate bytes held by a stored body (text or an ingested diff)."""
+    text = body.diff if isinstance(body, IngestedDiff) else body
+    return len(text.encode("utf-8", "replace")) if isinstance(text, str) else 0
+
+
+class GitHubClient:
+    """
+    Authenticated GitHub REST client that remembers ETags and bodies per URL.
+
+    Repeat requests are sent with If-None-Match; a 304 reuses the stored body
+    and does not count against the rate limit. The store is bounded by entry count
+    and by total body size (least recently used first); a body larger than
+    max_bytes on its own is not stored.
+    """
+
+    def __init__(self, token: Optional[str] = None, base_url: str = GITHUB_API_URL,
+                 max_entries: int = 512, max_bytes: int = 32 * 1024 * 1024):
+        self.token = token
+        self.base_url = base_url.rstrip("/")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # (path, accept) -> (etag, body, body size)
+        self._responses: "OrderedDict[Tuple[str, str], Tuple[str, Any, int]]" = OrderedDict()
+        self._bytes = 0
+
+    def _headers(self, accept: str, etag: Optional[str] = None) -> dict:
+        headers = {"Accept": accept}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        if etag:
+            headers["If-None-Match"] = etag
+        return headers
+
+    async def _get(self, path: str, accept: str,
+                   read: Callable[[httpx.Response], Awaitable[Any]] = _read_text) -> Any:
+        """
+        GET a path conditionally, returning the (possibly stored) response body as
+        produced by read, which consumes the streamed response.
+        """
+        key = (path, accept)
+        stored = self._responses.get(key)
+        etag = stored[0] if stored else None
+
+        scheduler = get_scheduler("github")
+
+        async def request() -> Tuple[httpx.Response, Any]:
+            client = get_http_client()
+            # Within a review deadline, no phase of the request may outlast what is left of it
+            left = time_left()
+            timeout = httpx.USE_CLIENT_DEFAULT if left is None else left
+            try:
+                resp = await client.send(
+                    client.build_request("GET", f"{self.base_url}{path}",
+                                         headers=self._headers(accept, etag), timeout=timeout),
+                    stream=True,
+                )
+            except httpx.TransportError as e:
+                raise Throttled(e, rate_limited=False)
+            try:
+                GITHUB_API_CALLS.labels(status=str(resp.status_code)).inc()
+                reset_at = _header_int(resp, "X-RateLimit-Reset")
+                scheduler.observe_limits(_header_int(resp, "X-RateLimit-Remaining"),
+                                         reset_at - time.time() if reset_at else None)
+                _check_throttled(resp)
+                if resp.status_code == 304 and stored is not None:
+                    return resp, stored[1]
+                resp.raise_for_status()
+                return resp, await read(resp)
+            except httpx.TransportError as e:
+                raise Throttled(e, rate_limited=False)
+            finally:
+                await resp.aclose()
+
+        try:
+            resp, body = await scheduler.run(request)
+        except DeadlineExceeded as e:
+            # Reported like any other GitHub timeout
+            raise httpx.PoolTimeout(str(e))
+
+        if resp.status_code == 304:
+            if key in self._responses:  # May have been evicted while the request was out
+                self._responses.move_to_end(key)
+            return body
+
+        new_etag = resp.headers.get("ETag")
+        if new_etag:
+            self._store(key, new_etag, body)
+        return body
+
+    def _store(self, key: Tuple[str, str], etag: str, body: Any) -> None:
+        old = self._responses.pop(key, None)
+        if old is not None:
+            self._bytes -= old[2]
+        size = _body_size(body)
+        if size > self.max_bytes:
+            return
+        self._responses[key] = (etag, body, size)
+        self._bytes += size
+        while len(self._responses) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, _, evicted) = self._responses.popitem(last=False)
+            self._bytes -= evicted
+
+    async def get_pull(self, owner: str, repo: str, pr_number: int) -> dict:
+        """Fetch pull request metadata (head SHA, sizes, ...)."""
+        body = await self._get(f"/repos/{owner}/{repo}/pulls/{pr_number}", JSON_MEDIA_TYPE)
+        return json.loads(body)
+
+    async def get_pull_diff(self, owner: str, repo: str, pr_number: int) -> IngestedDiff:
+        """
+        Stream the unified diff of a pull request through the file filters and budget
+        (app/ingest.py); only the files kept for review are held in memory.
+        """
+        async def read(resp: httpx.Response) -> IngestedDiff:
+            return await ingest_diff_stream(resp.aiter_text())
+
+        return await self._get(f"/repos/{owner}/{repo}/pulls/{pr_number}", DIFF_MEDIA_TYPE, read)
+
+    async def list_pulls(self, owner: str, repo: str, state: str = "open",
+                         per_page: int = 100) -> AsyncIterator[dict]:
+        """
+        Yield the repository's pull requests, most recently updated first, one page at a
+        time; the next page is only requested once the caller has consumed this one.
+        """
+        page = 1
+        while True:
+            body = await self._get(
+                f"/repos/{owner}/{repo}/pulls?state={state}&sort=updated&direction=desc"
+                f"&per_page={per_page}&page={page}",
+                JSON_MEDIA_TYPE,
+            )
+            pulls = json.loads(body)
+            for pull in pulls:
+                yield pull
+            if len(pulls) < per_page:
+                return
+            page += 1
+
+
+_github_client: Optional[GitHubClient] = None
+
+
+def get_github_client() -> GitHubClient:
+    """Return the shared GitHub client, creating it on first use."""
+    global _github_client
+    if _github_client is None:
+        _github_client = GitHubClient(
+            token=os.getenv("GITHUB_TOKEN") or None,
+            max_entries=int(os.getenv("GITHUB_ETAG_CACHE_SIZE", "512")),
+            max_bytes=int(os.getenv("GITHUB_ETAG_CACHE_BYTES", str(32 * 1024 * 1024))),
+        )
+    return _github_client
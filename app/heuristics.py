@@ -0,0 +1,268 @@
+# app/heuristics.py
+import json
+import logging
+import os
+import re
+from bisect import bisect_right
+from typing import Dict, List
+
+from pydantic import BaseModel, Field, field_validator
+
+logger = logging.getLogger("ai-pr-reviewer")
+
+RISK_LEVELS = ["low", "medium", "high"]
+
+MANUAL_REVIEW = "Manual review recommended"
+
+
+def max_risk(*levels: str) -> str:
+    """Return the highest of the given risk levels (unknown levels rank lowest)."""
+    return max(levels, key=lambda level: RISK_LEVELS.index(level) if level in RISK_LEVELS else -1)
+
+
+# === Rule configuration ===
+# (?P<name>...), (?P=name), (?(1)...) and \1-\9, unless the backslash itself is escaped
+GROUP_REFERENCES = re.compile(r"(?<!\\)(?:\\\\)*(?:\(\?P[<=]|\(\?\(|\\[1-9])")
+
+
+class HeuristicRule(BaseModel):
+    name: str = Field(..., pattern=r"^[A-Za-z_][A-Za-z0-9_]*$")
+    pattern: str                          # Regular expression matched against line content
+    issue: str = ""                       # Issue reported when the rule matches
+    action: str = MANUAL_REVIEW           # Recommended action when the rule matches
+    risk: str = "medium"                  # Minimum risk level when the rule matches
+    line_kinds: List[str] = ["added"]     # Any of: added, removed, context
+    path_pattern: str = ""                # Optional regex the file path must match
+
+    @field_validator("pattern", "path_pattern")
+    @classmethod
+    def check_regex(cls, value: str) -> str:
+        try:
+            re.compile(value)
+        except re.error as e:
+            raise ValueError(f"invalid regular expression {value!r}: {e}")
+        return value
+
+    @field_validator("pattern")
+    @classmethod
+    def check_combinable(cls, value: str) -> str:
+        # Rule patterns are joined into one alternation (see HeuristicEngine), where group
+        # names would clash and group numbers would point at other rules' groups
+        if GROUP_REFERENCES.search(value):
+            raise ValueError(
+                f"pattern {value!r} uses named groups, backreferences or conditionals, "
+                "which are not supported in rule patterns"
+            )
+        return value
+
+
+class HeuristicConfig(BaseModel):
+    rules: List[HeuristicRule]
+    large_diff_lines: int = 200           # Diffs with more lines are marked high risk
+
+
+DEFAULT_RULES = [
+    HeuristicRule(name="debug_print", pattern=r"print\(", issue="Debug prints detected"),
+    HeuristicRule(name="todo_fixme", pattern=r"TODO|FIXME", issue="Contains TODO/FIXME comments"),
+]
+
+
+class HeuristicResult(BaseModel):
+    issues: List[str]
+    recommended_actions: List[str]
+    risk_level: str
+    lines_in_diff: int
+    files_changed: int
+    lines_added: int
+    lines_removed: int
+    matches: Dict[str, int]               # Matching line count per rule name
+
+
+# === Engine ===
+GLOBAL_FLAGS = re.compile(r"^\(\?([aiLmsux]+)\)")
+
+
+def _scoped_pattern(pattern: str) -> str:
+    """Turn leading global flags like (?i) into a scoped group so patterns can be combined."""
+    match = GLOBAL_FLAGS.match(pattern)
+    if match is None:
+        return pattern
+    return f"(?{match.group(1)}:{pattern[match.end():]})"
+
+
+# In the combined scan lines still carry their +/-/space marker: ^ means "after the marker"
+CONTENT_START = r"(?<=^[-+ ])"
+
+
+def _content_anchored(pattern: str) -> str:
+    """Rewrite ^ (outside character classes) to match at the start of a diff line's content."""
+    out = []
+    i = 0
+    in_class = False
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            out.append(pattern[i:i + 2])
+            i += 2
+            continue
+        if c == "[" and not in_class:
+            # A ] right after [ or [^ is a literal, not the end of the class
+            end = i + 1 + (pattern[i + 1:i + 2] == "^")
+            end += pattern[end:end + 1] == "]"
+            out.append(pattern[i:end])
+            in_class = True
+            i = end
+            continue
+        if c == "]" and in_class:
+            in_class = False
+        elif c == "^" and not in_class:
+            c = CONTENT_START
+        out.append(c)
+        i += 1
+    return "".join(out)
+
+
+LINE_KINDS = {"+": "added", "-": "removed"}
+
+
+def _line_starts(text: str, prefix: str) -> List[int]:
+    """Offsets of every line starting with prefix (str.find is much faster than ^ in re)."""
+    positions = [0] if text.startswith(prefix) else []
+    needle = "\n" + prefix
+    pos = text.find(needle)
+    while pos >= 0:
+        positions.append(pos + 1)
+        pos = text.find(needle, pos + 1)
+    return positions
+
+
+def _line_end(text: str, pos: int) -> int:
+    """Offset of the newline ending the line that contains pos (or the end of text)."""
+    end = text.find("\n", pos)
+    return len(text) if end < 0 else end
+
+
+class HeuristicEngine:
+    """
+    Evaluates all rules in a single pass over the diff.
+
+    All rule patterns are joined into one compiled alternation and run over the
+    whole diff at C speed; only lines that hit the combined matcher are attributed
+    to individual rules. File and hunk offsets are indexed up front, so each hit
+    knows its file path and whether it is an added, removed or context line.
+    """
+
+    def __init__(self, config: HeuristicConfig):
+        self.config = config
+        self.rules = {rule.name: rule for rule in config.rules}
+        self._rule_patterns = {
+            rule.name: re.compile(rule.pattern) for rule in config.rules
+        }
+        self._path_filters = {
+            rule.name: re.compile(rule.path_pattern)
+            for rule in config.rules if rule.path_pattern
+        }
+        self._rules_by_kind = {
+            kind: [rule.name for rule in config.rules if kind in rule.line_kinds]
+            for kind in ("added", "removed", "context")
+        }
+        # A plain top-level alternation keeps the regex engine's prefix optimisations;
+        # MULTILINE so rules anchored with ^/$ match per line, not per diff
+        self._matcher = re.compile(
+            "|".join(_scoped_pattern(_content_anchored(rule.pattern)) for rule in config.rules),
+            re.MULTILINE,
+        ) if config.rules else None
+
+    def run(self, diff: str) -> HeuristicResult:
+        matches = dict.fromkeys(self.rules, 0)
+
+        # --- Structure: file headers, hunk starts and diff line counts ---
+        file_starts = _line_starts(diff, "diff --git ")
+        hunk_starts = _line_starts(diff, "@@")
+        paths = [
+            diff[start:_line_end(diff, start)].rsplit(" b/", 1)[-1].strip()
+            for start in file_starts
+        ]
+
+        def in_header(pos: int) -> bool:
+            """True if pos is between a 'diff --git' line and that file's first hunk."""
+            file_index = bisect_right(file_starts, pos) - 1
+            if file_index < 0:
+                return False
+            hunk_index = bisect_right(hunk_starts, pos) - 1
+            return hunk_index < 0 or hunk_starts[hunk_index] < file_starts[file_index]
+
+        total = diff.count("\n") + (1 if diff and not diff.endswith("\n") else 0)
+        added = diff.count("\n+") + diff.startswith("+") - sum(
+            1 for pos in _line_starts(diff, "+++ ") if in_header(pos))
+        removed = diff.count("\n-") + diff.startswith("-") - sum(
+            1 for pos in _line_starts(diff, "--- ") if in_header(pos))
+
+        # --- Rules: one combined scan, per-rule attribution only on hit lines ---
+        pos = 0
+        while self._matcher is not None:
+            hit = self._matcher.search(diff, pos)
+            if hit is None:
+                break
+            line_start = diff.rfind("\n", 0, hit.start()) + 1
+            line_end = _line_end(diff, hit.start())
+            pos = line_end + 1
+
+            line = diff[line_start:line_end]
+            if line.startswith(("diff --git ", "@@")) or in_header(line_start):
+                continue
+            kind = LINE_KINDS.get(line[:1], "context")
+            file_index = bisect_right(file_starts, line_start) - 1
+            path = paths[file_index] if file_index >= 0 else ""
+            content = line[1:]  # Without the +/-/space marker, so ^ anchors to the code
+            for name in self._rules_by_kind[kind]:
+                if not self._rule_patterns[name].search(content):
+                    continue
+                path_filter = self._path_filters.get(name)
+                if path_filter is None or path_filter.search(path):
+                    matches[name] += 1
+
+        issues: List[str] = []
+        actions: List[str] = []
+        risk = "low"
+        for name, count in matches.items():
+            if not count:
+                continue
+            rule = self.rules[name]
+            if rule.issue:
+                issues.append(rule.issue)
+            if rule.action:
+                actions.append(rule.action)
+            risk = max_risk(risk, rule.risk)
+
+        if total > self.config.large_diff_lines:
+            risk = "high"
+            actions.append(MANUAL_REVIEW)
+
+        return HeuristicResult(
+            issues=list(dict.fromkeys(issues)),
+            recommended_actions=list(dict.fromkeys(actions)),
+            risk_level=risk,
+            lines_in_diff=total,
+            files_changed=len(file_starts),
+            lines_added=added,
+            lines_removed=removed,
+            matches=matches,
+        )
+
+
+def load_heuristic_config(path: str = "") -> HeuristicConfig:
+    """
+    Load rules from a JSON file ({"rules": [...], "large_diff_lines": 200}).
+    Without a file, or if it cannot be read, the built-in rules are used.
+    """
+    if path:
+        try:
+            with open(path) as f:
+                return HeuristicConfig(**json.load(f))
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load heuristic rules from {path}: {e}")
+    return HeuristicConfig(rules=DEFAULT_RULES)
+
+
+heuristic_engine = HeuristicEngine(load_heuristic_config(os.getenv("HEURISTIC_RULES_FILE", "")))
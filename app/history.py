@@ -0,0 +1,163 @@
+# app/history.py
+import json
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from app.heuristics import RISK_LEVELS
+
+logger = logging.getLogger("ai-pr-reviewer")
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS reviews ("
+    " id INTEGER PRIMARY KEY,"
+    " owner TEXT NOT NULL,"
+    " repo TEXT NOT NULL,"
+    " pr_number INTEGER NOT NULL,"
+    " head_sha TEXT NOT NULL,"
+    " author TEXT NOT NULL DEFAULT '',"
+    " tier TEXT NOT NULL DEFAULT '',"
+    " risk_level TEXT NOT NULL,"
+    " complexity_score INTEGER NOT NULL,"
+    " lines_in_diff INTEGER NOT NULL,"
+    " review TEXT NOT NULL,"
+    " created_at REAL NOT NULL,"
+    " UNIQUE (owner, repo, pr_number, head_sha))",
+    "CREATE INDEX IF NOT EXISTS reviews_repo_time ON reviews (owner, repo, created_at)",
+    "CREATE INDEX IF NOT EXISTS reviews_head_sha ON reviews (head_sha)",
+    "CREATE INDEX IF NOT EXISTS reviews_author_time ON reviews (author, created_at)",
+    # Rollups, updated in the same transaction as each insert
+    "CREATE TABLE IF NOT EXISTS review_daily ("
+    " owner TEXT NOT NULL,"
+    " repo TEXT NOT NULL,"
+    " day TEXT NOT NULL,"
+    " reviews INTEGER NOT NULL,"
+    " complexity_total INTEGER NOT NULL,"
+    " risk_low INTEGER NOT NULL,"
+    " risk_medium INTEGER NOT NULL,"
+    " risk_high INTEGER NOT NULL,"
+    " PRIMARY KEY (owner, repo, day))",
+    "CREATE TABLE IF NOT EXISTS issue_daily ("
+    " owner TEXT NOT NULL,"
+    " repo TEXT NOT NULL,"
+    " day TEXT NOT NULL,"
+    " issue TEXT NOT NULL,"
+    " count INTEGER NOT NULL,"
+    " PRIMARY KEY (owner, repo, day, issue))",
+]
+
+
+def _day(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).date().isoformat()
+
+
+class ReviewHistory:
+    """
+    Every finished PR review, stored in SQLite and indexed by repository, PR, head SHA,
+    author and time. Per repository and day it keeps running totals (review count,
+    complexity, risk levels, issue counts) so trend queries read a handful of rollup
+    rows instead of the raw history. Without a path the history lives in memory.
+    """
+
+    def __init__(self, path: str = ""):
+        self.path = path or ":memory:"
+        # One long-lived connection: an in-memory database only exists as long as it does
+        self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        with self._conn as conn:
+            if path:
+                conn.execute("PRAGMA journal_mode=WAL")
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    def record(self, owner: str, repo: str, pr_number: int, head_sha: str, review: dict,
+               author: str = "", created_at: Optional[float] = None) -> bool:
+        """
+        Store a review and fold it into the day's rollups; returns False if this PR head
+        was already recorded (or the write failed), so rollups count each head once.
+        """
+        created_at = time.time() if created_at is None else created_at
+        day = _day(created_at)
+        risk = review.get("risk_level", "low")
+        risk = risk if risk in RISK_LEVELS else "low"
+        complexity = int(review.get("complexity_score", 0))
+        try:
+            with self._conn as conn:
+                inserted = conn.execute(
+                    "INSERT OR IGNORE INTO reviews (owner, repo, pr_number, head_sha, author, tier,"
+                    " risk_level, complexity_score, lines_in_diff, review, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (owner, repo, pr_number, head_sha, author, review.get("tier", ""), risk,
+                     complexity, review.get("lines_in_diff", 0), json.dumps(review), created_at),
+                ).rowcount
+                if not inserted:
+                    return False
+                conn.execute(
+                    "INSERT INTO review_daily VALUES (?, ?, ?, 1, ?, ?, ?, ?)"
+                    " ON CONFLICT (owner, repo, day) DO UPDATE SET"
+                    " reviews = reviews + 1,"
+                    " complexity_total = complexity_total + excluded.complexity_total,"
+                    " risk_low = risk_low + excluded.risk_low,"
+                    " risk_medium = risk_medium + excluded.risk_medium,"
+                    " risk_high = risk_high + excluded.risk_high",
+                    (owner, repo, day, complexity,
+                     risk == "low", risk == "medium", risk == "high"),
+                )
+                conn.executemany(
+                    "INSERT INTO issue_daily VALUES (?, ?, ?, ?, 1)"
+                    " ON CONFLICT (owner, repo, day, issue) DO UPDATE SET count = count + 1",
+                    [(owner, repo, day, issue) for issue in set(review.get("issues", []))],
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Review history write failed: {e}")
+            return False
+        return True
+
+    def pull_history(self, owner: str, repo: str, pr_number: int, limit: int = 50) -> List[dict]:
+        """Recorded reviews of one PR, newest first."""
+        rows = self._conn.execute(
+            "SELECT head_sha, author, created_at, review FROM reviews"
+            " WHERE owner = ? AND repo = ? AND pr_number = ? ORDER BY created_at DESC LIMIT ?",
+            (owner, repo, pr_number, limit),
+        ).fetchall()
+        return [{"head_sha": sha, "author": author, "created_at": created_at,
+                 "review": json.loads(review)} for sha, author, created_at, review in rows]
+
+    def trends(self, owner: str, repo: str, days: int = 30, top_issues: int = 10) -> dict:
+        """Daily risk distribution and average complexity, plus the most frequent issues."""
+        since = (datetime.now(timezone.utc).date() - timedelta(days=days - 1)).isoformat()
+        rows = self._conn.execute(
+            "SELECT day, reviews, complexity_total, risk_low, risk_medium, risk_high"
+            " FROM review_daily WHERE owner = ? AND repo = ? AND day >= ? ORDER BY day",
+            (owner, repo, since),
+        ).fetchall()
+        issues = self._conn.execute(
+            "SELECT issue, SUM(count) AS total FROM issue_daily"
+            " WHERE owner = ? AND repo = ? AND day >= ?"
+            " GROUP BY issue ORDER BY total DESC, issue LIMIT ?",
+            (owner, repo, since, top_issues),
+        ).fetchall()
+        return {
+            "repository": f"{owner}/{repo}",
+            "since": since,
+            "days": [
+                {
+                    "day": day,
+                    "reviews": reviews,
+                    "average_complexity": round(complexity / reviews, 2),
+                    "risk": {"low": low, "medium": medium, "high": high},
+                }
+                for day, reviews, complexity, low, medium, high in rows
+            ],
+            "top_issues": [{"issue": issue, "count": count} for issue, count in issues],
+        }
+
+    def clear(self) -> None:
+        with self._conn as conn:
+            for table in ("reviews", "review_daily", "issue_daily"):
+                conn.execute(f"DELETE FROM {table}")
+
+
+review_history = ReviewHistory(os.getenv("REVIEW_HISTORY_DB", ""))
@@ -0,0 +1,174 @@
+# app/ingest.py
+import os
+import re
+from typing import AsyncIterator, List, Optional
+
+from pydantic import BaseModel
+
+from app.diff import FILE_HEADER, file_path
+from app.monitoring import DIFF_FILES_SKIPPED
+
+# Files that are never worth a review: lockfiles, minified/bundled output, source maps,
+# test snapshots and vendored dependencies
+DEFAULT_EXCLUDED_PATHS = [
+    r"(^|/)(package-lock\.json|npm-shrinkwrap\.json|yarn\.lock|pnpm-lock\.yaml|poetry\.lock"
+    r"|Pipfile\.lock|Cargo\.lock|composer\.lock|Gemfile\.lock|go\.sum)$",
+    r"\.min\.(js|css)$",
+    r"\.(js|css)\.map$",
+    r"(^|/)__snapshots__/|\.snap$",
+    r"(^|/)(vendor|node_modules|third_party)/",
+]
+
+# Markers of generated code, looked for near the top of each file's patch
+DEFAULT_GENERATED_MARKERS = [r"@generated", r"DO NOT EDIT"]
+
+SKIP_EXCLUDED = "excluded path"
+SKIP_GENERATED = "generated"
+SKIP_BINARY = "binary"
+SKIP_MINIFIED = "minified"
+SKIP_BUDGET = "over budget"
+
+
+# === Configuration ===
+class DiffFilterConfig(BaseModel):
+    max_bytes: int = 1_000_000           # Budget for the diff kept in memory and reviewed
+    max_lines: int = 20_000
+    excluded_paths: List[str] = DEFAULT_EXCLUDED_PATHS
+    generated_markers: List[str] = DEFAULT_GENERATED_MARKERS
+    marker_scan_lines: int = 20          # Lines of each patch searched for generated markers
+    max_line_length: int = 1000          # Longer added/removed lines mean minified code
+
+
+def _env_patterns(name: str) -> List[str]:
+    return [p.strip() for p in os.getenv(name, "").split(",") if p.strip()]
+
+
+def load_diff_filter_config() -> DiffFilterConfig:
+    """Build the filter configuration from the environment; extra patterns extend the defaults."""
+    return DiffFilterConfig(
+        max_bytes=int(os.getenv("DIFF_MAX_BYTES", "1000000")),
+        max_lines=int(os.getenv("DIFF_MAX_LINES", "20000")),
+        excluded_paths=DEFAULT_EXCLUDED_PATHS + _env_patterns("DIFF_EXCLUDED_PATHS"),
+        generated_markers=DEFAULT_GENERATED_MARKERS + _env_patterns("DIFF_GENERATED_MARKERS"),
+    )
+
+
+# === Ingestion ===
+class SkippedFile(BaseModel):
+    path: str
+    reason: str
+
+
+class IngestedDiff(BaseModel):
+    diff: str
+    skipped_files: List[SkippedFile] = []
+
+
+class DiffIngestor:
+    """
+    Builds a filtered diff from lines fed one at a time, so a diff can be parsed while
+    it streams in. Only the current file's patch is buffered: excluded paths are never
+    buffered, and a file is dropped as soon as it turns out to be binary, minified,
+    generated or too big for what is left of the byte/line budget.
+    """
+
+    def __init__(self, config: DiffFilterConfig):
+        self.config = config
+        self._excluded = re.compile("|".join(f"(?:{p})" for p in config.excluded_paths)) \
+            if config.excluded_paths else None
+        self._markers = [re.compile(m) for m in config.generated_markers]
+        self.kept: List[str] = []
+        self.skipped: List[SkippedFile] = []
+        self.bytes = 0
+        self.lines = 0
+        self._path = ""
+        self._buffer: Optional[List[str]] = []
+        self._size = 0
+
+    def skip_file(self, reason: str) -> None:
+        """Drop the current file (if it is still being kept) and report why."""
+        if self._buffer is None:
+            return
+        self.skipped.append(SkippedFile(path=self._path, reason=reason))
+        DIFF_FILES_SKIPPED.labels(reason=reason).inc()
+        self._buffer, self._size = None, 0
+
+    def _close_file(self) -> None:
+        if self._buffer:
+            self.kept.append("".join(self._buffer))
+            self.bytes += self._size
+            self.lines += len(self._buffer)
+        self._buffer, self._size = [], 0
+
+    def feed(self, line: str) -> None:
+        """Add one diff line (including its newline)."""
+        if line.startswith(FILE_HEADER):
+            self._close_file()
+            self._path = file_path(line)
+            if self._excluded is not None and self._excluded.search(self._path):
+                self.skip_file(SKIP_EXCLUDED)
+                return
+        elif self._buffer is None:
+            return  # Rest of a skipped file
+
+        config = self.config
+        buffer = self._buffer
+        if line.startswith(("Binary files ", "GIT binary patch")):
+            self.skip_file(SKIP_BINARY)
+        elif len(line) > config.max_line_length and line.startswith(("+", "-")):
+            self.skip_file(SKIP_MINIFIED)
+        elif len(buffer) < config.marker_scan_lines and any(m.search(line) for m in self._markers):
+            self.skip_file(SKIP_GENERATED)
+        else:
+            size = len(line.encode("utf-8", "replace"))
+            if self.bytes + self._size + size > config.max_bytes or \
+                    self.lines + len(buffer) + 1 > config.max_lines:
+                self.skip_file(SKIP_BUDGET)
+            else:
+                buffer.append(line)
+                self._size += size
+
+    def finish(self) -> IngestedDiff:
+        self._close_file()
+        return IngestedDiff(diff="".join(self.kept), skipped_files=self.skipped)
+
+
+async def ingest_diff_stream(chunks: AsyncIterator[str],
+                             config: Optional[DiffFilterConfig] = None) -> IngestedDiff:
+    """Filter a diff arriving as text chunks (e.g. httpx aiter_text) without holding all of it."""
+    ingestor = DiffIngestor(config or diff_filter_config)
+    pending = ""
+    discarding = False
+    async for chunk in chunks:
+        if discarding:
+            # Inside an enormous line: drop everything up to its end
+            end = chunk.find("\n")
+            if end < 0:
+                continue
+            chunk, discarding = chunk[end + 1:], False
+        lines = (pending + chunk).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            ingestor.feed(line + "\n")
+        if len(pending) > ingestor.config.max_line_length and pending.startswith(("+", "-")):
+            # Minified bundle or similar: never buffer the whole line. Long context lines
+            # are kept, as in DiffIngestor.feed
+            ingestor.skip_file(SKIP_MINIFIED)
+            pending, discarding = "", True
+    if pending:
+        ingestor.feed(pending)
+    return ingestor.finish()
+
+
+def ingest_diff(diff: str, config: Optional[DiffFilterConfig] = None) -> IngestedDiff:
+    """Filter a diff that is already in memory."""
+    ingestor = DiffIngestor(config or diff_filter_config)
+    *lines, last = diff.split("\n")
+    for line in lines:
+        ingestor.feed(line + "\n")
+    if last:
+        ingestor.feed(last)
+    return ingestor.finish()
+
+
+diff_filter_config = load_diff_filter_config()
@@ -0,0 +1,299 @@
+# app/jobs.py
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional
+
+from pydantic import BaseModel
+
+from app.monitoring import JOB_QUEUE_DEPTH, JOBS_TOTAL
+
+logger = logging.getLogger("ai-pr-reviewer")
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# A running job's lease is renewed every JOB_LEASE_SECONDS / 3 while its worker is alive;
+# once it expires the job is considered abandoned and put back in the queue
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+
+
+# === Job model ===
+class ReviewJob(BaseModel):
+    id: str
+    status: str
+    request: dict
+    result: Optional[dict] = None
+    error: str = ""
+    created_at: float
+    updated_at: float
+
+
+# === Job stores ===
+class InMemoryJobStore:
+    """Jobs kept in process memory; the oldest finished jobs are dropped past max_jobs."""
+
+    def __init__(self, max_jobs: int = 10000):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, ReviewJob]" = OrderedDict()
+
+    def add(self, job: ReviewJob) -> None:
+        self._jobs[job.id] = job
+        if len(self._jobs) > self.max_jobs:
+            for job_id in [j.id for j in self._jobs.values() if j.status in (JOB_DONE, JOB_FAILED)]:
+                del self._jobs[job_id]
+                if len(self._jobs) <= self.max_jobs:
+                    break
+
+    def get(self, job_id: str) -> Optional[ReviewJob]:
+        job = self._jobs.get(job_id)
+        return job.model_copy(deep=True) if job else None
+
+    def update(self, job: ReviewJob) -> None:
+        self._jobs[job.id] = job
+
+    def claim_next(self) -> Optional[ReviewJob]:
+        for job in self._jobs.values():
+            if job.status == JOB_QUEUED:
+                job.status = JOB_RUNNING
+                job.updated_at = time.time()
+                return job.model_copy(deep=True)
+        return None
+
+    def renew(self, job_id: str) -> None:
+        pass  # Jobs cannot outlive their worker in memory
+
+    def requeue_running(self) -> int:
+        return 0  # Nothing survives a restart in memory
+
+    def count(self, status: str) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == status)
+
+    def prune(self, older_than: float) -> None:
+        for job_id in [j.id for j in self._jobs.values()
+                       if j.status in (JOB_DONE, JOB_FAILED) and j.updated_at < older_than]:
+            del self._jobs[job_id]
+
+
+class SQLiteJobStore:
+    """
+    Jobs kept in a SQLite file, so queued work survives a pod restart and several
+    uvicorn workers can share one queue. A claimed job records its owner (host:pid) and a
+    lease that the owner keeps renewing; only jobs whose lease has expired are requeued,
+    so a starting worker never takes over jobs that live workers are running.
+    """
+
+    def __init__(self, path: str, lease: float = JOB_LEASE_SECONDS):
+        self.path = path
+        self.lease = lease
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS review_jobs ("
+                " id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " request TEXT NOT NULL,"
+                " result TEXT,"
+                " error TEXT NOT NULL DEFAULT '',"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " owner TEXT NOT NULL DEFAULT '',"
+                " lease_expires_at REAL NOT NULL DEFAULT 0)"
+            )
+            # Files created before leases existed: their running jobs count as expired
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(review_jobs)")}
+            if "owner" not in columns:
+                conn.execute("ALTER TABLE review_jobs ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+                conn.execute(
+                    "ALTER TABLE review_jobs ADD COLUMN lease_expires_at REAL NOT NULL DEFAULT 0"
+                )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS review_jobs_status ON review_jobs (status, created_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    @staticmethod
+    def _to_job(row) -> ReviewJob:
+        return ReviewJob(
+            id=row[0], status=row[1], request=json.loads(row[2]),
+            result=json.loads(row[3]) if row[3] else None,
+            error=row[4], created_at=row[5], updated_at=row[6],
+        )
+
+    def add(self, job: ReviewJob) -> None:
+        self.update(job)
+
+    def get(self, job_id: str) -> Optional[ReviewJob]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM review_jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def update(self, job: ReviewJob) -> None:
+        # Upsert that leaves the owner and lease alone
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO review_jobs"
+                " (id, status, request, result, error, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (id) DO UPDATE SET status = excluded.status,"
+                " result = excluded.result, error = excluded.error,"
+                " updated_at = excluded.updated_at",
+                (job.id, job.status, json.dumps(job.request),
+                 json.dumps(job.result) if job.result is not None else None,
+                 job.error, job.created_at, job.updated_at),
+            )
+
+    def claim_next(self) -> Optional[ReviewJob]:
+        # Single UPDATE ... RETURNING so two workers never claim the same job
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "UPDATE review_jobs SET status = ?, updated_at = ?, owner = ?, lease_expires_at = ?"
+                " WHERE id = ("
+                " SELECT id FROM review_jobs WHERE status = ? ORDER BY created_at LIMIT 1"
+                ") RETURNING *",
+                (JOB_RUNNING, now, self.owner, now + self.lease, JOB_QUEUED),
+            ).fetchone()
+        return self._to_job(row) if row else None
+
+    def renew(self, job_id: str) -> None:
+        """Extend the lease on a job this process is running."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE review_jobs SET lease_expires_at = ?"
+                " WHERE id = ? AND owner = ? AND status = ?",
+                (time.time() + self.lease, job_id, self.owner, JOB_RUNNING),
+            )
+
+    def requeue_running(self) -> int:
+        """Put running jobs whose worker died (their lease has expired) back in the queue."""
+        now = time.time()
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE review_jobs SET status = ?, updated_at = ?, owner = ''"
+                " WHERE status = ? AND lease_expires_at < ?",
+                (JOB_QUEUED, now, JOB_RUNNING, now),
+            ).rowcount
+
+    def count(self, status: str) -> int:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM review_jobs WHERE status = ?", (status,)
+            ).fetchone()[0]
+
+    def prune(self, older_than: float) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM review_jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (JOB_DONE, JOB_FAILED, older_than),
+            )
+
+
+# === Queue + worker pool ===
+class JobQueue:
+    """Bounded pool of asyncio workers pulling review jobs from a store."""
+
+    def __init__(self, store, runner: Callable[[dict], Awaitable[dict]], workers: int = 4,
+                 poll_interval: float = 1.0, retention: float = 86400,
+                 heartbeat_interval: float = JOB_LEASE_SECONDS / 3):
+        self.store = store
+        self.runner = runner
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.heartbeat_interval = heartbeat_interval
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    def submit(self, request: dict) -> ReviewJob:
+        now = time.time()
+        job = ReviewJob(id=uuid.uuid4().hex, status=JOB_QUEUED, request=request,
+                        created_at=now, updated_at=now)
+        self.store.add(job)
+        JOB_QUEUE_DEPTH.inc()
+        self._wakeup.set()
+        return job
+
+    def get(self, job_id: str) -> Optional[ReviewJob]:
+        return self.store.get(job_id)
+
+    def start(self) -> None:
+        self._requeue_abandoned()
+        JOB_QUEUE_DEPTH.set(self.store.count(JOB_QUEUED))
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self) -> None:
+        while True:
+            job = self.store.claim_next()
+            if job is None:
+                # Pick up jobs whose worker died since start-up (e.g. another pod crashed)
+                self._requeue_abandoned()
+                self.store.prune(time.time() - self.retention)
+                self._wakeup.clear()
+                # Poll as well, to pick up jobs submitted by other processes
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            JOB_QUEUE_DEPTH.dec()
+            await self._run(job)
+
+    def _requeue_abandoned(self) -> None:
+        requeued = self.store.requeue_running()
+        if requeued:
+            logger.info(f"Requeued {requeued} interrupted review jobs")
+            JOB_QUEUE_DEPTH.inc(requeued)
+
+    async def _heartbeat(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            self.store.renew(job_id)
+
+    async def _run(self, job: ReviewJob) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            result = await self.runner(job.request)
+            if set(result) == {"error"}:
+                # Nothing was reviewed (e.g. GitHub failure)
+                job.status, job.error = JOB_FAILED, result["error"]
+            else:
+                job.status, job.result = JOB_DONE, result
+        except asyncio.CancelledError:
+            job.status = JOB_QUEUED  # Picked up again after restart
+            job.updated_at = time.time()
+            self.store.update(job)
+            raise
+        except Exception as e:
+            logger.exception(f"Review job {job.id} failed: {e}")
+            job.status, job.error = JOB_FAILED, str(e)
+        finally:
+            heartbeat.cancel()
+        job.updated_at = time.time()
+        self.store.update(job)
+        JOBS_TOTAL.labels(status=job.status).inc()
+
+
+def build_job_store():
+    """Build the job store from environment configuration."""
+    db_path = os.getenv("JOB_STORE_DB", "")
+    return SQLiteJobStore(db_path) if db_path else InMemoryJobStore()
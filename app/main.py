@@ -1,21 +1,105 @@
 # app/main.py
+import json
 import logging
-from fastapi import FastAPI, HTTPException, Response
-from fastapi.responses import PlainTextResponse
+import math
+import os
+from contextlib import asynccontextmanager, nullcontext
+from datetime import datetime
+from typing import List, Literal, Optional
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from app.review import review_github_pr
-from app.monitoring import MetricsMiddleware, get_metrics
-from requests.exceptions import RequestException
+from httpx import HTTPError
+from prometheus_client import CONTENT_TYPE_LATEST
+from app.admission import Overloaded, review_admission
+from app.bulk import review_repo
+from app.clients import close_clients
+from app.github import get_github_client
+from app.history import review_history
+from app.jobs import JobQueue, build_job_store
+from app.readiness import readiness
+from app.resilience import REVIEW_DEADLINE_SECONDS, breaker_states, deadline
+from app.monitoring import MetricsMiddleware, WEBHOOK_EVENTS, get_metrics, mark_worker_dead
+from app.webhooks import Debouncer, parse_pull_request_event, verify_signature
 
 # Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("ai-pr-reviewer")
 
+
+# app.review is imported inside the functions that use it: it pulls in the OpenAI SDK,
+# the slowest import in the app, so the worker starts without it and loads it during
+# warm-up (app/readiness.py).
+async def run_review_job(request: dict) -> dict:
+    """Job runner: the same review as POST /review, executed by the worker pool."""
+    from app.review import review_github_pr
+
+    return await review_github_pr(**request)
+
+
+job_queue = JobQueue(
+    build_job_store(),
+    run_review_job,
+    workers=int(os.getenv("JOB_WORKERS", "4")),
+)
+
+
+def dispatch_webhook_review(event: dict) -> None:
+    """Queue an incremental review for the latest head of a debounced PR."""
+    job = job_queue.submit({
+        "owner": event["owner"],
+        "repo": event["repo"],
+        "pr_number": event["pr_number"],
+        "incremental": True,
+    })
+    logger.info(f"Webhook review job {job.id} queued: {event['owner']}/{event['repo']} "
+                f"PR#{event['pr_number']} @ {event['head_sha']}")
+
+
+webhook_debouncer = Debouncer(
+    window=float(os.getenv("WEBHOOK_DEBOUNCE_SECONDS", "10")),
+    callback=dispatch_webhook_review,
+)
+
+
+async def _review_priority(owner: str, repo: str, pr_number: int,
+                           deadline_seconds: Optional[float] = None) -> float:
+    """
+    Queue priority for a review that has to wait: its PR's changed lines when small diffs
+    go first (REVIEW_PRIORITIZE_SMALL_DIFFS), otherwise arrival order. Reviews that will
+    not wait (a free slot, or a full queue that rejects them) skip the GitHub lookup, and
+    the lookup gives up within the review's deadline.
+    """
+    if (not review_admission.prioritize_small_diffs or not review_admission.saturated()
+            or review_admission.queue_full()):
+        return 0
+    try:
+        with deadline(deadline_seconds or REVIEW_DEADLINE_SECONDS):
+            pull = await get_github_client().get_pull(owner, repo, pr_number)
+    except (HTTPError, ValueError):
+        return 0  # The review itself will report the GitHub failure
+    return pull.get("additions", 0) + pull.get("deletions", 0)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start job workers and the background warm-up (see /ready); clean up on shutdown."""
+    readiness.start()
+    job_queue.start()
+    yield
+    await readiness.stop()
+    await webhook_debouncer.stop()
+    await job_queue.stop()
+    await close_clients()
+    mark_worker_dead()
+
+
 # FastAPI app
 app = FastAPI(
     title="AI PR Reviewer",
     description="Fetch GitHub PR diffs and get structured AI code reviews.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add monitoring middleware
@@ -27,6 +111,33 @@ class PRRequest(BaseModel):
     owner: str = Field(..., min_length=1, description="GitHub repository owner")
     repo: str = Field(..., min_length=1, description="Repository name")
     pr_number: int = Field(..., gt=0, description="Pull request number")
+    heuristics_only: bool = Field(
+        False, description="Skip the AI model and run only the heuristic rules")
+    incremental: bool = Field(
+        False,
+        description="Review per file and reuse results for files unchanged since the last review",
+    )
+    deadline_seconds: Optional[float] = Field(
+        None, gt=0, le=600,
+        description="Time budget for the whole review: GitHub requests time out once it has "
+                    "passed, and the heuristic review is returned if the model misses it",
+    )
+
+
+class RepoReviewRequest(BaseModel):
+    owner: str = Field(..., min_length=1, description="GitHub repository owner")
+    repo: str = Field(..., min_length=1, description="Repository name")
+    state: Literal["open", "closed", "all"] = Field("open", description="Pull request state")
+    labels: List[str] = Field([], description="Only review PRs carrying all of these labels")
+    updated_since: Optional[datetime] = Field(
+        None, description="Only review PRs updated at or after this time")
+    max_prs: Optional[int] = Field(None, gt=0, description="Stop after this many PRs")
+    heuristics_only: bool = Field(
+        False, description="Skip the AI model and run only the heuristic rules")
+    incremental: bool = Field(
+        False,
+        description="Review per file and reuse results for files unchanged since the last review",
+    )
 
 
 # === Health check endpoints ===
@@ -41,18 +152,29 @@ async def health_check():
 
 @app.get("/ready", tags=["Health"])
 async def readiness_check():
-    """Readiness check for Kubernetes."""
-    # Add checks for dependencies (OpenAI API, etc.)
-    return {
-        "status": "ready",
-        "service": "ai-pr-reviewer"
-    }
+    """
+    Readiness check for Kubernetes: 503 until warm-up has finished, and while GitHub is
+    unreachable. Dependency checks run in the background (READY_CHECK_INTERVAL_SECONDS);
+    this endpoint serves their last results and never waits on GitHub or OpenAI.
+    """
+    # OpenAI failures and an open breaker do not make the service unready: reviews fall
+    # back to heuristics
+    status = readiness.status()
+    return JSONResponse(
+        status_code=200 if status["ready"] else 503,
+        content={
+            "status": "ready" if status["ready"] else "not ready",
+            "service": "ai-pr-reviewer",
+            **status,
+            "circuit_breakers": breaker_states(),
+        },
+    )
 
 
 @app.get("/metrics", response_class=PlainTextResponse, tags=["Monitoring"])
 async def metrics():
     """Prometheus metrics endpoint."""
-    return get_metrics()
+    return Response(content=get_metrics(), media_type=CONTENT_TYPE_LATEST)
 
 
 # === Review endpoint ===
@@ -68,14 +190,27 @@ async def review_pr(pr_request: PRRequest):
             - pr: dict of PR info
             - error: str if any failure occurred
     """
+    from app.review import review_github_pr
+
     logger.info(f"Review requested: {pr_request.owner}/{pr_request.repo} PR#{pr_request.pr_number}")
 
     try:
-        review_data = review_github_pr(
-            pr_request.owner,
-            pr_request.repo,
-            pr_request.pr_number
-        )
+        # Heuristics-only reviews never wait on the model, so they skip admission control
+        if pr_request.heuristics_only:
+            admission = nullcontext()
+        else:
+            priority = await _review_priority(pr_request.owner, pr_request.repo,
+                                              pr_request.pr_number, pr_request.deadline_seconds)
+            admission = review_admission.admit(priority)
+        async with admission:
+            review_data = await review_github_pr(
+                pr_request.owner,
+                pr_request.repo,
+                pr_request.pr_number,
+                heuristics_only=pr_request.heuristics_only,
+                incremental=pr_request.incremental,
+                deadline_seconds=pr_request.deadline_seconds,
+            )
         # If GitHub returned partial/failure info, escalate as HTTP 502
         if review_data.get("error"):
             logger.warning(f"Partial review due to error: {review_data['error']}")
@@ -89,10 +224,163 @@ async def review_pr(pr_request: PRRequest):
             }
         }
 
-    except RequestException as e:
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e),
+                            headers={"Retry-After": str(math.ceil(e.retry_after))})
+
+    except HTTPError as e:
         logger.error(f"GitHub API error: {e}")
         raise HTTPException(status_code=502, detail=f"GitHub API failure: {e}")
 
     except Exception as e:
         logger.exception(f"Unexpected error reviewing PR: {e}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Internal server error: {e}")
+
+
+@app.post("/review/stream", summary="Review a GitHub pull request with streamed progress",
+          tags=["Review"])
+async def review_pr_stream(pr_request: PRRequest):
+    """
+    Server-sent events version of /review.
+
+    Events:
+        - heuristics: heuristic findings, sent as soon as the diff is fetched
+        - token: a piece of the model's output as it is generated
+        - review: the final validated review (same shape as /review's analysis)
+        - error: GitHub failure; no further events follow
+    """
+    from app.review import stream_review_github_pr
+
+    logger.info(f"Streaming review requested: "
+                f"{pr_request.owner}/{pr_request.repo} PR#{pr_request.pr_number}")
+
+    async def events():
+        try:
+            async for event, data in stream_review_github_pr(**pr_request.model_dump()):
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        except Exception as e:
+            logger.exception(f"Unexpected error streaming PR review: {e}")
+            yield f"event: error\ndata: {json.dumps({'error': f'Internal server error: {e}'})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/review/repo", summary="Review a repository's pull requests", tags=["Review"])
+async def review_repo_prs(repo_request: RepoReviewRequest):
+    """
+    Review every pull request of a repository matching the filters, streamed as NDJSON.
+
+    PRs are reviewed concurrently (BULK_REVIEW_CONCURRENCY at a time); each line is sent
+    as soon as its PR is done, so lines arrive in completion order:
+        - {"event": "review", "pr_number", "title", "analysis"}: same analysis as /review
+        - {"event": "error", "pr_number", "title", "error"}: the PR could not be reviewed
+        - {"event": "error", "error"}: listing the PRs failed; no more PRs are started
+        - {"event": "summary", "reviewed", "errors", "listing_error"}: always the last line
+    """
+    logger.info(f"Repository review requested: {repo_request.owner}/{repo_request.repo}")
+
+    async def lines():
+        try:
+            async for line in review_repo(**repo_request.model_dump()):
+                yield json.dumps(line) + "\n"
+        except Exception as e:
+            logger.exception(f"Unexpected error reviewing repository: {e}")
+            yield json.dumps({"event": "error", "error": f"Internal server error: {e}"}) + "\n"
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# === Job endpoints ===
+@app.post("/reviews", status_code=202, summary="Queue a pull request review", tags=["Review"])
+async def submit_review_job(pr_request: PRRequest):
+    """
+    Queue a review and return immediately with a job id.
+
+    Poll GET /reviews/{job_id} for the status and, once done, the review result.
+    """
+    job = job_queue.submit(pr_request.model_dump())
+    logger.info(f"Review job {job.id} queued: "
+                f"{pr_request.owner}/{pr_request.repo} PR#{pr_request.pr_number}")
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/reviews/{job.id}",
+    }
+
+
+@app.get("/reviews/{job_id}", summary="Get a queued review's status and result", tags=["Review"])
+async def get_review_job(job_id: str):
+    """
+    Return a review job.
+
+    status is one of queued, running, done or failed; result holds the analysis once done.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Review job not found: {job_id}")
+    return job.model_dump()
+
+
+# === Review history endpoints ===
+@app.get("/history/{owner}/{repo}/trends", summary="Review trends for a repository",
+         tags=["History"])
+async def get_repo_trends(owner: str, repo: str,
+                          days: int = Query(30, ge=1, le=365),
+                          top_issues: int = Query(10, ge=1, le=100)):
+    """
+    Per-day review count, risk distribution and average complexity over the last `days`
+    days, plus the most frequent issues. Served from rollups kept up to date on every review.
+    """
+    return review_history.trends(owner, repo, days=days, top_issues=top_issues)
+
+
+@app.get("/history/{owner}/{repo}/pulls/{pr_number}", summary="Review history of a pull request",
+         tags=["History"])
+async def get_pull_history(owner: str, repo: str, pr_number: int,
+                           limit: int = Query(50, ge=1, le=500)):
+    """Reviews recorded for a pull request, one per reviewed head SHA, newest first."""
+    return {"reviews": review_history.pull_history(owner, repo, pr_number, limit=limit)}
+
+
+# === Webhook endpoint ===
+@app.post("/webhooks/github", status_code=202, summary="GitHub webhook receiver", tags=["Webhooks"])
+async def github_webhook(request: Request):
+    """
+    Receive GitHub pull_request events and schedule reviews.
+
+    Deliveries must be signed with GITHUB_WEBHOOK_SECRET. opened, synchronize and
+    reopened events are debounced per PR, so a burst of pushes triggers one review
+    of the latest head.
+    """
+    secret = os.getenv("GITHUB_WEBHOOK_SECRET", "")
+    if not secret:
+        raise HTTPException(status_code=503, detail="Webhook secret not configured")
+
+    body = await request.body()
+    if not verify_signature(secret, body, request.headers.get("X-Hub-Signature-256")):
+        WEBHOOK_EVENTS.labels(result="invalid_signature").inc()
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+    event_type = request.headers.get("X-GitHub-Event", "")
+    if event_type == "ping":
+        return {"status": "pong"}
+    try:
+        event = parse_pull_request_event(json.loads(body)) if event_type == "pull_request" else None
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        WEBHOOK_EVENTS.labels(result="invalid_payload").inc()
+        raise HTTPException(status_code=400, detail=f"Invalid pull_request payload: {e}")
+    if event is None:
+        WEBHOOK_EVENTS.labels(result="ignored").inc()
+        return {"status": "ignored"}
+
+    replaced = webhook_debouncer.submit((event["owner"], event["repo"], event["pr_number"]), event)
+    WEBHOOK_EVENTS.labels(result="debounced" if replaced else "scheduled").inc()
+    return {"status": "scheduled", "head_sha": event["head_sha"]}
@@ -1,10 +1,14 @@
 # app/monitoring.py
+import asyncio
+import os
 import time
 import logging
-from prometheus_client import Counter, Histogram, Gauge, generate_latest
+from prometheus_client import (
+    CollectorRegistry, Counter, Histogram, Gauge, REGISTRY, generate_latest, multiprocess,
+)
 from functools import wraps
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 logger = logging.getLogger("ai-pr-reviewer")
 
@@ -23,9 +27,14 @@ REQUEST_DURATION = Histogram(
 
 ACTIVE_REQUESTS = Gauge(
     'api_active_requests',
-    'Number of active requests'
+    'Number of active requests',
+    multiprocess_mode='livesum'
 )
 
+# Model calls take seconds to minutes, pipeline stages anywhere from microseconds up
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120, 300)
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1) + LLM_BUCKETS
+
 AI_REVIEW_COUNT = Counter(
     'ai_reviews_total',
     'Total AI reviews performed',
@@ -34,7 +43,51 @@ AI_REVIEW_COUNT = Counter(
 
 AI_REVIEW_DURATION = Histogram(
     'ai_review_duration_seconds',
-    'AI review processing time'
+    'AI review processing time',
+    buckets=LLM_BUCKETS
+)
+
+AI_REVIEW_TOKENS = Counter(
+    'ai_review_tokens_total',
+    'Model tokens used by reviews',
+    ['kind']
+)
+
+REVIEW_STAGE_DURATION = Histogram(
+    'review_stage_duration_seconds',
+    'Time spent in each review pipeline stage',
+    ['stage'],
+    buckets=STAGE_BUCKETS
+)
+
+REVIEW_MODEL_TIER = Counter(
+    'review_model_tier_total',
+    'Reviews routed to each model tier',
+    ['tier']
+)
+
+REVIEW_OUTCOMES = Counter(
+    'review_outcomes_total',
+    'Reviews by how they were produced (ai, partial, fallback, cache_hit, heuristics_only)',
+    ['outcome']
+)
+
+DIFF_SIZE_BYTES = Histogram(
+    'review_diff_size_bytes',
+    'Size of reviewed diffs in bytes',
+    buckets=(1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+)
+
+DIFF_FILES_SKIPPED = Counter(
+    'review_diff_files_skipped_total',
+    'Files dropped from diffs before review',
+    ['reason']
+)
+
+DIFF_SIZE_LINES = Histogram(
+    'review_diff_size_lines',
+    'Size of reviewed diffs in lines',
+    buckets=(10, 50, 200, 1000, 5000, 20000, 100000)
 )
 
 GITHUB_API_CALLS = Counter(
@@ -43,36 +96,182 @@ GITHUB_API_CALLS = Counter(
     ['status']
 )
 
+REVIEW_CACHE_HITS = Counter(
+    'review_cache_hits_total',
+    'Review cache hits',
+    ['layer']
+)
 
-class MetricsMiddleware(BaseHTTPMiddleware):
-    """Middleware to track request metrics."""
+REVIEW_CACHE_MISSES = Counter(
+    'review_cache_misses_total',
+    'Review cache misses'
+)
+
+REVIEW_CACHE_EVICTIONS = Counter(
+    'review_cache_evictions_total',
+    'Review cache evictions',
+    ['reason']
+)
+
+COALESCED_REQUESTS = Counter(
+    'review_requests_coalesced_total',
+    'Review requests that joined an identical in-flight review'
+)
+
+JOB_QUEUE_DEPTH = Gauge(
+    'review_job_queue_depth',
+    'Review jobs waiting for a worker',
+    multiprocess_mode='livesum'
+)
+
+JOBS_TOTAL = Counter(
+    'review_jobs_total',
+    'Review jobs finished',
+    ['status']
+)
+
+WEBHOOK_EVENTS = Counter(
+    'github_webhook_events_total',
+    'GitHub webhook deliveries',
+    ['result']
+)
+
+UPSTREAM_QUEUE_DEPTH = Gauge(
+    'upstream_queue_depth',
+    'Outbound calls waiting for a scheduler slot',
+    ['upstream'],
+    multiprocess_mode='livesum'
+)
+
+UPSTREAM_WAIT_SECONDS = Histogram(
+    'upstream_wait_seconds',
+    'Time outbound calls waited for a scheduler slot',
+    ['upstream'],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+
+UPSTREAM_CONCURRENCY_LIMIT = Gauge(
+    'upstream_concurrency_limit',
+    'Current adaptive concurrency limit per upstream',
+    ['upstream'],
+    multiprocess_mode='liveall'
+)
+
+UPSTREAM_RETRIES = Counter(
+    'upstream_retries_total',
+    'Outbound calls retried after throttling or transient errors',
+    ['upstream', 'reason']
+)
 
-    async def dispatch(self, request: Request, call_next):
-        ACTIVE_REQUESTS.inc()
-        start_time = time.time()
 
-        response = await call_next(request)
+CIRCUIT_BREAKER_STATE = Gauge(
+    'circuit_breaker_state',
+    'Circuit breaker state per upstream (0 closed, 1 half-open, 2 open)',
+    ['upstream'],
+    multiprocess_mode='liveall'
+)
+
+HEDGED_CALLS = Counter(
+    'hedged_calls_total',
+    'Hedged model calls by which attempt answered first',
+    ['winner']
+)
+
+REVIEWS_IN_FLIGHT = Gauge(
+    'review_admission_in_flight',
+    'Reviews admitted and running',
+    multiprocess_mode='livesum'
+)
+
+REVIEW_ADMISSION_QUEUE_DEPTH = Gauge(
+    'review_admission_queue_depth',
+    'Reviews waiting for admission',
+    multiprocess_mode='livesum'
+)
 
-        duration = time.time() - start_time
+REVIEWS_REJECTED = Counter(
+    'review_admission_rejected_total',
+    'Reviews turned away with a 503',
+    ['reason']
+)
 
-        REQUEST_COUNT.labels(
-            method=request.method,
-            endpoint=request.url.path,
-            status=response.status_code
-        ).inc()
 
-        REQUEST_DURATION.labels(
-            method=request.method,
-            endpoint=request.url.path
-        ).observe(duration)
+UNMATCHED_ROUTE = "unmatched"
 
-        ACTIVE_REQUESTS.dec()
 
-        return response
+def route_template(scope: Scope) -> str:
+    """
+    Path template of the route that handled the request (e.g. /reviews/{job_id}), so
+    the endpoint label has one value per route rather than one per URL.
+    """
+    route = scope.get("route")
+    if route is None:
+        # Older Starlette does not record the route in the scope; match it again
+        for candidate in getattr(scope.get("app"), "routes", ()):
+            if candidate.matches(scope)[0] == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware to track request metrics. Unlike BaseHTTPMiddleware it does
+    not buffer the response, so streaming endpoints stream through it.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500  # Reported if the app raises before sending a response
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        ACTIVE_REQUESTS.inc()
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start_time
+            endpoint = route_template(scope)
+            REQUEST_COUNT.labels(
+                method=scope["method"],
+                endpoint=endpoint,
+                status=status
+            ).inc()
+            REQUEST_DURATION.labels(
+                method=scope["method"],
+                endpoint=endpoint
+            ).observe(duration)
+            ACTIVE_REQUESTS.dec()
 
 
 def track_ai_review(func):
-    """Decorator to track AI review metrics."""
+    """Decorator to track AI review metrics (sync or async functions)."""
+    if asyncio.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start_time = time.time()
+            try:
+                result = await func(*args, **kwargs)
+                AI_REVIEW_COUNT.labels(status='success').inc()
+                return result
+            except Exception:
+                AI_REVIEW_COUNT.labels(status='error').inc()
+                raise
+            finally:
+                AI_REVIEW_DURATION.observe(time.time() - start_time)
+        return async_wrapper
+
     @wraps(func)
     def wrapper(*args, **kwargs):
         start_time = time.time()
@@ -89,6 +288,21 @@ def track_ai_review(func):
     return wrapper
 
 
+def multiprocess_enabled() -> bool:
+    """True when prometheus_client runs in multiprocess mode (several workers per pod)."""
+    return bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+
 def get_metrics():
-    """Return Prometheus metrics."""
-    return generate_latest()
\ No newline at end of file
+    """Return Prometheus metrics, aggregated over all worker processes in multiprocess mode."""
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_worker_dead() -> None:
+    """Drop this worker's live gauges from the shared metrics directory on shutdown."""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(os.getpid())
\ No newline at end of file
@@ -0,0 +1,36 @@
+# app/prompts.py
+from typing import List
+
+# Bump whenever the prompt sent to the model changes, so cached reviews are invalidated
+PROMPT_VERSION = "2"
+
+# Sent unchanged as the first message of every review call, ahead of the diff, so the
+# provider's prompt-prefix cache can reuse it across requests. Keep it free of
+# per-request details (repository, PR number, dates).
+SYSTEM_PROMPT = """You are a senior software engineer reviewing a pull request.
+You receive a unified diff (possibly one part of a larger diff) and review only the changes in it.
+
+Look for bugs, security problems, missing error handling, missing tests, performance problems \
+and leftover debugging code.
+Do not comment on formatting that a linter would fix.
+
+Respond with a single JSON object and nothing else:
+{
+  "summary": "one or two sentences describing the change",
+  "issues": ["each concrete problem found, one sentence each"],
+  "complexity_score": 1,
+  "risk_level": "low",
+  "recommended_actions": ["each follow-up the author or reviewer should take"]
+}
+
+complexity_score is an integer from 1 (trivial) to 10 (very complex).
+risk_level is one of "low", "medium" or "high".
+Use empty lists when there is nothing to report."""
+
+
+def review_messages(diff_chunk: str) -> List[dict]:
+    """Chat messages for reviewing one chunk of a diff: the fixed system prompt, then the diff."""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": diff_chunk},
+    ]
@@ -0,0 +1,240 @@
+# app/ratelimit.py
+import asyncio
+import logging
+import math
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from app.monitoring import (
+    UPSTREAM_CONCURRENCY_LIMIT, UPSTREAM_QUEUE_DEPTH, UPSTREAM_RETRIES, UPSTREAM_WAIT_SECONDS,
+)
+from app.resilience import time_left
+
+logger = logging.getLogger("ai-pr-reviewer")
+
+T = TypeVar("T")
+
+
+class Throttled(Exception):
+    """Raised inside a scheduled call when the upstream rate-limited or briefly failed it."""
+
+    def __init__(self, cause: Exception, retry_after: Optional[float] = None,
+                 rate_limited: bool = True):
+        super().__init__(str(cause))
+        self.cause = cause
+        self.retry_after = retry_after
+        self.rate_limited = rate_limited
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Raised by acquire when no slot frees up before the current deadline."""
+
+
+class UpstreamScheduler:
+    """
+    Outbound call scheduler for one upstream (GitHub, OpenAI).
+
+    Combines a token bucket (request rate) with an adaptive concurrency limit: the limit
+    grows by about one per round of successful calls and halves when the upstream
+    throttles. Rate-limit headers re-pace the bucket so the remaining quota is spread
+    until it resets, and Retry-After blocks new calls until the upstream is ready.
+    """
+
+    def __init__(self, name: str, rate: float, max_concurrency: int, burst: Optional[int] = None,
+                 max_retries: int = 3, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.name = name
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst or max_concurrency
+        self.tokens = float(self.burst)
+        self.max_concurrency = max_concurrency
+        self.concurrency = float(max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._condition: Optional[asyncio.Condition] = None
+        UPSTREAM_CONCURRENCY_LIMIT.labels(upstream=name).set(max_concurrency)
+
+    # --- Admission ---
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _admit_delay(self) -> float:
+        """Seconds until a call may start (0 = now, inf = wait for a running call to finish)."""
+        now = time.monotonic()
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.in_flight >= max(1, int(self.concurrency)):
+            return math.inf
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        return 0.0
+
+    async def acquire(self) -> None:
+        """
+        Wait for a slot. Within a deadline, a wait that cannot end in time (e.g. a rate
+        limit that resets later) raises DeadlineExceeded at once; otherwise waits are cut
+        off when the deadline passes.
+        """
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        start = time.monotonic()
+        UPSTREAM_QUEUE_DEPTH.labels(upstream=self.name).inc()
+        try:
+            async with self._condition:
+                while True:
+                    delay = self._admit_delay()
+                    if delay <= 0:
+                        break
+                    left = time_left()
+                    if left is not None:
+                        if left <= 0 or (delay != math.inf and delay > left):
+                            raise DeadlineExceeded(f"No {self.name} call slot before the deadline")
+                        delay = min(delay, left)
+                    try:
+                        await asyncio.wait_for(self._condition.wait(),
+                                               None if delay == math.inf else delay)
+                    except asyncio.TimeoutError:
+                        pass
+                self.tokens -= 1
+                self.in_flight += 1
+        finally:
+            UPSTREAM_QUEUE_DEPTH.labels(upstream=self.name).dec()
+        UPSTREAM_WAIT_SECONDS.labels(upstream=self.name).observe(time.monotonic() - start)
+
+    async def release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold a slot for one call, without retries (e.g. while a response streams)."""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            await self.release()
+
+    # --- Feedback from the upstream ---
+    def observe_limits(self, remaining: Optional[int], reset_in: Optional[float]) -> None:
+        """Pace the bucket from rate-limit headers so the remaining quota lasts until reset."""
+        if remaining is None or reset_in is None:
+            return
+        reset_in = max(reset_in, 1.0)
+        if remaining <= 0:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + reset_in)
+            return
+        self.rate = min(self.max_rate, remaining / reset_in)
+
+    def _on_success(self) -> None:
+        self.concurrency = min(self.max_concurrency,
+                               self.concurrency + 1 / max(self.concurrency, 1))
+        UPSTREAM_CONCURRENCY_LIMIT.labels(upstream=self.name).set(int(self.concurrency))
+
+    def _on_throttled(self, retry_after: Optional[float]) -> None:
+        self.concurrency = max(1.0, self.concurrency / 2)
+        UPSTREAM_CONCURRENCY_LIMIT.labels(upstream=self.name).set(int(self.concurrency))
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Full-jitter exponential backoff, never shorter than Retry-After."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return delay + (retry_after or 0)
+
+    # --- Scheduled calls ---
+    async def run(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn under the scheduler. If it raises Throttled, back off and retry up to
+        max_retries times, then raise the original upstream error. No retry is attempted
+        if its backoff would run past the current deadline.
+        """
+        attempt = 0
+        while True:
+            await self.acquire()
+            try:
+                result = await fn()
+            except Throttled as e:
+                if e.rate_limited:
+                    self._on_throttled(e.retry_after)
+                delay = self._backoff(attempt, e.retry_after)
+                left = time_left()
+                if attempt >= self.max_retries or (left is not None and delay >= left):
+                    raise e.cause
+                UPSTREAM_RETRIES.labels(
+                    upstream=self.name, reason="rate_limited" if e.rate_limited else "transient"
+                ).inc()
+                logger.warning(
+                    f"{self.name} call throttled ({e}); retry {attempt + 1} in {delay:.1f}s")
+            else:
+                self._on_success()
+                return result
+            finally:
+                await self.release()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+# === Per-upstream registry ===
+UPSTREAMS = {
+    "github": {
+        "rate": float(os.getenv("GITHUB_MAX_RATE_PER_SECOND", "10")),
+        "max_concurrency": int(os.getenv("GITHUB_MAX_CONCURRENCY", "16")),
+    },
+    "openai": {
+        "rate": float(os.getenv("OPENAI_MAX_RATE_PER_SECOND", "8")),
+        "max_concurrency": int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")),
+    },
+}
+
+_schedulers: Dict[str, UpstreamScheduler] = {}
+
+
+def get_scheduler(upstream: str) -> UpstreamScheduler:
+    """Return the shared scheduler for an upstream, creating it on first use."""
+    scheduler = _schedulers.get(upstream)
+    if scheduler is None:
+        scheduler = _schedulers[upstream] = UpstreamScheduler(upstream, **UPSTREAMS[upstream])
+    return scheduler
+
+
+def reset_schedulers() -> None:
+    """Drop all schedulers (their locks belong to the event loop that created them)."""
+    _schedulers.clear()
+
+
+# === Header parsing ===
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse '20', '1.5', '20ms', '1s' or '6m0s' style durations into seconds."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total, number = 0.0, ""
+    i = 0
+    while i < len(value):
+        char = value[i]
+        if char.isdigit() or char == ".":
+            number += char
+        elif value.startswith("ms", i) and number:
+            total += float(number) / 1000
+            number = ""
+            i += 1
+        elif char in "hms" and number:
+            total += float(number) * {"h": 3600, "m": 60, "s": 1}[char]
+            number = ""
+        else:
+            return None
+        i += 1
+    return total if not number else None
@@ -0,0 +1,154 @@
+# app/readiness.py
+import asyncio
+import importlib
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from pydantic import BaseModel
+
+from app.clients import get_http_client, get_openai_client, init_clients
+from app.github import GITHUB_API_URL
+
+logger = logging.getLogger("ai-pr-reviewer")
+
+# Dependency probes run in the background this often; /ready serves the last result
+READY_CHECK_INTERVAL_SECONDS = float(os.getenv("READY_CHECK_INTERVAL_SECONDS", "30"))
+READY_CHECK_TIMEOUT_SECONDS = float(os.getenv("READY_CHECK_TIMEOUT_SECONDS", "5"))
+
+
+# === Dependency checks ===
+class CheckResult(BaseModel):
+    ok: bool
+    detail: str = ""
+    checked_at: float
+
+
+class DependencyCheck:
+    """
+    Reachability probe with a cached result: check() probes at most once per interval,
+    and concurrent callers share a probe in flight, so it never floods GitHub or OpenAI.
+    """
+
+    def __init__(self, name: str, probe: Callable[[], Awaitable[str]],
+                 interval: float = READY_CHECK_INTERVAL_SECONDS,
+                 timeout: float = READY_CHECK_TIMEOUT_SECONDS):
+        self.name = name
+        self.probe = probe
+        self.interval = interval
+        self.timeout = timeout
+        self.result: Optional[CheckResult] = None
+        self._probing: Optional[asyncio.Task] = None
+
+    async def check(self) -> CheckResult:
+        if self.result is not None and time.time() - self.result.checked_at < self.interval:
+            return self.result
+        return await self.refresh()
+
+    async def refresh(self) -> CheckResult:
+        """Probe now, or wait for the probe already in flight."""
+        if self._probing is None or self._probing.done():
+            self._probing = asyncio.ensure_future(self._run())
+        return await asyncio.shield(self._probing)
+
+    async def _run(self) -> CheckResult:
+        try:
+            detail = await asyncio.wait_for(self.probe(), self.timeout)
+            self.result = CheckResult(ok=True, detail=detail, checked_at=time.time())
+        except Exception as e:
+            self.result = CheckResult(ok=False, detail=f"{type(e).__name__}: {e}",
+                                      checked_at=time.time())
+            logger.warning(f"Readiness check {self.name} failed: {self.result.detail}")
+        return self.result
+
+
+async def probe_github() -> str:
+    """GET /rate_limit: does not count against the quota."""
+    headers = {"Accept": "application/vnd.github+json"}
+    if os.getenv("GITHUB_TOKEN"):
+        headers["Authorization"] = f"Bearer {os.getenv('GITHUB_TOKEN')}"
+    resp = await get_http_client().get(f"{GITHUB_API_URL.rstrip('/')}/rate_limit", headers=headers)
+    if resp.status_code >= 500:
+        resp.raise_for_status()
+    return f"HTTP {resp.status_code}"
+
+
+async def probe_openai() -> str:
+    """List models: authenticated, free, and opens the SDK's connection pool."""
+    await get_openai_client().models.list()
+    return "reachable"
+
+
+# === Warm-up and readiness ===
+class Readiness:
+    """
+    Warms the worker up in the background after start-up, then keeps re-running the
+    dependency checks every interval, and decides whether it may take traffic. Ready
+    means warm-up has finished and GitHub is reachable. OpenAI is only reported: without
+    it reviews fall back to heuristics, and pulling every pod would turn that into an
+    outage. status() only reads the last results, so /ready never waits on a probe.
+    """
+
+    def __init__(self, checks: Dict[str, DependencyCheck], required: tuple = ("github",),
+                 interval: float = READY_CHECK_INTERVAL_SECONDS):
+        self.checks = checks
+        self.required = required
+        self.interval = interval
+        self.warmed = False
+        self.warm_up_seconds: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def warm_up(self) -> None:
+        """Import the review stack, create the clients and open connections to both upstreams."""
+        start = time.perf_counter()
+        try:
+            # The OpenAI SDK and review modules are the slowest imports; load them off the
+            # event loop
+            await asyncio.to_thread(importlib.import_module, "app.review")
+            init_clients()
+            # The first probes open (TLS) connections in both pools, so real reviews start warm
+            await asyncio.gather(*(check.check() for check in self.checks.values()))
+        except Exception as e:
+            logger.exception(f"Warm-up failed, worker stays unready: {e}")
+            return
+        self.warm_up_seconds = round(time.perf_counter() - start, 3)
+        self.warmed = True
+        logger.info(f"Warm-up finished in {self.warm_up_seconds}s")
+
+    async def _run(self) -> None:
+        await self.warm_up()
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.refresh()
+
+    async def refresh(self) -> None:
+        """Re-run every dependency check; failures are recorded in the results."""
+        await asyncio.gather(*(check.refresh() for check in self.checks.values()))
+
+    def status(self) -> dict:
+        results = {}
+        if self.warmed:
+            results = {name: check.result for name, check in self.checks.items()
+                       if check.result is not None}
+        ready = self.warmed and all(results[name].ok for name in self.required if name in results)
+        return {
+            "ready": ready,
+            "warmed": self.warmed,
+            "warm_up_seconds": self.warm_up_seconds,
+            "checks": {name: result.model_dump() for name, result in results.items()},
+        }
+
+
+readiness = Readiness({
+    "github": DependencyCheck("github", probe_github),
+    "openai": DependencyCheck("openai", probe_openai),
+})
@@ -0,0 +1,193 @@
+# app/resilience.py
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import (
+    AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, Tuple, Type, TypeVar,
+)
+
+from app.monitoring import CIRCUIT_BREAKER_STATE, HEDGED_CALLS
+
+logger = logging.getLogger("ai-pr-reviewer")
+
+T = TypeVar("T")
+
+# Whole-review time budget; the model call gets whatever is left of it
+REVIEW_DEADLINE_SECONDS = float(os.getenv("REVIEW_DEADLINE_SECONDS", "60"))
+
+
+# === Deadlines ===
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Set a deadline for the enclosed work (and tasks it spawns). An enclosing deadline
+    that is earlier wins, so nested calls can only shorten it.
+    """
+    if seconds is None:
+        yield
+        return
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(at, current))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_left() -> Optional[float]:
+    """Seconds until the current deadline (never negative), or None without a deadline."""
+    at = _deadline.get()
+    return None if at is None else max(at - time.monotonic(), 0.0)
+
+
+def deadline_expired() -> bool:
+    left = time_left()
+    return left is not None and left <= 0
+
+
+# === Circuit breaker ===
+BREAKER_CLOSED = "closed"
+BREAKER_HALF_OPEN = "half_open"
+BREAKER_OPEN = "open"
+BREAKER_STATE_VALUES = {BREAKER_CLOSED: 0, BREAKER_HALF_OPEN: 1, BREAKER_OPEN: 2}
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing provider. After failure_threshold consecutive failures the
+    breaker opens and calls are rejected at once; after recovery_time it lets a single
+    probe call through (half-open), closing again if the probe succeeds and re-opening
+    if it fails.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_time: float = 30.0,
+                 failures: Tuple[Type[BaseException], ...] = (Exception,)):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.failures = failures
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        CIRCUIT_BREAKER_STATE.labels(upstream=name).set(0)
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            logger.warning(f"{self.name} circuit breaker {self.state} -> {state}")
+        self.state = state
+        CIRCUIT_BREAKER_STATE.labels(upstream=self.name).set(BREAKER_STATE_VALUES[state])
+
+    def rejecting(self) -> bool:
+        """True while calls would be rejected (open and not yet due for a probe)."""
+        if self.state == BREAKER_OPEN:
+            return time.monotonic() - self.opened_at < self.recovery_time
+        return self.state == BREAKER_HALF_OPEN and self._probe_in_flight
+
+    def _admit(self) -> bool:
+        if self.state == BREAKER_OPEN and not self.rejecting():
+            self._set_state(BREAKER_HALF_OPEN)
+        if self.state == BREAKER_CLOSED:
+            return True
+        if self.state == BREAKER_HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def reset(self) -> None:
+        """Close the breaker and forget past failures."""
+        self.record_success()
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        self._set_state(BREAKER_CLOSED)
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == BREAKER_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set_state(BREAKER_OPEN)
+
+    @asynccontextmanager
+    async def attempt(self) -> AsyncIterator[None]:
+        """
+        Admit one call for the enclosed block (e.g. a streamed response), recording how it
+        ends; raises CircuitOpen if the breaker does not admit it.
+        """
+        if not self._admit():
+            raise CircuitOpen(f"{self.name} circuit breaker is open")
+        try:
+            yield
+        except self.failures:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Cancelled or cut off by the caller's deadline: says nothing about the provider
+            self._probe_in_flight = False
+            raise
+        self.record_success()
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn if the breaker admits it, recording provider failures; else raise CircuitOpen."""
+        async with self.attempt():
+            return await fn()
+
+
+# === Hedged calls ===
+async def hedged(fn: Callable[[], Awaitable[T]], hedge_after: float) -> T:
+    """
+    Run fn; if it has not finished after hedge_after seconds, start a second attempt and
+    return whichever succeeds first (cancelling the other). hedge_after <= 0 disables it.
+    """
+    if hedge_after <= 0:
+        return await fn()
+
+    tasks = [asyncio.ensure_future(fn())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if done:
+            return tasks[0].result()
+
+        tasks.append(asyncio.ensure_future(fn()))
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    HEDGED_CALLS.labels(winner="primary" if task is tasks[0] else "hedge").inc()
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+# === Per-provider breakers ===
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str, **options) -> CircuitBreaker:
+    """Return the shared breaker for a provider, creating it with options on first use."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name, **options)
+    return breaker
+
+
+def breaker_states() -> Dict[str, str]:
+    return {name: breaker.state for name, breaker in _breakers.items()}
@@ -1,11 +1,61 @@
 # app/review.py
 
+import asyncio
 import json
-from typing import List
-import requests
-from openai import OpenAIError
-import openai
+import logging
+import os
+from typing import AsyncIterator, List, Optional, Tuple
+import httpx
+from openai import APIConnectionError, InternalServerError, OpenAIError, RateLimitError
 from pydantic import BaseModel
+from app.cache import file_review_cache, make_file_key, make_pr_key, make_review_key, review_cache
+from app.clients import get_openai_client
+from app.diff import chunk_diff, split_files
+from app.github import get_github_client
+from app.heuristics import HeuristicResult, heuristic_engine, max_risk
+from app.history import review_history
+from app.ingest import IngestedDiff, SkippedFile
+from app.monitoring import (
+    AI_REVIEW_TOKENS, DIFF_SIZE_BYTES, DIFF_SIZE_LINES, REVIEW_OUTCOMES, track_ai_review,
+)
+from app.prompts import PROMPT_VERSION, review_messages
+from app.ratelimit import Throttled, get_scheduler, parse_duration
+from app.resilience import (
+    REVIEW_DEADLINE_SECONDS, CircuitOpen, deadline, get_breaker, hedged, time_left,
+)
+from app.routing import ModelRoute, route_review, routing_config
+from app.singleflight import SingleFlight
+from app.tracing import span
+
+logger = logging.getLogger("ai-pr-reviewer")
+
+# Large diffs are reviewed in chunks of at most this many (estimated) tokens,
+# with at most REVIEW_MAX_PARALLEL_CHUNKS model calls in flight per review
+REVIEW_CHUNK_TOKENS = int(os.getenv("REVIEW_CHUNK_TOKENS", "6000"))
+REVIEW_MAX_PARALLEL_CHUNKS = int(os.getenv("REVIEW_MAX_PARALLEL_CHUNKS", "4"))
+
+# Start a second, identical model call if the first has not answered after this many
+# seconds (0 = off); trades extra model calls for lower tail latency
+REVIEW_HEDGE_AFTER_SECONDS = float(os.getenv("REVIEW_HEDGE_AFTER_SECONDS", "0"))
+
+# The provider's own per-call timeout; running into it counts as a provider failure
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "45"))
+
+AI_ERRORS = (OpenAIError, json.JSONDecodeError, AttributeError, IndexError, CircuitOpen)
+
+# Errors that mean the provider itself is unhealthy (timeouts are APIConnectionErrors)
+PROVIDER_ERRORS = (APIConnectionError, InternalServerError, RateLimitError)
+
+# While open, reviews skip the model and return the heuristic review straight away
+openai_breaker = get_breaker(
+    "openai",
+    failure_threshold=int(os.getenv("OPENAI_BREAKER_FAILURE_THRESHOLD", "5")),
+    recovery_time=float(os.getenv("OPENAI_BREAKER_RECOVERY_SECONDS", "30")),
+    failures=PROVIDER_ERRORS,
+)
+
+# Concurrent reviews of the same PR at the same head SHA share one fetch + model call
+pr_reviews_in_flight = SingleFlight()
 
 
 # === Pydantic model for structured review ===
@@ -16,83 +66,504 @@ class AIReview(BaseModel):
     risk_level: str
     recommended_actions: List[str]
     lines_in_diff: int
+    tier: str = ""  # Model tier the diff was routed to (fast or large); empty if no model
+    skipped_files: List[SkippedFile] = []  # Files filtered out before review (lockfiles, ...)
     error: str = ""  # Optional field for AI errors
 
 
+# === AI review (map-reduce over diff chunks) ===
+def _as_throttled(e: OpenAIError) -> Throttled:
+    """
+    Translate OpenAI 429s (reading their rate-limit headers) and transient errors for
+    the scheduler.
+    """
+    if not isinstance(e, RateLimitError):
+        return Throttled(e, rate_limited=False)
+    headers = e.response.headers
+    scheduler = get_scheduler("openai")
+    remaining = headers.get("x-ratelimit-remaining-requests")
+    scheduler.observe_limits(int(remaining) if remaining and remaining.isdigit() else None,
+                             parse_duration(headers.get("x-ratelimit-reset-requests")))
+    retry_after_ms = parse_duration(headers.get("retry-after-ms"))
+    if retry_after_ms:
+        retry_after = retry_after_ms / 1000
+    else:
+        retry_after = parse_duration(headers.get("retry-after"))
+    return Throttled(e, retry_after=retry_after)
+
+
+def _record_usage(usage) -> dict:
+    """Count the prompt/completion tokens reported by the model; returns them as span attributes."""
+    if usage is None:
+        return {}
+    AI_REVIEW_TOKENS.labels(kind="prompt").inc(usage.prompt_tokens)
+    AI_REVIEW_TOKENS.labels(kind="completion").inc(usage.completion_tokens)
+    return {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
+
+
+def _llm_timeout() -> float:
+    """
+    Per-call timeout for the OpenAI client. It does not shrink with the review deadline:
+    an SDK timeout counts against the breaker, while a call cut short by the caller's
+    budget is cancelled instead (see review_diff) and does not.
+    """
+    return OPENAI_TIMEOUT_SECONDS
+
+
+@track_ai_review
+async def _review_chunk(diff_chunk: str, model: str) -> dict:
+    """
+    Run a single model call for one chunk of a diff, within the review deadline and
+    through the circuit breaker, hedged if REVIEW_HEDGE_AFTER_SECONDS is set.
+    """
+    client = get_openai_client()
+
+    async def call():
+        try:
+            return await client.chat.completions.create(
+                model=model,
+                messages=review_messages(diff_chunk),
+                timeout=_llm_timeout(),
+            )
+        except PROVIDER_ERRORS as e:
+            raise _as_throttled(e)
+
+    async def scheduled():
+        return await get_scheduler("openai").run(call)
+
+    with span("llm.call", model=model, chunk_bytes=len(diff_chunk)) as llm:
+        ai_response = await openai_breaker.call(
+            lambda: hedged(scheduled, REVIEW_HEDGE_AFTER_SECONDS)
+        )
+        llm.set(**_record_usage(ai_response.usage))
+    with span("llm.json_parse"):
+        ai_content = ai_response.choices[0].message.content
+        return json.loads(ai_content)
+
+
+def _reduce_reviews(reviews: List[dict]) -> dict:
+    """Merge per-chunk reviews: union of issues/actions, max risk and max complexity."""
+    if len(reviews) == 1:
+        return reviews[0]
+
+    summaries = [review.get("summary", "") for review in reviews]
+    return {
+        "summary": " ".join(dict.fromkeys(summary for summary in summaries if summary)),
+        "issues": list(dict.fromkeys(i for review in reviews for i in review.get("issues", []))),
+        "complexity_score": max(review.get("complexity_score", 0) for review in reviews),
+        "risk_level": max_risk(*(review.get("risk_level", "low") for review in reviews)),
+        "recommended_actions": list(dict.fromkeys(
+            a for review in reviews for a in review.get("recommended_actions", [])
+        )),
+    }
+
+
+async def _review_chunks(chunks: List[str], semaphore: asyncio.Semaphore,
+                         model: str) -> Tuple[List[dict], int]:
+    """Review chunks concurrently under the semaphore; returns the reviews and the failure count."""
+
+    async def review_bounded(chunk: str) -> dict:
+        async with semaphore:
+            return await _review_chunk(chunk, model)
+
+    results = await asyncio.gather(*(review_bounded(chunk) for chunk in chunks),
+                                   return_exceptions=True)
+    failures = [result for result in results if isinstance(result, BaseException)]
+    for failure in failures:
+        if not isinstance(failure, AI_ERRORS):
+            raise failure
+    reviews = [result for result in results if not isinstance(result, BaseException)]
+    if not reviews:
+        raise failures[0]
+    return reviews, len(failures)
+
+
+async def _ai_review(diff: str, model: str, semaphore: Optional[asyncio.Semaphore] = None) -> dict:
+    """
+    Review a diff with the model, splitting it on file/hunk boundaries when it exceeds
+    the chunk budget and reviewing the chunks concurrently.
+    """
+    with span("diff.parse") as parse:
+        chunks = chunk_diff(diff, REVIEW_CHUNK_TOKENS)
+        parse.set(chunks=len(chunks))
+    if len(chunks) == 1 and semaphore is None:
+        return await _review_chunk(chunks[0], model)
+
+    reviews, failed = await _review_chunks(
+        chunks, semaphore or asyncio.Semaphore(REVIEW_MAX_PARALLEL_CHUNKS), model
+    )
+    ai_data = _reduce_reviews(reviews)
+    if failed:
+        ai_data["error"] = f"AI review failed for {failed} of {len(chunks)} chunks"
+    return ai_data
+
+
+async def _ai_review_incremental(diff: str, model: str, pr: str = "") -> dict:
+    """
+    Review a diff file by file, reusing stored results for files whose patch is unchanged
+    since an earlier review of the same PR (e.g. before the latest push), so only changed
+    files are sent to the model. Results are kept in file_review_cache, scoped to pr.
+    """
+    with span("diff.parse") as parse:
+        file_diffs = split_files(diff)
+        parse.set(files=len(file_diffs))
+    keys = [make_file_key(pr, file_diff, model, PROMPT_VERSION) for file_diff in file_diffs]
+    reviews = [file_review_cache.get(key) for key in keys]
+    pending = [i for i, review in enumerate(reviews) if review is None]
+    logger.info(f"Incremental review: {len(file_diffs) - len(pending)} files reused, "
+                f"{len(pending)} to review")
+
+    semaphore = asyncio.Semaphore(REVIEW_MAX_PARALLEL_CHUNKS)
+    results = await asyncio.gather(*(_ai_review(file_diffs[i], model, semaphore) for i in pending),
+                                   return_exceptions=True)
+    failures = []
+    for i, result in zip(pending, results):
+        if isinstance(result, BaseException):
+            if not isinstance(result, AI_ERRORS):
+                raise result
+            failures.append(result)
+            continue
+        reviews[i] = result
+        if not result.get("error"):
+            file_review_cache.set(keys[i], result)
+
+    done = [review for review in reviews if review is not None]
+    if not done:
+        raise failures[0]
+    ai_data = _reduce_reviews(done)
+    if failures:
+        ai_data["error"] = f"AI review failed for {len(failures)} of {len(file_diffs)} files"
+    return ai_data
+
+
 # === Core diff review function ===
-def review_diff(diff: str) -> dict:
+FALLBACK_SUMMARY = "Heuristic pre-review"
+
+
+async def review_diff(diff: str, heuristics_only: bool = False,
+                      incremental: bool = False, pr: str = "") -> dict:
     """
     Review a code diff using AI and heuristics.
     Returns a dictionary with summary, issues, risk level, recommended actions, and metadata.
+    The model tier is chosen from the diff size and heuristic risk (app/routing.py).
+    Successful reviews are cached by diff content, model and prompt version.
+    With heuristics_only=True the model is skipped and only the rule engine runs.
+    With incremental=True files are reviewed separately and unchanged files reuse earlier
+    results of the same pr ("owner/repo#number").
+    The model must answer within the review deadline (REVIEW_DEADLINE_SECONDS unless the caller
+    set a shorter one); on timeout, or while the OpenAI circuit breaker is open, the heuristic
+    review is returned instead.
     """
-    try:
-        # --- Call OpenAI ---
-        ai_response = openai.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": diff}],
-        )
-        ai_content = ai_response.choices[0].message.content
-        ai_data = json.loads(ai_content)
-    except (OpenAIError, json.JSONDecodeError, AttributeError, IndexError):
-        # Fallback if AI fails
-        ai_data = {
-            "summary": "Heuristic pre-review",
-            "issues": [],
-            "complexity_score": 0,
-            "risk_level": "low",
-            "recommended_actions": [],
-            "error": "AI review failed or returned invalid data",
-        }
-
-    # --- Heuristic checks ---
-    heuristic_issues = []
-    heuristic_actions = []
-    risk = ai_data.get("risk_level", "low")
-
-    # Detect debug prints
-    if any("print(" in line for line in diff.splitlines()):
-        heuristic_issues.append("Debug prints detected")
-        heuristic_actions.append("Manual review recommended")
-        if risk == "low":
-            risk = "medium"
-
-    # Detect TODO/FIXME comments
-    if any("TODO" in line or "FIXME" in line for line in diff.splitlines()):
-        heuristic_issues.append("Contains TODO/FIXME comments")
-        heuristic_actions.append("Manual review recommended")
-        if risk != "high":
-            risk = "medium"
-
-    # Large PRs
-    if len(diff.splitlines()) > 200:
-        risk = "high"
-        heuristic_actions.append("Manual review recommended")
-
-    # --- Merge AI + heuristic results ---
-    ai_data["issues"] = list(set(ai_data.get("issues", []) + heuristic_issues))
-    ai_data["recommended_actions"] = list(set(ai_data.get("recommended_actions", []) + heuristic_actions))
-    ai_data["risk_level"] = risk
-    ai_data["lines_in_diff"] = len(diff.splitlines())
-
-    # Return as dict
-    return AIReview(**ai_data).model_dump()
+    with deadline(REVIEW_DEADLINE_SECONDS), span("review.diff", incremental=incremental) as review:
+        review.set(**_record_diff_size(diff))
+        with span("heuristics"):
+            heuristics = heuristic_engine.run(diff)
+        if heuristics_only:
+            return _heuristics_only_review(diff, heuristics)
+
+        route = _route(heuristics)
+        review.set(tier=route.tier, model=route.model)
+        cache_key = make_review_key(diff, route.model, PROMPT_VERSION)
+        cached = review_cache.get(cache_key)
+        if cached is not None:
+            _record_outcome(review, "cache_hit")
+            return cached
+
+        if openai_breaker.rejecting():
+            # Provider is known to be down: answer with the heuristics right away
+            _record_outcome(review, "breaker_open")
+            ai_data = _fallback_ai_data("AI review skipped: OpenAI circuit breaker is open")
+        else:
+            try:
+                # --- Call OpenAI ---
+                if incremental:
+                    coro = _ai_review_incremental(diff, route.model, pr)
+                else:
+                    coro = _ai_review(diff, route.model)
+                ai_data = await asyncio.wait_for(coro, time_left())
+                _record_outcome(review, "partial" if ai_data.get("error") else "ai")
+            except asyncio.TimeoutError:
+                logger.warning("AI review missed the review deadline, falling back to heuristics")
+                _record_outcome(review, "timeout")
+                ai_data = _fallback_ai_data("AI review timed out")
+            except AI_ERRORS as e:
+                # Fallback if AI fails
+                logger.warning(f"AI review failed, falling back to heuristics: {e}")
+                _record_outcome(review, "fallback")
+                ai_data = _fallback_ai_data()
+
+        # Return as dict; fallback results are not cached so the next call retries the model
+        ai_data["tier"] = route.tier
+        result = _merge_heuristics(ai_data, diff, heuristics)
+        if not result["error"]:
+            review_cache.set(cache_key, result)
+        return result
+
+
+def _heuristics_only_review(diff: str, heuristics: HeuristicResult) -> dict:
+    REVIEW_OUTCOMES.labels(outcome="heuristics_only").inc()
+    return _merge_heuristics({
+        "summary": FALLBACK_SUMMARY,
+        "issues": [],
+        "complexity_score": 0,
+        "risk_level": "low",
+        "recommended_actions": [],
+    }, diff, heuristics)
+
+
+def _record_diff_size(diff: str) -> dict:
+    """Observe the diff size metrics; returns them as span attributes."""
+    size_bytes = len(diff.encode("utf-8", "replace"))
+    size_lines = diff.count("\n")
+    DIFF_SIZE_BYTES.observe(size_bytes)
+    DIFF_SIZE_LINES.observe(size_lines)
+    return {"diff_bytes": size_bytes, "diff_lines": size_lines}
+
+
+def _route(heuristics: HeuristicResult) -> ModelRoute:
+    route = route_review(heuristics)
+    if route.reason:
+        logger.info(f"Routing review to {route.model} ({route.tier}): {route.reason}")
+    return route
+
+
+def _record_outcome(review_span, outcome: str) -> None:
+    REVIEW_OUTCOMES.labels(outcome=outcome).inc()
+    review_span.set(outcome=outcome)
+
+
+def _fallback_ai_data(error: str = "AI review failed or returned invalid data") -> dict:
+    """AI part of the review when the model fails; the heuristics are merged on top."""
+    return {
+        "summary": FALLBACK_SUMMARY,
+        "issues": [],
+        "complexity_score": 0,
+        "risk_level": "low",
+        "recommended_actions": [],
+        "error": error,
+    }
+
+
+def _merge_heuristics(ai_data: dict, diff: str,
+                      heuristics: Optional[HeuristicResult] = None) -> dict:
+    """
+    Run the heuristic rules over the diff (unless already run) and merge them into the
+    AI result.
+    """
+    if heuristics is None:
+        with span("heuristics"):
+            heuristics = heuristic_engine.run(diff)
+
+    ai_data["issues"] = list(set(ai_data.get("issues", []) + heuristics.issues))
+    ai_data["recommended_actions"] = list(set(
+        ai_data.get("recommended_actions", []) + heuristics.recommended_actions
+    ))
+    ai_data["risk_level"] = max_risk(ai_data.get("risk_level", "low"), heuristics.risk_level)
+    ai_data["lines_in_diff"] = heuristics.lines_in_diff
+
+    with span("review.validate"):
+        return AIReview(**ai_data).model_dump()
+
+
+# === Streaming review ===
+async def _stream_chunk(diff_chunk: str, model: str) -> AsyncIterator[str]:
+    """
+    Run a single streaming model call through the circuit breaker, yielding the content as
+    it arrives; raises asyncio.TimeoutError once the review deadline has passed.
+    """
+    client = get_openai_client()
+    async with openai_breaker.attempt(), get_scheduler("openai").slot():
+        stream = await asyncio.wait_for(client.chat.completions.create(
+            model=model,
+            messages=review_messages(diff_chunk),
+            stream=True,
+            timeout=_llm_timeout(),
+        ), time_left())
+        chunks = stream.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), time_left())
+            except StopAsyncIteration:
+                break
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+async def stream_review_diff(diff: str, heuristics_only: bool = False, incremental: bool = False,
+                             pr: str = "") -> AsyncIterator[Tuple[str, dict]]:
+    """
+    Review a diff in stages, yielding (event, data) pairs:
+    "heuristics" with the rule findings right away, "token" for each piece of model
+    output as it arrives, and finally "review" with the validated, merged review.
+    Diffs that need several chunks, and incremental reviews, are reviewed with map-reduce
+    and emit no tokens. The options are those of review_diff.
+    """
+    with span("heuristics"):
+        heuristics = heuristic_engine.run(diff)
+    yield "heuristics", heuristics.model_dump()
+    if heuristics_only:
+        yield "review", _heuristics_only_review(diff, heuristics)
+        return
+
+    route = _route(heuristics)
+    cache_key = make_review_key(diff, route.model, PROMPT_VERSION)
+    cached = review_cache.get(cache_key)
+    if cached is not None:
+        yield "review", cached
+        return
+
+    if openai_breaker.rejecting():
+        ai_data = _fallback_ai_data("AI review skipped: OpenAI circuit breaker is open")
+        ai_data["tier"] = route.tier
+        yield "review", _merge_heuristics(ai_data, diff, heuristics)
+        return
+
+    # Nested inside a caller's deadline this can only shorten it
+    with deadline(REVIEW_DEADLINE_SECONDS):
+        try:
+            chunks = chunk_diff(diff, REVIEW_CHUNK_TOKENS)
+            if incremental:
+                ai_data = await asyncio.wait_for(_ai_review_incremental(diff, route.model, pr),
+                                                 time_left())
+            elif len(chunks) == 1:
+                parts = []
+                async for token in _stream_chunk(chunks[0], route.model):
+                    parts.append(token)
+                    yield "token", {"content": token}
+                ai_data = json.loads("".join(parts))
+            else:
+                ai_data = await asyncio.wait_for(_ai_review(diff, route.model), time_left())
+        except asyncio.TimeoutError:
+            ai_data = _fallback_ai_data("AI review timed out")
+        except AI_ERRORS:
+            ai_data = _fallback_ai_data()
+
+    ai_data["tier"] = route.tier
+    result = _merge_heuristics(ai_data, diff, heuristics)
+    if not result["error"]:
+        review_cache.set(cache_key, result)
+    yield "review", result
+
+
+async def stream_review_github_pr(owner: str, repo: str, pr_number: int,
+                                  heuristics_only: bool = False, incremental: bool = False,
+                                  deadline_seconds: Optional[float] = None
+                                  ) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    Streaming variant of review_github_pr, with the same options; yields the same events
+    as stream_review_diff.
+    """
+    github = get_github_client()
+
+    with deadline(deadline_seconds or REVIEW_DEADLINE_SECONDS):
+        try:
+            pull = cached = None
+            if not heuristics_only:
+                pull = await github.get_pull(owner, repo, pr_number)
+                pr_key = make_pr_key(owner, repo, pr_number, pull["head"]["sha"],
+                                     routing_config.cache_tag(), PROMPT_VERSION)
+                cached = review_cache.get(pr_key)
+            ingested = None if cached else await github.get_pull_diff(owner, repo, pr_number)
+        except (httpx.HTTPError, KeyError, ValueError) as e:
+            yield "error", {"error": f"GitHub API request failed: {e}"}
+            return
+
+        if cached is not None:
+            yield "review", cached
+            return
+
+        # Nothing left after filtering needs no model call
+        events = stream_review_diff(ingested.diff,
+                                    heuristics_only=heuristics_only or not ingested.diff,
+                                    incremental=incremental, pr=f"{owner}/{repo}#{pr_number}")
+        async for event, data in events:
+            if event == "review":
+                data = _with_skipped(data, ingested)
+                if pull is not None and not data["error"]:
+                    review_cache.set(pr_key, data)
+                    review_history.record(owner, repo, pr_number, pull["head"]["sha"], data,
+                                          author=_author(pull))
+            yield event, data
 
 
 # === GitHub PR review wrapper ===
-def review_github_pr(owner: str, repo: str, pr_number: int) -> dict:
+async def review_github_pr(owner: str, repo: str, pr_number: int,
+                           heuristics_only: bool = False, incremental: bool = False,
+                           deadline_seconds: Optional[float] = None) -> dict:
     """
     Fetch a GitHub pull request diff and return a structured AI + heuristic review.
+    Reviews are stored per head SHA, so an unchanged PR skips the diff fetch and the model.
+    In incremental mode, a new push only sends the files whose patch changed to the model.
+    deadline_seconds (default REVIEW_DEADLINE_SECONDS) bounds the whole review: GitHub requests
+    time out once it has passed, and the model call falls back to heuristics.
     """
-    url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{pr_number}"
-    headers = {"Accept": "application/vnd.github.v3.diff"}
+    with (
+        deadline(deadline_seconds or REVIEW_DEADLINE_SECONDS),
+        span("review", repository=f"{owner}/{repo}", pr_number=pr_number,
+             heuristics_only=heuristics_only, incremental=incremental),
+    ):
+        if heuristics_only:
+            try:
+                with span("github.fetch_diff"):
+                    ingested = await get_github_client().get_pull_diff(owner, repo, pr_number)
+            except httpx.HTTPError as e:
+                return {"error": f"GitHub API request failed: {e}"}
+            return _with_skipped(await review_diff(ingested.diff, heuristics_only=True), ingested)
+
+        github = get_github_client()
+
+        try:
+            with span("github.fetch_pull"):
+                pull = await github.get_pull(owner, repo, pr_number)
+                head_sha = pull["head"]["sha"]
+        except (httpx.HTTPError, KeyError, ValueError) as e:
+            return {"error": f"GitHub API request failed: {e}"}
+
+        return await pr_reviews_in_flight.do(
+            (owner, repo, pr_number, head_sha, incremental),
+            lambda: _review_pr_at_head(owner, repo, pr_number, head_sha, incremental,
+                                       _author(pull)),
+        )
+
+
+async def _review_pr_at_head(owner: str, repo: str, pr_number: int, head_sha: str,
+                             incremental: bool, author: str = "") -> dict:
+    """
+    Review a PR at a known head SHA, using the stored review when there is one.
+    New reviews without errors are added to the review history (app/history.py).
+    """
+    pr_key = make_pr_key(owner, repo, pr_number, head_sha, routing_config.cache_tag(),
+                         PROMPT_VERSION)
+    cached = review_cache.get(pr_key)
+    if cached is not None:
+        REVIEW_OUTCOMES.labels(outcome="cache_hit").inc()
+        return cached
 
     try:
-        resp = requests.get(url, headers=headers, timeout=10)
-        resp.raise_for_status()
-        diff_text = resp.text
-    except requests.RequestException as e:
+        with span("github.fetch_diff") as fetch:
+            ingested = await get_github_client().get_pull_diff(owner, repo, pr_number)
+            fetch.set(skipped_files=len(ingested.skipped_files))
+    except httpx.HTTPError as e:
         return {"error": f"GitHub API request failed: {e}"}
 
-    # Analyze diff using review_diff
-    review_result = review_diff(diff_text)
+    # Analyze diff using review_diff; nothing left after filtering needs no model call
+    review_result = _with_skipped(
+        await review_diff(ingested.diff, heuristics_only=not ingested.diff, incremental=incremental,
+                          pr=f"{owner}/{repo}#{pr_number}"),
+        ingested,
+    )
+    # Fallback reviews are neither cached nor recorded: each head is recorded once, so a
+    # degraded result would block the real review of that head
+    if not review_result["error"]:
+        review_cache.set(pr_key, review_result)
+        review_history.record(owner, repo, pr_number, head_sha, review_result, author=author)
     return review_result
+
+
+def _author(pull: dict) -> str:
+    return (pull.get("user") or {}).get("login", "")
+
+
+def _with_skipped(result: dict, ingested: IngestedDiff) -> dict:
+    """Report the files dropped during ingestion in a review of the remaining diff."""
+    return {**result, "skipped_files": [f.model_dump() for f in ingested.skipped_files]}
@@ -0,0 +1,66 @@
+# app/routing.py
+import os
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+from app.heuristics import RISK_LEVELS, HeuristicResult
+from app.monitoring import REVIEW_MODEL_TIER
+
+TIER_FAST = "fast"
+TIER_LARGE = "large"
+
+
+class RoutingConfig(BaseModel):
+    fast_model: str = "gpt-4o-mini"
+    large_model: str = "gpt-4"
+    fast_max_lines: int = 200             # Bigger diffs go to the large model
+    fast_max_files: int = 5               # As do diffs touching more files
+    fast_max_risk: Literal["low", "medium", "high"] = "medium"  # As do diffs rated above this
+
+    def cache_tag(self) -> str:
+        """Identifies the routing setup in cache keys that are made before a diff is routed."""
+        return (f"{self.fast_model}|{self.large_model}|{self.fast_max_lines}"
+                f"|{self.fast_max_files}|{self.fast_max_risk}")
+
+
+class ModelRoute(BaseModel):
+    tier: str
+    model: str
+    reason: str = ""
+
+
+def route_review(heuristics: HeuristicResult, config: Optional[RoutingConfig] = None) -> ModelRoute:
+    """
+    Pick the model tier for a diff from its size, file count and heuristic pre-risk:
+    small, low-risk diffs go to the fast model, everything else to the large one.
+    """
+    config = config or routing_config
+    reasons = []
+    if heuristics.lines_in_diff > config.fast_max_lines:
+        reasons.append(f"{heuristics.lines_in_diff} lines")
+    if heuristics.files_changed > config.fast_max_files:
+        reasons.append(f"{heuristics.files_changed} files")
+    if RISK_LEVELS.index(heuristics.risk_level) > RISK_LEVELS.index(config.fast_max_risk):
+        reasons.append(f"{heuristics.risk_level} heuristic risk")
+
+    if reasons:
+        route = ModelRoute(tier=TIER_LARGE, model=config.large_model, reason=", ".join(reasons))
+    else:
+        route = ModelRoute(tier=TIER_FAST, model=config.fast_model)
+    REVIEW_MODEL_TIER.labels(tier=route.tier).inc()
+    return route
+
+
+def load_routing_config() -> RoutingConfig:
+    """Build the routing configuration from the environment."""
+    return RoutingConfig(
+        fast_model=os.getenv("REVIEW_FAST_MODEL", "gpt-4o-mini"),
+        large_model=os.getenv("REVIEW_LARGE_MODEL", "gpt-4"),
+        fast_max_lines=int(os.getenv("ROUTING_FAST_MAX_LINES", "200")),
+        fast_max_files=int(os.getenv("ROUTING_FAST_MAX_FILES", "5")),
+        fast_max_risk=os.getenv("ROUTING_FAST_MAX_RISK", "medium"),
+    )
+
+
+routing_config = load_routing_config()
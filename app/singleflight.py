@@ -0,0 +1,36 @@
+# app/singleflight.py
+import asyncio
+import copy
+from typing import Awaitable, Callable, Dict, Hashable
+
+from app.monitoring import COALESCED_REQUESTS
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls: while a call for a key is in flight, later callers
+    with the same key wait for it and share its result instead of starting their own.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        task = self._calls.get(key)
+        if task is not None:
+            COALESCED_REQUESTS.inc()
+            # Followers get their own copy so nobody mutates the shared result
+            return copy.deepcopy(await asyncio.shield(task))
+
+        task = asyncio.ensure_future(fn())
+        self._calls[key] = task
+        task.add_done_callback(lambda _: self._forget(key, task))
+        # Shielded so a disconnecting first caller does not cancel the call for the others
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def in_flight(self) -> int:
+        return len(self._calls)
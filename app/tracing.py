@@ -0,0 +1,142 @@
+# app/tracing.py
+import asyncio
+import json
+import logging
+import os
+import secrets
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Set
+
+from app.monitoring import REVIEW_STAGE_DURATION
+
+logger = logging.getLogger("ai-pr-reviewer")
+
+SERVICE_NAME = "ai-pr-reviewer"
+
+# Optional trace export, in OTLP/JSON format: one JSON document per line in a file,
+# and/or POSTed to a collector's OTLP/HTTP endpoint (e.g. http://localhost:4318)
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "")
+TRACE_EXPORT_ENDPOINT = os.getenv("TRACE_EXPORT_ENDPOINT", "")
+
+
+# === Spans ===
+class Span:
+    """One timed stage of a review, with attributes such as token counts or diff size."""
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: dict):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else ""
+        self.attributes = dict(attributes)
+        self.error = ""
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        # Finished spans of the whole trace, exported when the root span ends
+        self.trace: List["Span"] = parent.trace if parent else []
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """
+    Time a pipeline stage: the duration is recorded in review_stage_duration_seconds
+    under the span name, and the span joins the current trace for export.
+    Span names are used as metric labels, so they must be fixed strings.
+    """
+    parent = _current_span.get()
+    current = Span(name, parent, attributes)
+    token = _current_span.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        REVIEW_STAGE_DURATION.labels(stage=name).observe(time.perf_counter() - start)
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        current.trace.append(current)
+        if parent is None:
+            export_trace(current.trace)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+# === Export ===
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict) -> List[dict]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+def to_otlp(spans: List[Span]) -> dict:
+    """Encode finished spans as an OTLP/JSON ExportTraceServiceRequest."""
+    return {"resourceSpans": [{
+        "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+        "scopeSpans": [{
+            "scope": {"name": SERVICE_NAME},
+            "spans": [{
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                "parentSpanId": s.parent_id,
+                "name": s.name,
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns),
+                "attributes": _otlp_attributes(s.attributes),
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+            } for s in spans],
+        }],
+    }]}
+
+
+_export_tasks: Set[asyncio.Task] = set()
+
+
+async def _post_to_collector(payload: dict) -> None:
+    from app.clients import get_http_client  # Avoid an import cycle at module load
+    try:
+        resp = await get_http_client().post(f"{TRACE_EXPORT_ENDPOINT.rstrip('/')}/v1/traces",
+                                            json=payload)
+        resp.raise_for_status()
+    except Exception as e:
+        logger.warning(f"Trace export to {TRACE_EXPORT_ENDPOINT} failed: {e}")
+
+
+def export_trace(spans: List[Span]) -> None:
+    """Write a finished trace to the configured file and/or collector (no-op if neither is set)."""
+    if not (TRACE_EXPORT_FILE or TRACE_EXPORT_ENDPOINT):
+        return
+    payload = to_otlp(spans)
+    if TRACE_EXPORT_FILE:
+        try:
+            with open(TRACE_EXPORT_FILE, "a") as f:
+                f.write(json.dumps(payload) + "\n")
+        except OSError as e:
+            logger.warning(f"Trace export to {TRACE_EXPORT_FILE} failed: {e}")
+    if TRACE_EXPORT_ENDPOINT:
+        try:
+            task = asyncio.get_running_loop().create_task(_post_to_collector(payload))
+        except RuntimeError:
+            return  # No event loop (e.g. called from sync code); skip the collector
+        _export_tasks.add(task)
+        task.add_done_callback(_export_tasks.discard)
@@ -0,0 +1,82 @@
+# app/webhooks.py
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger("ai-pr-reviewer")
+
+REVIEWED_PR_ACTIONS = {"opened", "synchronize", "reopened"}
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check GitHub's X-Hub-Signature-256 header (HMAC-SHA256 of the raw body)."""
+    if not secret or not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len("sha256="):])
+
+
+def parse_pull_request_event(payload: dict) -> Optional[dict]:
+    """
+    Extract the review request from a pull_request webhook payload, or None if the
+    action does not need a review.
+    """
+    if payload.get("action") not in REVIEWED_PR_ACTIONS:
+        return None
+    pull = payload["pull_request"]
+    repository = payload["repository"]
+    return {
+        "owner": repository["owner"]["login"],
+        "repo": repository["name"],
+        "pr_number": pull["number"],
+        "head_sha": pull["head"]["sha"],
+    }
+
+
+class Debouncer:
+    """
+    Trailing-edge debounce per key: each new event restarts the key's timer and replaces
+    its value, so a burst of events fires the callback once, with the latest value.
+    A burst never delays the callback by more than max_wait after its first event.
+    """
+
+    def __init__(self, window: float, callback: Callable[[dict], None],
+                 max_wait: Optional[float] = None):
+        self.window = window
+        self.max_wait = max_wait if max_wait is not None else window * 5
+        self.callback = callback
+        self._pending: Dict[Hashable, Tuple[float, asyncio.Task]] = {}
+
+    def submit(self, key: Hashable, value: dict) -> bool:
+        """Schedule value for key; returns True if it replaced a pending value."""
+        now = time.monotonic()
+        pending = self._pending.get(key)
+        first_seen = now
+        if pending is not None:
+            first_seen, task = pending
+            task.cancel()
+        delay = max(0.0, min(self.window, first_seen + self.max_wait - now))
+        task = asyncio.create_task(self._fire(key, value, delay))
+        self._pending[key] = (first_seen, task)
+        return pending is not None
+
+    async def _fire(self, key: Hashable, value: dict, delay: float) -> None:
+        await asyncio.sleep(delay)
+        del self._pending[key]
+        try:
+            self.callback(value)
+        except Exception as e:
+            logger.exception(f"Debounced webhook dispatch failed for {key}: {e}")
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def stop(self) -> None:
+        tasks = [task for _, task in self._pending.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._pending.clear()
@@ -0,0 +1,121 @@
+# benchmarks/baseline.py
+import json
+import os
+import re
+import statistics
+import time
+from typing import Dict, List, Optional
+
+BASELINES_FILE = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+# Allowed slowdown before a metric counts as a regression (0.25 = 25% worse than baseline)
+DEFAULT_TOLERANCE = float(os.getenv("BENCH_TOLERANCE", "0.25"))
+
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith("rps") or metric.endswith("_per_s")
+
+
+def machine_dependent(metric: str) -> bool:
+    """Timings and throughputs scale with CPU speed; sizes and error rates do not."""
+    return metric.endswith("_ms") or higher_is_better(metric)
+
+
+def calibrate(repeat: int = 15) -> float:
+    """
+    Median time (ms) of a fixed workload that does not use app code: regex scans and
+    line splitting over a synthetic diff, the same kind of work as the heuristics. The
+    ratio of two machines' calibration times is how much slower one is than the other.
+    """
+    from benchmarks.diffgen import generate_diff
+
+    diff = generate_diff(5000, seed=0)
+    pattern = re.compile(r"print\(|TODO|FIXME|password\s*=|except\s*:")
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hits = 0
+        for line in diff.splitlines():
+            if line.startswith("+") and not line.startswith("+++"):
+                hits += len(pattern.findall(line.lower()))
+        timings.append(time.perf_counter() - start)
+    return round(statistics.median(timings) * 1000, 3)
+
+
+def load_baselines(path: str = BASELINES_FILE) -> Dict[str, dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(name: str, results: Dict[str, dict], calibration_ms: Optional[float] = None,
+                  path: str = BASELINES_FILE) -> None:
+    """
+    Store results as the new baseline for one benchmark (e.g. "heuristics" or
+    "load:default"), with the calibration time of the machine that produced them.
+    """
+    baselines = load_baselines(path)
+    baselines[name] = {"calibration_ms": calibration_ms, "cases": results}
+    with open(path, "w") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def find_regressions(baseline: Dict[str, dict], results: Dict[str, dict],
+                     tolerance: float = DEFAULT_TOLERANCE, scale: float = 1.0) -> List[str]:
+    """
+    Compare results ({case: {metric: value}}) against a baseline of the same shape.
+    scale is how much slower this machine is than the baseline's (ratio of calibration
+    times): expected timings are multiplied by it and throughputs divided by it.
+    Returns one message per metric that is worse than the baseline by more than tolerance;
+    cases or metrics missing from the baseline are not checked.
+    """
+    regressions = []
+    for case, metrics in results.items():
+        for metric, value in metrics.items():
+            expected = baseline.get(case, {}).get(metric)
+            if not expected or value is None:
+                continue
+            if machine_dependent(metric):
+                expected = expected / scale if higher_is_better(metric) else expected * scale
+            if higher_is_better(metric):
+                regressed = value < expected * (1 - tolerance)
+            else:
+                regressed = value > expected * (1 + tolerance)
+            if regressed:
+                regressions.append(f"{case} {metric}: {value:.2f} vs baseline {expected:.2f}")
+    return regressions
+
+
+def report(name: str, results: Dict[str, dict], check: bool, update: bool,
+           tolerance: float = DEFAULT_TOLERANCE, calibration_ms: Optional[float] = None) -> int:
+    """
+    Print results, then update or check the stored baseline; returns the process exit code.
+    With calibration_ms (see calibrate) the check is normalised to this machine's speed.
+    """
+    print(json.dumps({name: results, "calibration_ms": calibration_ms}, indent=2))
+    if update:
+        save_baseline(name, results, calibration_ms)
+        print(f"Baseline '{name}' updated in {BASELINES_FILE}")
+        return 0
+    if not check:
+        return 0
+
+    baseline = load_baselines().get(name)
+    if baseline is None:
+        print(f"No baseline '{name}' in {BASELINES_FILE}; run with --update-baseline first")
+        return 1
+    scale = 1.0
+    if calibration_ms and baseline.get("calibration_ms"):
+        scale = calibration_ms / baseline["calibration_ms"]
+        print(f"This machine runs the calibration workload {scale:.2f}x as long as the baseline's")
+    regressions = find_regressions(baseline["cases"], results, tolerance, scale)
+    if regressions:
+        print(f"PERFORMANCE REGRESSION ({name}, tolerance {tolerance:.0%}):")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"No regressions against baseline '{name}'")
+    return 0
@@ -0,0 +1,58 @@
+# benchmarks/bench_heuristics.py
+"""
+Micro-benchmark of the heuristic review path (review_diff with heuristics_only=True)
+over synthetic diffs from 10 to 50k lines. Timings are normalised with a calibration
+run (benchmarks/baseline.py), so the stored baseline can be checked on other machines.
+
+    python -m benchmarks.bench_heuristics [--check] [--update-baseline]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import Dict
+
+from app.review import review_diff
+from benchmarks.baseline import DEFAULT_TOLERANCE, calibrate, report
+from benchmarks.diffgen import SIZES, generate_diff
+
+
+async def _time_review(diff: str, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await review_diff(diff, heuristics_only=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(repeat: int = 20) -> Dict[str, dict]:
+    results = {}
+    for lines in SIZES:
+        diff = generate_diff(lines, seed=lines)
+        # Fewer rounds for the big diffs so the whole run stays within a few seconds
+        timings = asyncio.run(_time_review(diff, max(3, repeat * 1000 // max(lines, 1000))))
+        median = statistics.median(timings)
+        results[f"{lines}_lines"] = {
+            "median_ms": round(median * 1000, 3),
+            "mb_per_s": round(len(diff) / median / 1e6, 1),
+        }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="rounds for diffs up to 1k lines")
+    parser.add_argument("--check", action="store_true", help="fail on regression vs baseline")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+    # Timings are checked relative to this machine's speed, so any machine can run --check
+    calibration_ms = calibrate()
+    return report("heuristics", run(args.repeat), args.check, args.update_baseline, args.tolerance,
+                  calibration_ms)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
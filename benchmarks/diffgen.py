@@ -0,0 +1,70 @@
+# benchmarks/diffgen.py
+import random
+from typing import List
+
+# Diff sizes (in lines) covered by the benchmarks, from a one-liner to a vendored dependency
+SIZES = (10, 100, 1000, 10000, 50000)
+
+HUNK_LINES = 40
+
+CODE_LINES = [
+    "def handle_{n}(request):",
+    "    value = request.get('field_{n}')",
+    "    if value is None:",
+    "        return None",
+    "    result = compute(value, {n})",
+    "    logger.info('processed %s', value)",
+    "    return result",
+    "",
+    "class Handler{n}(Base):",
+    "    timeout = {n}",
+    "    items = [x for x in range({n}) if x % 3]",
+    "    # TODO: remove once the migration is done",
+    "    print(f'debug {n}')",
+]
+
+
+def _code_line(rng: random.Random) -> str:
+    return rng.choice(CODE_LINES).format(n=rng.randint(0, 9999))
+
+
+def generate_diff(lines: int, files: int = 0, seed: int = 0) -> str:
+    """
+    Build a deterministic synthetic unified diff of about `lines` lines, spread over
+    `files` files (default: one file per ~200 lines) in hunks of ~40 lines each,
+    with a realistic mix of added, removed and context lines.
+    """
+    rng = random.Random(seed)
+    files = files or max(1, lines // 200)
+    per_file = max(1, lines // files)
+    out: List[str] = []
+
+    for index in range(files):
+        path = f"src/module_{seed}_{index}.py"
+        out += [
+            f"diff --git a/{path} b/{path}",
+            f"index {rng.getrandbits(28):07x}..{rng.getrandbits(28):07x} 100644",
+            f"--- a/{path}",
+            f"+++ b/{path}",
+        ]
+        written, start = 4, 1
+        while written < per_file:
+            body: List[str] = []
+            old = new = 0
+            for _ in range(min(HUNK_LINES, per_file - written - 1) or 1):
+                kind = rng.random()
+                if kind < 0.5:
+                    body.append("+" + _code_line(rng))
+                    new += 1
+                elif kind < 0.7:
+                    body.append("-" + _code_line(rng))
+                    old += 1
+                else:
+                    body.append(" " + _code_line(rng))
+                    old += 1
+                    new += 1
+            out.append(f"@@ -{start},{old} +{start},{new} @@")
+            out += body
+            written += len(body) + 1
+            start += old + 10
+    return "\n".join(out) + "\n"
@@ -0,0 +1,173 @@
+# benchmarks/fakes.py
+"""
+Local stand-ins for the GitHub API and an OpenAI-compatible chat completions API,
+with configurable latency, error rate and 429 behaviour.
+
+    python -m benchmarks.fakes --github-port 9001 --openai-port 9002 --latency 0.5
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from benchmarks.diffgen import generate_diff
+
+
+@dataclass
+class FakeBehavior:
+    latency: float = 0.0          # Seconds added to every response
+    jitter: float = 0.0           # Extra uniform random latency, 0..jitter seconds
+    error_rate: float = 0.0       # Fraction of requests answered with a 500
+    rate_limit_rate: float = 0.0  # Fraction of requests answered with a 429
+    retry_after: float = 1.0      # Retry-After sent with 429s
+
+    async def delay(self) -> None:
+        wait = self.latency + random.uniform(0, self.jitter)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def failure(self):
+        """A 429 or 500 response for this request, or None to answer normally."""
+        roll = random.random()
+        if roll < self.rate_limit_rate:
+            return JSONResponse({"message": "rate limited"}, status_code=429, headers={
+                "Retry-After": str(int(self.retry_after)),
+                "retry-after-ms": str(int(self.retry_after * 1000)),
+            })
+        if roll < self.rate_limit_rate + self.error_rate:
+            return JSONResponse({"message": "internal error"}, status_code=500)
+        return None
+
+
+# === Fake GitHub ===
+def create_github_app(behavior: FakeBehavior, diff_lines: int = 1000, files: int = 0) -> FastAPI:
+    """GitHub pulls API: PR metadata as JSON, or a synthetic diff seeded by the PR number."""
+    app = FastAPI()
+
+    @lru_cache(maxsize=64)
+    def pull_diff(pr_number: int) -> str:
+        return generate_diff(diff_lines, files, seed=pr_number)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.get("/rate_limit")
+    async def rate_limit():
+        return {"resources": {"core": {"limit": 5000, "remaining": 5000}}}
+
+    @app.get("/repos/{owner}/{repo}/pulls/{pr_number}")
+    async def get_pull(owner: str, repo: str, pr_number: int, request: Request):
+        await behavior.delay()
+        failure = behavior.failure()
+        if failure is not None:
+            return failure
+        headers = {"X-RateLimit-Remaining": "5000", "X-RateLimit-Reset": str(int(time.time()) + 3600)}
+        if "diff" in request.headers.get("accept", ""):
+            return PlainTextResponse(pull_diff(pr_number), headers=headers)
+        sha = hashlib.sha1(f"{owner}/{repo}#{pr_number}".encode()).hexdigest()
+        return JSONResponse({"number": pr_number, "state": "open", "head": {"sha": sha}},
+                            headers=headers)
+
+    return app
+
+
+# === Fake OpenAI ===
+FAKE_REVIEW = {
+    "summary": "Refactors request handlers",
+    "issues": ["Debug prints left in handlers"],
+    "complexity_score": 4,
+    "risk_level": "medium",
+    "recommended_actions": ["Remove debug prints"],
+}
+
+
+def create_openai_app(behavior: FakeBehavior, latency_per_1k_tokens: float = 0.0) -> FastAPI:
+    """Chat completions API returning a fixed JSON review, slower for bigger prompts if configured."""
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "gpt-4", "object": "model", "owned_by": "fake"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt_tokens = sum(len(m.get("content") or "") for m in body.get("messages", [])) // 4 + 1
+        await behavior.delay()
+        if latency_per_1k_tokens:
+            await asyncio.sleep(latency_per_1k_tokens * prompt_tokens / 1000)
+        failure = behavior.failure()
+        if failure is not None:
+            return failure
+        content = json.dumps(FAKE_REVIEW)
+        return {
+            "id": f"chatcmpl-{random.getrandbits(64):x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_tokens + len(content) // 4,
+            },
+        }
+
+    return app
+
+
+def add_behavior_args(parser: argparse.ArgumentParser) -> None:
+    """Command line options shared by the fakes and the load generator."""
+    parser.add_argument("--github-latency", type=float, default=0.05)
+    parser.add_argument("--openai-latency", type=float, default=0.5)
+    parser.add_argument("--openai-latency-per-1k-tokens", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--diff-lines", type=int, default=1000)
+    parser.add_argument("--files", type=int, default=0)
+
+
+async def serve(args: argparse.Namespace) -> None:
+    import uvicorn
+
+    def behavior(latency: float) -> FakeBehavior:
+        return FakeBehavior(latency, args.jitter, args.error_rate, args.rate_limit_rate,
+                            args.retry_after)
+
+    github = create_github_app(behavior(args.github_latency), args.diff_lines, args.files)
+    openai = create_openai_app(behavior(args.openai_latency), args.openai_latency_per_1k_tokens)
+    servers = [
+        uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        for app, port in ((github, args.github_port), (openai, args.openai_port))
+    ]
+    await asyncio.gather(*(server.serve() for server in servers))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--github-port", type=int, default=9001)
+    parser.add_argument("--openai-port", type=int, default=9002)
+    add_behavior_args(parser)
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# benchmarks/loadgen.py
+"""
+Load generator for POST /review against local GitHub/OpenAI stand-ins.
+
+Starts benchmarks.fakes and the app (uvicorn) as subprocesses, drives /review with
+distinct PRs at a fixed concurrency, and reports latency percentiles, requests/s,
+error rate and the app's peak memory.
+
+    python -m benchmarks.loadgen --requests 200 --concurrency 20 [--check] [--update-baseline]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.baseline import DEFAULT_TOLERANCE, report
+from benchmarks.fakes import add_behavior_args
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _peak_rss_mb(pid: int) -> Optional[float]:
+    """Peak resident memory of a process (Linux only; None elsewhere)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _wait_healthy(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} did not become healthy within {timeout}s")
+            await asyncio.sleep(0.1)
+
+
+async def drive(base_url: str, requests: int, concurrency: int) -> Dict[str, float]:
+    """Send `requests` reviews of distinct PRs, at most `concurrency` at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(client: httpx.AsyncClient, pr_number: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                resp = await client.post("/review", json={
+                    "owner": "bench", "repo": "load", "pr_number": pr_number,
+                })
+                ok = resp.status_code == 200 and not resp.json()["analysis"].get("error")
+            except (httpx.HTTPError, ValueError, KeyError):
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client, n) for n in range(1, requests + 1)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+        "rps": round(requests / elapsed, 2),
+        "error_rate": round(errors / requests, 4),
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, dict]:
+    github_port, openai_port, app_port = _free_port(), _free_port(), _free_port()
+    fakes = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.fakes",
+        "--github-port", str(github_port), "--openai-port", str(openai_port),
+        "--github-latency", str(args.github_latency),
+        "--openai-latency", str(args.openai_latency),
+        "--openai-latency-per-1k-tokens", str(args.openai_latency_per_1k_tokens),
+        "--jitter", str(args.jitter), "--error-rate", str(args.error_rate),
+        "--rate-limit-rate", str(args.rate_limit_rate), "--retry-after", str(args.retry_after),
+        "--diff-lines", str(args.diff_lines), "--files", str(args.files),
+    ])
+    env = {
+        **os.environ,
+        "GITHUB_API_URL": f"http://127.0.0.1:{github_port}",
+        "GITHUB_TOKEN": "bench",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{openai_port}/v1",
+        "OPENAI_API_KEY": "bench",
+    }
+    # Measure the app, not the production pacing, unless the caller set limits explicitly
+    for name in ("GITHUB_MAX_RATE_PER_SECOND", "OPENAI_MAX_RATE_PER_SECOND"):
+        env.setdefault(name, "10000")
+    for name in ("GITHUB_MAX_CONCURRENCY", "OPENAI_MAX_CONCURRENCY"):
+        env.setdefault(name, "1000")
+    app = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(app_port), "--log-level", "warning",
+    ], env=env, stderr=None if args.verbose else subprocess.DEVNULL)
+
+    try:
+        async def scenario() -> Dict[str, float]:
+            await _wait_healthy(f"http://127.0.0.1:{github_port}/health")
+            await _wait_healthy(f"http://127.0.0.1:{openai_port}/health")
+            await _wait_healthy(f"http://127.0.0.1:{app_port}/ready")  # Warm, like a new pod
+            return await drive(f"http://127.0.0.1:{app_port}", args.requests, args.concurrency)
+
+        results = asyncio.run(scenario())
+        peak_rss = _peak_rss_mb(app.pid)
+        results["peak_rss_mb"] = round(peak_rss, 1) if peak_rss else None
+    finally:
+        for process in (app, fakes):
+            process.terminate()
+            process.wait(timeout=10)
+    return {f"{args.diff_lines}_lines_c{args.concurrency}": results}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--scenario", default="default", help="baseline name suffix")
+    parser.add_argument("--check", action="store_true", help="fail on regression vs baseline")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--verbose", action="store_true", help="show the app's log output")
+    add_behavior_args(parser)
+    args = parser.parse_args()
+    return report(f"load:{args.scenario}", run(args), args.check, args.update_baseline,
+                  args.tolerance)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+# tests/conftest.py
+import json
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from openai.types import CompletionUsage
+
+from app.cache import file_review_cache, review_cache
+from app.history import review_history
+from app.resilience import _breakers
+
+os.environ["OPENAI_API_KEY"] = "test"  # Prevent OpenAIError
+
+# Shared sample data and helpers, imported by test modules from tests.conftest
+SAMPLE_DIFF = """
+diff --git a/example.py b/example.py
+index 123abc..456def 100644
+--- a/example.py
++++ b/example.py
+@@ -1 +1,2 @@
+-print("Hello world")
++print("Hello, world!")
++print("Another line")
+"""
+
+PULL_JSON = json.dumps({"number": 1, "head": {"sha": "abc123"}})
+
+
+def make_file_diff(name, hunks=2, lines_per_hunk=20):
+    """Helper to build a single-file diff with several hunks."""
+    text = f"diff --git a/{name} b/{name}\n--- a/{name}\n+++ b/{name}\n"
+    for h in range(hunks):
+        text += f"@@ -{h * 100} +{h * 100},{lines_per_hunk} @@\n"
+        text += "".join(f"+line {i} of {name}\n" for i in range(lines_per_hunk))
+    return text
+
+
+MULTI_FILE_DIFF = "".join(make_file_diff(f"file{i}.py") for i in range(6))
+
+
+def make_fake_response(content_dict):
+    """Helper to build a fake OpenAI response."""
+    fake_response = MagicMock()
+    fake_response.choices = [
+        MagicMock(message=MagicMock(content=json.dumps(content_dict)))
+    ]
+    fake_response.usage = CompletionUsage(prompt_tokens=100, completion_tokens=20, total_tokens=120)
+    return fake_response
+
+
+def make_fake_stream(text, pieces=3):
+    """Helper to build a fake streaming response yielding text in pieces."""
+    size = len(text) // pieces + 1
+
+    async def stream():
+        for i in range(0, len(text), size):
+            yield MagicMock(choices=[MagicMock(delta=MagicMock(content=text[i:i + size]))])
+    return stream()
+
+
+def make_fake_client(mock_create):
+    """Helper to wrap an async create mock in a fake AsyncOpenAI client."""
+    fake_client = MagicMock()
+    fake_client.chat.completions.create = mock_create
+    return fake_client
+
+
+def make_github_handler(calls, etag='"v1"'):
+    """Fake GitHub API: serves PR metadata or diff and honours If-None-Match."""
+    def handler(request):
+        accept = request.headers["Accept"]
+        calls.append((accept, request.headers.get("If-None-Match")))
+        if request.headers.get("If-None-Match") == etag + accept:
+            return httpx.Response(304)
+        body = SAMPLE_DIFF if accept == "application/vnd.github.v3.diff" else PULL_JSON
+        return httpx.Response(200, text=body, headers={"ETag": etag + accept})
+    return handler
+
+
+@pytest.fixture
+def mock_create():
+    """Patch the shared AsyncOpenAI client and yield its create mock."""
+    create = AsyncMock()
+    with patch("app.review.get_openai_client", return_value=make_fake_client(create)):
+        yield create
+
+
+@pytest.fixture(autouse=True)
+def clear_review_cache(monkeypatch):
+    """
+    Keep cached reviews, review history, GitHub ETags, schedulers and breakers from
+    leaking between tests.
+    """
+    review_cache.clear()
+    file_review_cache.clear()
+    review_history.clear()
+    for breaker in _breakers.values():
+        breaker.reset()
+    monkeypatch.setattr("app.github._github_client", None)
+    monkeypatch.setattr("app.ratelimit._schedulers", {})
+    yield
+    review_cache.clear()
+    file_review_cache.clear()
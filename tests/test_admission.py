@@ -0,0 +1,120 @@
+# tests/test_admission.py
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.admission import REJECT_QUEUE_FULL, REJECT_QUEUE_TIMEOUT, AdmissionController, Overloaded
+from app.main import app
+
+
+async def hold(controller, release, order, name, priority=0):
+    async with controller.admit(priority):
+        order.append(name)
+        await release.wait()
+
+
+def test_rejects_once_slots_and_queue_are_full():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=5)
+
+    async def scenario():
+        release, order = asyncio.Event(), []
+        running = asyncio.ensure_future(hold(controller, release, order, "a"))
+        waiting = asyncio.ensure_future(hold(controller, release, order, "b"))
+        await asyncio.sleep(0)
+        assert (controller.in_flight, controller.queued) == (1, 1)
+
+        with pytest.raises(Overloaded) as e:
+            async with controller.admit():
+                pass
+        assert e.value.reason == REJECT_QUEUE_FULL
+
+        release.set()
+        await asyncio.gather(running, waiting)
+        assert order == ["a", "b"]
+        assert (controller.in_flight, controller.queued) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_queued_review_times_out():
+    controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=0.05)
+
+    async def scenario():
+        release = asyncio.Event()
+        running = asyncio.ensure_future(hold(controller, release, [], "a"))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as e:
+            async with controller.admit():
+                pass
+        assert e.value.reason == REJECT_QUEUE_TIMEOUT and controller.queued == 0
+        release.set()
+        await running
+
+    asyncio.run(scenario())
+
+
+def test_smaller_priority_is_admitted_first():
+    controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=5)
+
+    async def scenario():
+        release, order = asyncio.Event(), []
+        first = asyncio.ensure_future(hold(controller, release, order, "first"))
+        await asyncio.sleep(0)
+        big = asyncio.ensure_future(hold(controller, release, order, "big", priority=5000))
+        small = asyncio.ensure_future(hold(controller, release, order, "small", priority=10))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(first, big, small)
+        return order
+
+    assert asyncio.run(scenario()) == ["first", "small", "big"]
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=5)
+
+    async def scenario():
+        release = asyncio.Event()
+        running = asyncio.ensure_future(hold(controller, release, [], "a"))
+        waiting = asyncio.ensure_future(hold(controller, release, [], "b"))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert controller.queued == 0
+        release.set()
+        await running
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_review_endpoint_sheds_load_with_503():
+    full = AdmissionController(max_concurrent=0, max_queue=0, retry_after=2.5)
+
+    with patch("app.main.review_admission", full), \
+            patch("app.review.review_github_pr", return_value={"error": ""}) as review:
+        response = TestClient(app).post("/review", json={"owner": "o", "repo": "r", "pr_number": 1})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "3"
+        review.assert_not_called()
+
+        # Heuristics-only reviews bypass admission control
+        response = TestClient(app).post("/review", json={
+            "owner": "o", "repo": "r", "pr_number": 1, "heuristics_only": True,
+        })
+        assert response.status_code == 200
+
+
+def test_full_queue_rejects_without_looking_up_the_pr():
+    """Small-diff priority needs the PR's size, but not for a review that is shed anyway."""
+    full = AdmissionController(max_concurrent=0, max_queue=0, prioritize_small_diffs=True)
+    assert full.queue_full()
+
+    with patch("app.main.review_admission", full), \
+            patch("app.main.get_github_client") as github:
+        response = TestClient(app).post("/review", json={"owner": "o", "repo": "r", "pr_number": 1})
+
+    assert response.status_code == 503
+    github.assert_not_called()
@@ -0,0 +1,61 @@
+# tests/test_benchmarks.py
+import asyncio
+
+import httpx
+
+from app.heuristics import heuristic_engine
+from benchmarks.baseline import find_regressions
+from benchmarks.diffgen import generate_diff
+from benchmarks.fakes import FakeBehavior, create_github_app, create_openai_app
+
+
+def test_generated_diff_has_requested_size():
+    """Synthetic diffs have the requested line and file counts and parse as real diffs."""
+    diff = generate_diff(1000, files=5, seed=1)
+    result = heuristic_engine.run(diff)
+
+    assert result.lines_in_diff == 1000
+    assert result.files_changed == 5
+    assert result.lines_added > result.lines_removed > 0
+    assert generate_diff(1000, files=5, seed=1) == diff
+
+
+def test_find_regressions():
+    """Latency going up or throughput going down beyond the tolerance is a regression."""
+    baseline = {"case": {"p50_ms": 100, "rps": 50, "mb_per_s": 20}}
+
+    assert find_regressions(baseline, {"case": {"p50_ms": 110, "rps": 45, "mb_per_s": 19}}) == []
+    regressions = find_regressions(baseline, {"case": {"p50_ms": 200, "rps": 20, "mb_per_s": 21},
+                                              "new_case": {"p50_ms": 1}})
+    assert len(regressions) == 2
+    assert regressions[0].startswith("case p50_ms")
+
+
+def test_find_regressions_is_normalised_to_machine_speed():
+    """On a machine twice as slow, twice the baseline latency is fine; memory is not scaled."""
+    baseline = {"case": {"median_ms": 10, "mb_per_s": 40, "peak_rss_mb": 80}}
+    slower_machine = {"case": {"median_ms": 20, "mb_per_s": 20, "peak_rss_mb": 80}}
+
+    assert len(find_regressions(baseline, slower_machine)) == 2
+    assert find_regressions(baseline, slower_machine, scale=2.0) == []
+    assert find_regressions(baseline, {"case": {"peak_rss_mb": 160}}, scale=2.0) != []
+
+
+def test_fakes_serve_pulls_completions_and_429s():
+    github = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_github_app(
+        FakeBehavior(), diff_lines=50)), base_url="http://github")
+    openai = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_openai_app(
+        FakeBehavior(rate_limit_rate=1.0, retry_after=2))), base_url="http://openai")
+
+    async def requests():
+        pull = await github.get("/repos/o/r/pulls/7")
+        diff = await github.get("/repos/o/r/pulls/7", headers={"Accept": "application/vnd.github.v3.diff"})
+        completion = await openai.post("/v1/chat/completions", json={"messages": []})
+        return pull, diff, completion
+
+    pull, diff, completion = asyncio.run(requests())
+
+    assert len(pull.json()["head"]["sha"]) == 40
+    assert diff.text.count("\n") == 50
+    assert completion.status_code == 429
+    assert completion.headers["retry-after"] == "2"
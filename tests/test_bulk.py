@@ -0,0 +1,131 @@
+# tests/test_bulk.py
+import asyncio
+import json
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.bulk import review_repo
+from app.github import GitHubClient
+from app.main import app
+
+
+def make_pull(number, labels=(), updated_at="2024-05-01T12:00:00Z"):
+    return {"number": number, "title": f"PR {number}", "updated_at": updated_at,
+            "labels": [{"name": label} for label in labels]}
+
+
+def fake_github(pulls):
+    """GitHub client stand-in listing the given PRs."""
+    class FakeGitHub:
+        async def list_pulls(self, owner, repo, state="open"):
+            for pull in pulls:
+                yield pull
+    return FakeGitHub()
+
+
+async def collect(lines):
+    return [line async for line in lines]
+
+
+def test_list_pulls_pages_until_a_short_page():
+    requests = []
+
+    def handler(request):
+        requests.append(request.url)
+        page = int(request.url.params["page"])
+        count = 2 if page < 3 else 1
+        return httpx.Response(200, json=[make_pull(page * 10 + i) for i in range(count)])
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with patch("app.github.get_http_client", return_value=http_client):
+        pulls = asyncio.run(collect(GitHubClient().list_pulls("o", "r", per_page=2)))
+
+    assert [p["number"] for p in pulls] == [10, 11, 20, 21, 30]
+    assert len(requests) == 3
+    assert requests[0].params["state"] == "open" and requests[0].params["sort"] == "updated"
+
+
+def test_review_repo_filters_by_label_and_update_time():
+    pulls = [
+        make_pull(1, labels=["Triage"], updated_at="2024-05-03T00:00:00Z"),
+        make_pull(2, labels=["other"], updated_at="2024-05-02T00:00:00Z"),
+        make_pull(3, labels=["triage"], updated_at="2024-04-01T00:00:00Z"),
+    ]
+
+    async def fake_review(owner, repo, pr_number, **options):
+        return {"summary": f"PR {pr_number}", "error": ""}
+
+    with patch("app.bulk.get_github_client", return_value=fake_github(pulls)), \
+            patch("app.review.review_github_pr", fake_review):
+        lines = asyncio.run(collect(review_repo(
+            "o", "r", labels=["triage"],
+            updated_since=datetime(2024, 5, 1, tzinfo=timezone.utc),
+        )))
+
+    assert [line["pr_number"] for line in lines[:-1]] == [1]
+    assert lines[-1] == {"event": "summary", "reviewed": 1, "errors": 0, "listing_error": ""}
+
+
+def test_review_repo_bounds_concurrency_and_streams_in_completion_order():
+    running = 0
+    peak = 0
+
+    async def fake_review(owner, repo, pr_number, **options):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05 if pr_number == 1 else 0.01)
+        running -= 1
+        if pr_number == 4:
+            raise RuntimeError("boom")
+        return {"summary": "ok", "error": ""}
+
+    pulls = [make_pull(n) for n in range(1, 7)]
+    with patch("app.bulk.get_github_client", return_value=fake_github(pulls)), \
+            patch("app.review.review_github_pr", fake_review):
+        lines = asyncio.run(collect(review_repo("o", "r", concurrency=2)))
+
+    numbers = [line["pr_number"] for line in lines[:-1]]
+    assert sorted(numbers) == [1, 2, 3, 4, 5, 6]
+    assert numbers[0] != 1  # The slow first PR does not hold back the others
+    assert peak == 2
+    assert lines[-1] == {"event": "summary", "reviewed": 6, "errors": 1, "listing_error": ""}
+
+
+def test_review_repo_reports_listing_failure():
+    class BrokenGitHub:
+        async def list_pulls(self, owner, repo, state="open"):
+            yield make_pull(1)
+            raise httpx.ConnectError("down")
+
+    async def fake_review(owner, repo, pr_number, **options):
+        return {"summary": "ok", "error": ""}
+
+    with patch("app.bulk.get_github_client", return_value=BrokenGitHub()), \
+            patch("app.review.review_github_pr", fake_review):
+        lines = asyncio.run(collect(review_repo("o", "r")))
+
+    events = [line["event"] for line in lines]
+    assert "error" in events and events.count("review") == 1
+    assert lines[-1]["reviewed"] == 1 and lines[-1]["errors"] == 1
+    assert "down" in lines[-1]["listing_error"]
+
+
+def test_review_repo_endpoint_streams_ndjson():
+    async def fake_review_repo(**options):
+        assert options["state"] == "all" and options["max_prs"] == 2
+        yield {"event": "review", "pr_number": 1, "title": "PR 1", "analysis": {}}
+        yield {"event": "summary", "reviewed": 1, "errors": 0}
+
+    with patch("app.main.review_repo", fake_review_repo):
+        response = TestClient(app).post("/review/repo", json={
+            "owner": "o", "repo": "r", "state": "all", "max_prs": 2,
+        })
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["event"] for line in lines] == ["review", "summary"]
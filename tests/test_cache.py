@@ -0,0 +1,84 @@
+# tests/test_cache.py
+import json
+import asyncio
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from app.cache import ReviewCache, SQLiteCacheBackend, make_review_key
+from app.review import review_diff
+
+SAMPLE_DIFF = "+ print('hello world')"
+
+
+def test_review_key_ignores_whitespace_noise():
+    """Equivalent diffs hash the same; model and prompt version change the key."""
+    key = make_review_key("+a\n+b\n", "gpt-4", "1")
+    assert key == make_review_key("+a  \r\n+b", "gpt-4", "1")
+    assert key != make_review_key("+a\n+b\n", "gpt-4o-mini", "1")
+    assert key != make_review_key("+a\n+b\n", "gpt-4", "2")
+
+
+def test_lru_eviction():
+    """Least recently used entries are evicted once the cache is full."""
+    cache = ReviewCache(max_entries=2, ttl=60)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    cache.get("a")
+    cache.set("c", {"v": 3})
+
+    assert cache.get("a") == {"v": 1}
+    assert cache.get("b") is None
+    assert cache.get("c") == {"v": 3}
+
+
+def test_ttl_expiry():
+    """Entries past their TTL are treated as misses."""
+    cache = ReviewCache(max_entries=10, ttl=60)
+    with patch("app.cache.time.time", return_value=1000):
+        cache.set("a", {"v": 1})
+    with patch("app.cache.time.time", return_value=1061):
+        assert cache.get("a") is None
+
+
+def test_shared_backend_is_visible_across_instances(tmp_path):
+    """Two caches (e.g. two workers) sharing a SQLite file see each other's entries."""
+    db_path = str(tmp_path / "cache.db")
+    writer = ReviewCache(backend=SQLiteCacheBackend(db_path))
+    reader = ReviewCache(backend=SQLiteCacheBackend(db_path))
+
+    writer.set("a", {"v": 1})
+
+    assert reader.get("a") == {"v": 1}
+
+
+def test_shared_backend_prunes_expired_rows_and_caps_size(tmp_path):
+    """Rows nobody reads again are still removed, and the file never grows past max_rows."""
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.db"), max_rows=3, prune_interval=0)
+    backend.set("expired", {"v": 0}, expires_at=1)
+    for i in range(5):
+        backend.set(f"k{i}", {"v": i}, expires_at=2e9 + i)
+
+    with backend._connect() as conn:
+        keys = {row[0] for row in conn.execute("SELECT key FROM review_cache")}
+    assert keys == {"k2", "k3", "k4"}
+
+
+def test_review_diff_uses_cache():
+    """A repeated diff is served from the cache without a second model call."""
+    fake_response = MagicMock()
+    fake_response.choices = [MagicMock(message=MagicMock(content=json.dumps({
+        "summary": "Adds logging",
+        "issues": [],
+        "complexity_score": 1,
+        "risk_level": "low",
+        "recommended_actions": []
+    })))]
+    fake_response.usage = None
+    fake_client = MagicMock()
+    fake_client.chat.completions.create = AsyncMock(return_value=fake_response)
+
+    with patch("app.review.get_openai_client", return_value=fake_client):
+        first = asyncio.run(review_diff(SAMPLE_DIFF))
+        second = asyncio.run(review_diff(SAMPLE_DIFF))
+
+    assert first == second
+    assert fake_client.chat.completions.create.await_count == 1
@@ -0,0 +1,39 @@
+# tests/test_diff.py
+from app.diff import chunk_diff, estimate_tokens, split_files, split_hunks
+from tests.conftest import MULTI_FILE_DIFF, make_file_diff
+
+
+def test_split_files_and_hunks():
+    """Files split on 'diff --git', hunks split on '@@' with the header kept apart."""
+    files = split_files(MULTI_FILE_DIFF)
+    assert len(files) == 6
+    header, hunks = split_hunks(files[0])
+    assert header.startswith("diff --git a/file0.py")
+    assert len(hunks) == 2
+    assert all(hunk.startswith("@@") for hunk in hunks)
+
+
+def test_small_diff_is_a_single_chunk():
+    """Diffs within budget are not split."""
+    assert chunk_diff(MULTI_FILE_DIFF, 100_000) == [MULTI_FILE_DIFF]
+
+
+def test_chunks_respect_file_boundaries_and_budget():
+    """Whole files are packed together and every chunk stays within the budget."""
+    budget = estimate_tokens(make_file_diff("file0.py")) * 2 + 10
+    chunks = chunk_diff(MULTI_FILE_DIFF, budget)
+
+    assert len(chunks) == 3
+    assert "".join(chunks) == MULTI_FILE_DIFF
+    assert all(chunk.startswith("diff --git") for chunk in chunks)
+    assert all(estimate_tokens(chunk) <= budget for chunk in chunks)
+
+
+def test_oversized_file_is_split_on_hunks_with_header():
+    """A file larger than the budget is split per hunk, repeating its file header."""
+    big_file = make_file_diff("big.py", hunks=4, lines_per_hunk=30)
+    chunks = chunk_diff(big_file, estimate_tokens(big_file) // 3)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk.startswith("diff --git a/big.py b/big.py\n--- a/big.py\n+++ b/big.py\n@@")
@@ -0,0 +1,138 @@
+# tests/test_heuristics.py
+import json
+import time
+
+import pytest
+from pydantic import ValidationError
+
+from app.heuristics import (
+    DEFAULT_RULES, HeuristicConfig, HeuristicEngine, HeuristicRule, load_heuristic_config,
+)
+
+DIFF = """diff --git a/app/util.py b/app/util.py
+index 123abc..456def 100644
+--- a/app/util.py
++++ b/app/util.py
+@@ -1,3 +1,3 @@
+ def helper():
+-    print("old debug")
++    return 42  # TODO: cache this
+ # FIXME in context only
+diff --git a/tests/test_util.py b/tests/test_util.py
+--- a/tests/test_util.py
++++ b/tests/test_util.py
+@@ -0,0 +1 @@
++print("test output")
+"""
+
+
+def test_rules_only_see_added_lines_by_default():
+    """Removed and context lines do not trigger the default rules."""
+    engine = HeuristicEngine(HeuristicConfig(rules=DEFAULT_RULES))
+    result = engine.run(DIFF.replace('+print("test output")', '+pass'))
+
+    assert result.issues == ["Contains TODO/FIXME comments"]
+    assert result.matches == {"debug_print": 0, "todo_fixme": 1}
+    assert result.risk_level == "medium"
+
+
+def test_diff_structure_is_parsed_in_one_pass():
+    """File, added and removed counts come from the same pass as the rules."""
+    result = HeuristicEngine(HeuristicConfig(rules=DEFAULT_RULES)).run(DIFF)
+
+    assert result.files_changed == 2
+    assert result.lines_added == 2
+    assert result.lines_removed == 1
+    assert result.lines_in_diff == len(DIFF.splitlines())
+    assert "Debug prints detected" in result.issues
+
+
+def test_custom_rules_with_path_and_line_kind_filters():
+    """Rules can be scoped to file paths and to removed lines."""
+    rules = [
+        HeuristicRule(name="test_print", pattern=r"print\(", issue="Print in tests",
+                      path_pattern=r"^tests/", risk="low"),
+        HeuristicRule(name="removed_debug", pattern=r"debug", issue="Debug code removed",
+                      line_kinds=["removed"], action="", risk="high"),
+    ]
+    result = HeuristicEngine(HeuristicConfig(rules=rules)).run(DIFF)
+
+    assert result.issues == ["Print in tests", "Debug code removed"]
+    assert result.recommended_actions == ["Manual review recommended"]
+    assert result.risk_level == "high"
+
+
+def test_anchored_rules_match_line_content():
+    """^ anchors to the start of a line's code (after the +/- marker) and $ to its end."""
+    rules = [
+        HeuristicRule(name="imp", pattern=r"^\s*import pdb", issue="pdb imported"),
+        HeuristicRule(name="eol", pattern=r"debugger;$", issue="debugger statement"),
+        HeuristicRule(name="not_caret", pattern=r"[^a-z]breakpoint\(\)", issue="breakpoint"),
+    ]
+    diff = (
+        "diff --git a/app/a.py b/app/a.py\n@@ -1,2 +1,4 @@\n"
+        "+import pdb\n"
+        "+    import pdb  # indented\n"
+        "+x = 1  # import pdb\n"
+        "+debugger; // not at the end\n"
+        "+  debugger;\n"
+        "+ breakpoint()\n"
+    )
+    result = HeuristicEngine(HeuristicConfig(rules=rules)).run(diff)
+
+    assert result.matches == {"imp": 2, "eol": 1, "not_caret": 1}
+
+
+def test_load_rules_from_file(tmp_path):
+    """Rules and the large-diff threshold can be configured from a JSON file."""
+    rules_file = tmp_path / "rules.json"
+    rules_file.write_text(json.dumps({
+        "large_diff_lines": 5,
+        "rules": [{"name": "secret", "pattern": "(?i)api_key", "issue": "Possible secret", "risk": "high"}],
+    }))
+
+    engine = HeuristicEngine(load_heuristic_config(str(rules_file)))
+    result = engine.run("+API_KEY = 'x'\n")
+
+    assert result.issues == ["Possible secret"]
+    assert engine.config.large_diff_lines == 5
+
+
+def test_invalid_rules_file_falls_back_to_defaults(tmp_path):
+    """A broken rules file does not stop the service; the built-in rules are used."""
+    rules_file = tmp_path / "rules.json"
+    rules_file.write_text(json.dumps({"rules": [{"name": "bad", "pattern": "("}]}))
+
+    assert load_heuristic_config(str(rules_file)).rules == DEFAULT_RULES
+
+
+def test_rules_that_cannot_be_combined_are_rejected():
+    """Group names and numbers would refer to other rules' groups in the combined scan."""
+    for pattern in [r"(?P<word>\w+)", r"(?P<a>x)(?P=a)", r"(b)\1", r"(b)?(?(1)c|d)"]:
+        with pytest.raises(ValidationError, match="not supported in rule patterns"):
+            HeuristicRule(name="grouped", pattern=pattern)
+
+    # An escaped backslash followed by a digit is a literal, not a backreference
+    engine = HeuristicEngine(HeuristicConfig(rules=[
+        HeuristicRule(name="path", pattern=r"C:\\1", issue="Windows path"),
+        HeuristicRule(name="call", pattern=r"(print|log)\(", issue="Call"),
+    ]))
+    assert engine.run("+x = 'C:\\1'\n+log(x)\n").issues == ["Windows path", "Call"]
+
+
+def test_multi_megabyte_diff_is_fast():
+    """Heuristics-only analysis of a multi-megabyte diff completes well under a second."""
+    big_diff = "".join(
+        f"diff --git a/f{i}.py b/f{i}.py\n--- a/f{i}.py\n+++ b/f{i}.py\n@@ -1 +1,100 @@\n"
+        + "+    value = compute(value)  # plain line of code\n" * 100
+        for i in range(1000)
+    )
+    assert len(big_diff) > 4_000_000
+
+    start = time.perf_counter()
+    result = HeuristicEngine(HeuristicConfig(rules=DEFAULT_RULES)).run(big_diff)
+    elapsed = time.perf_counter() - start
+
+    assert result.files_changed == 1000
+    assert result.risk_level == "high"
+    assert elapsed < 1.0
@@ -0,0 +1,111 @@
+# tests/test_history.py
+import asyncio
+import time
+from unittest.mock import patch
+
+import httpx
+from fastapi.testclient import TestClient
+from openai import OpenAIError
+
+from app.history import ReviewHistory, review_history
+from app.main import app
+from app.review import review_github_pr
+from tests.conftest import make_fake_response, make_github_handler
+
+DAY = 24 * 3600
+
+
+def make_review(risk="low", complexity=2, issues=()):
+    return {"summary": "s", "issues": list(issues), "complexity_score": complexity,
+            "risk_level": risk, "recommended_actions": [], "lines_in_diff": 10, "error": ""}
+
+
+def test_rollups_are_updated_on_write():
+    history = ReviewHistory()
+    now = time.time()
+    history.record("o", "r", 1, "a", make_review("low", 2, ["Missing tests"]), author="ann")
+    history.record("o", "r", 2, "b", make_review("high", 6, ["Missing tests", "TODO found"]))
+    history.record("o", "r", 3, "c", make_review("medium", 4), created_at=now - DAY)
+    history.record("o", "other", 4, "d", make_review("high", 9, ["Elsewhere"]))
+
+    trends = history.trends("o", "r", days=7)
+    assert [d["reviews"] for d in trends["days"]] == [1, 2]
+    today = trends["days"][-1]
+    assert today["average_complexity"] == 4.0
+    assert today["risk"] == {"low": 1, "medium": 0, "high": 1}
+    assert trends["top_issues"] == [{"issue": "Missing tests", "count": 2},
+                                    {"issue": "TODO found", "count": 1}]
+
+
+def test_same_head_is_counted_once():
+    history = ReviewHistory()
+    assert history.record("o", "r", 1, "a", make_review())
+    assert not history.record("o", "r", 1, "a", make_review("high"))
+    assert history.record("o", "r", 1, "b", make_review("high"))
+
+    assert history.trends("o", "r")["days"][0]["reviews"] == 2
+    assert [h["head_sha"] for h in history.pull_history("o", "r", 1)] == ["b", "a"]
+
+
+def test_trends_window_excludes_older_days():
+    history = ReviewHistory()
+    history.record("o", "r", 1, "a", make_review(), created_at=time.time() - 40 * DAY)
+    history.record("o", "r", 2, "b", make_review())
+
+    assert len(history.trends("o", "r", days=30)["days"]) == 1
+    assert len(history.trends("o", "r", days=60)["days"]) == 2
+
+
+def test_history_file_survives_reopen(tmp_path):
+    path = str(tmp_path / "history.db")
+    ReviewHistory(path).record("o", "r", 1, "a", make_review(issues=["X"]))
+
+    assert ReviewHistory(path).trends("o", "r")["top_issues"] == [{"issue": "X", "count": 1}]
+
+
+def test_review_github_pr_records_history(mock_create):
+    mock_create.return_value = make_fake_response({
+        "summary": "Updates greeting",
+        "issues": [],
+        "complexity_score": 1,
+        "risk_level": "low",
+        "recommended_actions": []
+    })
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(make_github_handler([])))
+    with patch("app.github.get_http_client", return_value=http_client):
+        asyncio.run(review_github_pr("thitami", "ai-pr-reviewer", 1))
+        asyncio.run(review_github_pr("thitami", "ai-pr-reviewer", 1))  # Cached: not recorded again
+
+    reviews = review_history.pull_history("thitami", "ai-pr-reviewer", 1)
+    assert len(reviews) == 1 and reviews[0]["head_sha"] == "abc123"
+
+    response = TestClient(app).get("/history/thitami/ai-pr-reviewer/trends?days=7")
+    assert response.status_code == 200
+    assert response.json()["days"][0]["reviews"] == 1
+
+
+def test_fallback_review_does_not_block_the_real_one(mock_create):
+    """OpenAI fails, then recovers on the same head: only the AI review is recorded."""
+    mock_create.side_effect = [
+        OpenAIError("model down"),
+        make_fake_response({
+            "summary": "Updates greeting",
+            "issues": [],
+            "complexity_score": 3,
+            "risk_level": "low",
+            "recommended_actions": []
+        }),
+    ]
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(make_github_handler([])))
+    with patch("app.github.get_http_client", return_value=http_client):
+        degraded = asyncio.run(review_github_pr("thitami", "ai-pr-reviewer", 1))
+        assert degraded["error"]
+        assert review_history.pull_history("thitami", "ai-pr-reviewer", 1) == []
+
+        asyncio.run(review_github_pr("thitami", "ai-pr-reviewer", 1))
+
+    reviews = review_history.pull_history("thitami", "ai-pr-reviewer", 1)
+    assert [r["review"]["summary"] for r in reviews] == ["Updates greeting"]
+    assert review_history.trends("thitami", "ai-pr-reviewer")["days"][0]["average_complexity"] == 3.0
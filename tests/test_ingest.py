@@ -0,0 +1,91 @@
+# tests/test_ingest.py
+import asyncio
+
+from app.ingest import DiffFilterConfig, ingest_diff, ingest_diff_stream
+from tests.conftest import make_file_diff
+
+
+def chunked(text, size):
+    """Async iterator over text in fixed-size pieces, like httpx aiter_text."""
+    async def chunks():
+        for i in range(0, len(text), size):
+            yield text[i:i + size]
+    return chunks()
+
+
+def skipped(result):
+    return {f.path: f.reason for f in result.skipped_files}
+
+
+def test_lockfiles_minified_vendored_and_snapshots_are_skipped():
+    diff = "".join(make_file_diff(name) for name in (
+        "app/main.py", "package-lock.json", "static/app.min.js",
+        "vendor/lib/util.go", "tests/__snapshots__/view.snap",
+    ))
+    result = ingest_diff(diff)
+
+    assert result.diff == make_file_diff("app/main.py")
+    assert skipped(result) == {
+        "package-lock.json": "excluded path",
+        "static/app.min.js": "excluded path",
+        "vendor/lib/util.go": "excluded path",
+        "tests/__snapshots__/view.snap": "excluded path",
+    }
+
+
+def test_binary_generated_and_minified_content_is_skipped():
+    binary = "diff --git a/logo.png b/logo.png\nindex 1..2 100644\nBinary files a/logo.png and b/logo.png differ\n"
+    generated = make_file_diff("api_pb2.py").replace(
+        "+line 0 of api_pb2.py", "+# Generated by the protocol buffer compiler.  DO NOT EDIT!")
+    minified = make_file_diff("bundle.js").replace("+line 3 of bundle.js", "+" + "x;" * 1000)
+    diff = make_file_diff("keep.py") + binary + generated + minified
+
+    result = ingest_diff(diff)
+
+    assert result.diff == make_file_diff("keep.py")
+    assert skipped(result) == {"logo.png": "binary", "api_pb2.py": "generated", "bundle.js": "minified"}
+
+
+def test_budget_keeps_whole_files_only():
+    """Files that no longer fit the budget are dropped whole; smaller later files still fit."""
+    big, small = make_file_diff("big.py", hunks=10), make_file_diff("small.py", hunks=1, lines_per_hunk=2)
+    config = DiffFilterConfig(max_bytes=len(small) + 10, max_lines=1000)
+
+    result = ingest_diff(big + small, config)
+
+    assert result.diff == small
+    assert skipped(result) == {"big.py": "over budget"}
+
+    config = DiffFilterConfig(max_bytes=10_000_000, max_lines=small.count("\n"))
+    assert ingest_diff(big + small, config).diff == small
+
+
+def test_streamed_diff_matches_in_memory_ingestion():
+    """Chunk boundaries inside lines make no difference."""
+    diff = "".join(make_file_diff(name) for name in ("a.py", "yarn.lock", "b.py"))
+
+    for size in (1, 7, 64, len(diff)):
+        streamed = asyncio.run(ingest_diff_stream(chunked(diff, size)))
+        assert streamed == ingest_diff(diff)
+
+
+def test_enormous_line_is_not_buffered():
+    """A single huge line (minified bundle) is discarded while streaming."""
+    diff = (make_file_diff("keep.py") + "diff --git a/dist/app.js b/dist/app.js\n@@ -0,0 +1 @@\n+"
+            + "a" * 100_000 + "\n" + make_file_diff("also_keep.py"))
+
+    result = asyncio.run(ingest_diff_stream(chunked(diff, 4096)))
+
+    assert result.diff == make_file_diff("keep.py") + make_file_diff("also_keep.py")
+    assert skipped(result) == {"dist/app.js": "minified"}
+
+
+def test_long_context_line_is_kept_while_streaming():
+    """Only long added or removed lines mark a file as minified, streamed or not."""
+    diff = ("diff --git a/keep.py b/keep.py\n@@ -1,2 +1,2 @@\n " + "c" * 1500
+            + "\n-old\n+new\n" + make_file_diff("also_keep.py"))
+
+    streamed = asyncio.run(ingest_diff_stream(chunked(diff, 256)))
+
+    assert streamed == ingest_diff(diff)
+    assert streamed.diff == diff
@@ -0,0 +1,159 @@
+# tests/test_jobs.py
+import asyncio
+import sqlite3
+import time
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.jobs import (
+    InMemoryJobStore, JobQueue, ReviewJob, SQLiteJobStore, JOB_DONE, JOB_FAILED, JOB_QUEUED,
+    JOB_RUNNING,
+)
+from app.main import app
+
+sample_payload = {
+    "owner": "thitami",
+    "repo": "ai-pr-reviewer",
+    "pr_number": 1
+}
+
+mock_review_data = {
+    "summary": "Adds logging",
+    "issues": [],
+    "complexity_score": 1,
+    "risk_level": "low",
+    "recommended_actions": [],
+    "lines_in_diff": 1,
+    "error": ""
+}
+
+
+def wait_for_job(client, job_id, timeout=2.0):
+    """Poll the job endpoint until the job has finished."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/reviews/{job_id}").json()
+        if job["status"] in (JOB_DONE, JOB_FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_submit_job_returns_202_and_result_is_available():
+    """POST /reviews returns 202 with a job id; GET /reviews/{id} returns the result."""
+    with patch("app.review.review_github_pr", return_value=mock_review_data):
+        with TestClient(app) as client:
+            response = client.post("/reviews", json=sample_payload)
+            assert response.status_code == 202
+            job_id = response.json()["job_id"]
+
+            job = wait_for_job(client, job_id)
+
+    assert job["status"] == JOB_DONE
+    assert job["result"] == mock_review_data
+    assert job["request"]["pr_number"] == 1
+
+
+def test_job_fails_when_nothing_was_reviewed():
+    """A GitHub failure marks the job as failed with the error."""
+    with patch("app.review.review_github_pr", return_value={"error": "GitHub API request failed"}):
+        with TestClient(app) as client:
+            job_id = client.post("/reviews", json=sample_payload).json()["job_id"]
+            job = wait_for_job(client, job_id)
+
+    assert job["status"] == JOB_FAILED
+    assert job["error"] == "GitHub API request failed"
+
+
+def test_unknown_job_returns_404():
+    """Unknown job ids return 404."""
+    response = TestClient(app).get("/reviews/does-not-exist")
+    assert response.status_code == 404
+
+
+def test_worker_pool_is_bounded():
+    """No more than `workers` jobs run at the same time."""
+    running = {"now": 0, "max": 0}
+
+    async def runner(request):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        return {"summary": "ok"}
+
+    async def run_jobs():
+        queue = JobQueue(InMemoryJobStore(), runner, workers=2, poll_interval=0.01)
+        queue.start()
+        jobs = [queue.submit({"pr_number": i}) for i in range(6)]
+        while any(queue.get(job.id).status != JOB_DONE for job in jobs):
+            await asyncio.sleep(0.01)
+        await queue.stop()
+
+    asyncio.run(run_jobs())
+    assert running["max"] == 2
+
+
+def test_sqlite_store_survives_restart(tmp_path):
+    """Queued and interrupted jobs in the SQLite store are picked up by a new process."""
+    db_path = str(tmp_path / "jobs.db")
+    store = SQLiteJobStore(db_path)
+    now = time.time()
+    store.add(ReviewJob(id="a", status=JOB_QUEUED, request={"pr_number": 1},
+                        created_at=now, updated_at=now))
+    store.add(ReviewJob(id="b", status=JOB_QUEUED, request={"pr_number": 2},
+                        created_at=now + 1, updated_at=now + 1))
+    assert store.claim_next().id == "a"
+    assert store.get("a").status == JOB_RUNNING
+
+    # "Restart": a new store on the same file puts the interrupted job back in the queue
+    # once its lease has expired
+    restarted = SQLiteJobStore(db_path)
+    assert restarted.requeue_running() == 0
+    with patch("app.jobs.time.time", return_value=time.time() + store.lease + 1):
+        assert restarted.requeue_running() == 1
+    assert restarted.count(JOB_QUEUED) == 2
+
+
+def test_sqlite_store_leaves_jobs_of_live_workers_alone(tmp_path):
+    """A worker starting next to a busy one does not take over its running job."""
+    db_path = str(tmp_path / "jobs.db")
+    release = None
+
+    async def runner(request):
+        await release.wait()
+        return {"summary": "ok"}
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        busy = JobQueue(SQLiteJobStore(db_path, lease=0.1), runner, workers=1,
+                        poll_interval=0.01, heartbeat_interval=0.02)
+        busy.start()
+        job = busy.submit({"pr_number": 1})
+        await asyncio.sleep(0.3)  # Several lease periods: only the heartbeat keeps it
+
+        starting = SQLiteJobStore(db_path, lease=0.1)
+        assert starting.requeue_running() == 0
+        assert starting.get(job.id).status == JOB_RUNNING
+        release.set()
+        while busy.get(job.id).status != JOB_DONE:
+            await asyncio.sleep(0.01)
+        await busy.stop()
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_store_adds_lease_columns_to_old_files(tmp_path):
+    """Job files from before leases are migrated; their running jobs are requeued."""
+    db_path = str(tmp_path / "jobs.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE review_jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL,"
+                     " request TEXT NOT NULL, result TEXT, error TEXT NOT NULL DEFAULT '',"
+                     " created_at REAL NOT NULL, updated_at REAL NOT NULL)")
+        conn.execute("INSERT INTO review_jobs VALUES ('a', ?, '{}', NULL, '', 0, 0)", (JOB_RUNNING,))
+
+    store = SQLiteJobStore(db_path)
+    assert store.requeue_running() == 1
+    assert store.claim_next().id == "a"
@@ -1,7 +1,7 @@
-import pytest, json, os
+import pytest, json, os, asyncio
 from fastapi.testclient import TestClient
-from unittest.mock import MagicMock, patch
-from requests.exceptions import RequestException
+from unittest.mock import AsyncMock, MagicMock, patch
+from httpx import HTTPError
 
 from app.main import app
 
@@ -29,7 +29,7 @@ def test_review_pr_success():
         "error": None
     }
 
-    with patch("app.main.review_github_pr", return_value=mock_review_data):
+    with patch("app.review.review_github_pr", return_value=mock_review_data):
         response = client.post("/review", json=sample_payload)
 
     assert response.status_code == 200
@@ -54,7 +54,7 @@ def test_review_pr_partial_error():
         "error": "AI model timed out"
     }
 
-    with patch("app.main.review_github_pr", return_value=mock_review_data):
+    with patch("app.review.review_github_pr", return_value=mock_review_data):
         response = client.post("/review", json=sample_payload)
 
     assert response.status_code == 200
@@ -66,7 +66,7 @@ def test_review_pr_partial_error():
 
 def test_review_pr_github_failure():
     """Test /review endpoint raises 502 if GitHub API fails."""
-    with patch("app.main.review_github_pr", side_effect=RequestException("GitHub down")):
+    with patch("app.review.review_github_pr", side_effect=HTTPError("GitHub down")):
         response = client.post("/review", json=sample_payload)
 
     assert response.status_code == 502
@@ -76,7 +76,7 @@ def test_review_pr_github_failure():
 
 def test_review_pr_unexpected_exception():
     """Test /review endpoint raises 500 on unexpected errors."""
-    with patch("app.main.review_github_pr", side_effect=Exception("Unexpected error")):
+    with patch("app.review.review_github_pr", side_effect=Exception("Unexpected error")):
         response = client.post("/review", json=sample_payload)
 
     assert response.status_code == 500
@@ -103,12 +103,39 @@ def test_review_diff_returns_merged_actions():
             })
         ))
     ]
+    fake_openai_response.usage = None
 
-    with patch("app.review.openai.chat.completions.create", return_value=fake_openai_response):
-        result = review_diff(diff)
+    fake_client = MagicMock()
+    fake_client.chat.completions.create = AsyncMock(return_value=fake_openai_response)
+
+    with patch("app.review.get_openai_client", return_value=fake_client):
+        result = asyncio.run(review_diff(diff))
 
     # Complexity and risk reflect merged heuristic
     assert result["complexity_score"] == 3
     assert result["risk_level"] == "medium"  # heuristic adds medium risk
     expected_actions = set(["Add unit tests", "Manual review recommended"])
     assert set(result["recommended_actions"]) == expected_actions
+
+
+def test_review_pr_stream_sends_server_sent_events():
+    """/review/stream formats each stage as a server-sent event."""
+    options = []
+
+    async def fake_stream(owner, repo, pr_number, **kwargs):
+        options.append(kwargs)
+        yield "heuristics", {"issues": ["Debug prints detected"]}
+        yield "token", {"content": "{"}
+        yield "review", {"summary": "Adds logging"}
+
+    with patch("app.review.stream_review_github_pr", fake_stream):
+        response = client.post("/review/stream", json=sample_payload)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text == (
+        'event: heuristics\ndata: {"issues": ["Debug prints detected"]}\n\n'
+        'event: token\ndata: {"content": "{"}\n\n'
+        'event: review\ndata: {"summary": "Adds logging"}\n\n'
+    )
+    assert options == [{"heuristics_only": False, "incremental": False, "deadline_seconds": None}]
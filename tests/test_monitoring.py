@@ -0,0 +1,60 @@
+# tests/test_monitoring.py
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.monitoring import MetricsMiddleware
+
+app = FastAPI()
+app.add_middleware(MetricsMiddleware)
+
+
+@app.get("/items/{item_id}")
+async def get_item(item_id: int):
+    return {"id": item_id}
+
+
+@app.get("/boom")
+async def boom():
+    raise RuntimeError("boom")
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_requests_are_labelled_by_route_template():
+    """The endpoint label is the route template, not the raw path."""
+    client = TestClient(app)
+    before = sample("api_requests_total", method="GET", endpoint="/items/{item_id}", status="200")
+
+    for item_id in (1, 2, 3):
+        assert client.get(f"/items/{item_id}").status_code == 200
+
+    assert sample("api_requests_total", method="GET", endpoint="/items/{item_id}",
+                  status="200") == before + 3
+    assert sample("api_requests_total", method="GET", endpoint="/items/1", status="200") == 0
+
+
+def test_unmatched_paths_share_one_label():
+    """404s for arbitrary paths do not create a label per path."""
+    client = TestClient(app)
+    before = sample("api_requests_total", method="GET", endpoint="unmatched", status="404")
+
+    client.get("/does-not-exist")
+    client.get("/nor-this")
+
+    assert sample("api_requests_total", method="GET", endpoint="unmatched",
+                  status="404") == before + 2
+
+
+def test_active_requests_decremented_when_handler_raises():
+    """A failing handler is counted as a 500 and does not leak an active request."""
+    client = TestClient(app, raise_server_exceptions=False)
+    active = sample("api_active_requests")
+    before = sample("api_requests_total", method="GET", endpoint="/boom", status="500")
+
+    assert client.get("/boom").status_code == 500
+
+    assert sample("api_active_requests") == active
+    assert sample("api_requests_total", method="GET", endpoint="/boom", status="500") == before + 1
@@ -0,0 +1,140 @@
+# tests/test_ratelimit.py
+import asyncio
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.ratelimit import DeadlineExceeded, Throttled, UpstreamScheduler, parse_duration
+from app.resilience import deadline
+
+
+def test_parse_duration():
+    """Retry-After and OpenAI reset headers are parsed into seconds."""
+    assert parse_duration("20") == 20
+    assert parse_duration("1.5") == 1.5
+    assert parse_duration("20ms") == 0.02
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("1h2m3s") == 3723
+    assert parse_duration("soon") is None
+    assert parse_duration(None) is None
+
+
+def test_throttled_call_is_retried_and_concurrency_halves():
+    """A throttled call backs off, retries and halves the concurrency limit."""
+    scheduler = UpstreamScheduler("test", rate=1000, max_concurrency=8, base_delay=0.001)
+    attempts = []
+
+    async def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise Throttled(RuntimeError("429"), retry_after=0.02)
+        return "ok"
+
+    assert asyncio.run(scheduler.run(flaky)) == "ok"
+    assert len(attempts) == 3
+    assert attempts[1] - attempts[0] >= 0.02
+    # Halved twice, then grown a little by the success
+    assert 2 <= scheduler.concurrency < 3
+
+
+def test_retries_exhausted_raises_original_error():
+    """After max_retries the upstream's own exception is raised."""
+    scheduler = UpstreamScheduler("test", rate=1000, max_concurrency=2, max_retries=1,
+                                  base_delay=0.001)
+
+    async def always_throttled():
+        raise Throttled(ValueError("still limited"), rate_limited=False)
+
+    with pytest.raises(ValueError, match="still limited"):
+        asyncio.run(scheduler.run(always_throttled))
+
+
+def test_concurrency_and_rate_limits():
+    """In-flight calls never exceed the limit and the bucket paces starts."""
+    scheduler = UpstreamScheduler("test", rate=100, max_concurrency=2, burst=2)
+    running = {"now": 0, "max": 0}
+
+    async def call():
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.005)
+        running["now"] -= 1
+
+    async def run_many():
+        start = time.monotonic()
+        await asyncio.gather(*(scheduler.run(call) for _ in range(10)))
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(run_many())
+    assert running["max"] == 2
+    # 2 burst tokens, then 8 more at 100/s
+    assert elapsed >= 0.07
+
+
+def test_exhausted_quota_blocks_until_reset():
+    """Remaining=0 in the rate-limit headers blocks new calls until the reset time."""
+    scheduler = UpstreamScheduler("test", rate=1000, max_concurrency=2)
+    scheduler.observe_limits(remaining=0, reset_in=1.0)
+    assert scheduler._admit_delay() > 0.9
+
+    scheduler = UpstreamScheduler("test", rate=1000, max_concurrency=2)
+    scheduler.observe_limits(remaining=100, reset_in=50)
+    assert scheduler.rate == 2
+
+
+def test_github_429_is_retried_after_retry_after(monkeypatch):
+    """GitHub 429 responses with Retry-After are retried by the scheduler."""
+    from app.github import GitHubClient
+
+    monkeypatch.setattr("app.ratelimit._schedulers", {
+        "github": UpstreamScheduler("github", rate=1000, max_concurrency=4, base_delay=0.001)
+    })
+    responses = iter([
+        httpx.Response(429, headers={"Retry-After": "0"}),
+        httpx.Response(200, text='{"head": {"sha": "abc"}}', headers={
+            "X-RateLimit-Remaining": "4999", "X-RateLimit-Reset": str(int(time.time()) + 3600)}),
+    ])
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: next(responses)))
+
+    with patch("app.github.get_http_client", return_value=http_client):
+        pull = asyncio.run(GitHubClient().get_pull("thitami", "ai-pr-reviewer", 1))
+
+    assert pull["head"]["sha"] == "abc"
+
+
+def test_waiting_for_a_slot_respects_the_deadline():
+    """A quota that resets after the deadline fails at once; a full pool waits until it."""
+    blocked = UpstreamScheduler("test", rate=1000, max_concurrency=2)
+    blocked.observe_limits(remaining=0, reset_in=5.0)
+    busy = UpstreamScheduler("test", rate=1000, max_concurrency=1)
+
+    async def scenario():
+        with deadline(0.5), pytest.raises(DeadlineExceeded):
+            await blocked.acquire()
+        await busy.acquire()
+        start = time.perf_counter()
+        with deadline(0.1), pytest.raises(DeadlineExceeded):
+            await busy.acquire()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    busy_wait = asyncio.run(scenario())
+    assert time.perf_counter() - start < 1
+    assert 0.05 < busy_wait < 0.5
+
+
+def test_github_review_gives_up_on_a_blocked_quota_at_the_deadline(monkeypatch):
+    """An exhausted GitHub quota fails the review within its deadline, not at the reset."""
+    from app.review import review_github_pr
+
+    scheduler = UpstreamScheduler("github", rate=1000, max_concurrency=4)
+    scheduler.observe_limits(remaining=0, reset_in=5.0)
+    monkeypatch.setattr("app.ratelimit._schedulers", {"github": scheduler})
+
+    start = time.perf_counter()
+    result = asyncio.run(review_github_pr("o", "r", 1, deadline_seconds=0.5))
+
+    assert time.perf_counter() - start < 1
+    assert "GitHub API request failed" in result["error"]
@@ -0,0 +1,117 @@
+# tests/test_readiness.py
+import asyncio
+import subprocess
+import sys
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.readiness import DependencyCheck, Readiness
+
+
+def make_probe(calls, fail=False, delay=0.0):
+    async def probe():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if fail:
+            raise ConnectionError("unreachable")
+        return "HTTP 200"
+    return probe
+
+
+def test_check_result_is_cached_and_shared():
+    calls = []
+    check = DependencyCheck("github", make_probe(calls, delay=0.01), interval=60)
+
+    async def scenario():
+        results = await asyncio.gather(*(check.check() for _ in range(5)))
+        await check.check()
+        return results
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(r.ok and r.detail == "HTTP 200" for r in results)
+
+
+def test_failed_probe_is_reported_and_retried_after_interval():
+    calls = []
+    check = DependencyCheck("github", make_probe(calls, fail=True), interval=0)
+
+    async def scenario():
+        first = await check.check()
+        await check.check()
+        return first
+
+    result = asyncio.run(scenario())
+    assert not result.ok and "unreachable" in result.detail
+    assert len(calls) == 2
+
+
+def test_ready_only_after_warm_up_and_with_github_reachable():
+    async def scenario(github_fails, openai_fails):
+        readiness = Readiness({
+            "github": DependencyCheck("github", make_probe([], fail=github_fails)),
+            "openai": DependencyCheck("openai", make_probe([], fail=openai_fails)),
+        })
+        before = readiness.status()
+        with patch("app.readiness.init_clients"):
+            await readiness.warm_up()
+        return before, readiness.status()
+
+    before, after = asyncio.run(scenario(github_fails=False, openai_fails=True))
+    assert not before["ready"] and not before["warmed"]
+    assert after["ready"] and not after["checks"]["openai"]["ok"]  # Heuristic fallback still works
+
+    _, after = asyncio.run(scenario(github_fails=True, openai_fails=False))
+    assert after["warmed"] and not after["ready"]
+
+
+def test_status_serves_results_refreshed_in_the_background():
+    calls, github_down = [], False
+
+    async def probe():
+        calls.append(1)
+        if github_down:
+            raise ConnectionError("unreachable")
+        return "HTTP 200"
+
+    async def scenario():
+        nonlocal github_down
+        readiness = Readiness({"github": DependencyCheck("github", probe, interval=60)},
+                              interval=0.05)
+        with patch("app.readiness.init_clients"):
+            readiness.start()
+            while not readiness.warmed:
+                await asyncio.sleep(0.01)
+        probes = len(calls)
+        for _ in range(10):
+            assert readiness.status()["ready"]
+        assert len(calls) == probes  # Polling /ready does not probe
+
+        github_down = True
+        await asyncio.sleep(0.1)
+        status = readiness.status()
+        await readiness.stop()
+        return status
+
+    status = asyncio.run(scenario())
+    assert not status["ready"] and "unreachable" in status["checks"]["github"]["detail"]
+
+
+def test_ready_endpoint_returns_503_until_warm():
+    cold = Readiness({})
+    with patch("app.main.readiness", cold):
+        response = TestClient(app).get("/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "not ready"
+
+        cold.warmed = True
+        response = TestClient(app).get("/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+
+
+def test_app_import_defers_openai_sdk():
+    code = "import sys, app.main; sys.exit('openai' in sys.modules or 'app.review' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 0
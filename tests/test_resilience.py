@@ -0,0 +1,253 @@
+# tests/test_resilience.py
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+from openai import APITimeoutError
+
+from app.github import GitHubClient
+from app.ratelimit import UpstreamScheduler
+from app.resilience import (
+    BREAKER_CLOSED, BREAKER_HALF_OPEN, BREAKER_OPEN, CircuitBreaker, CircuitOpen, deadline,
+    hedged, time_left,
+)
+from app.review import openai_breaker, review_diff, stream_review_diff
+from tests.conftest import (
+    PULL_JSON, SAMPLE_DIFF, make_fake_client, make_fake_response, make_fake_stream,
+)
+
+
+class ProviderDown(Exception):
+    pass
+
+
+async def fail():
+    raise ProviderDown()
+
+
+async def succeed():
+    return "ok"
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_time=60, failures=(ProviderDown,))
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(ProviderDown):
+                await breaker.call(fail)
+        assert breaker.state == BREAKER_OPEN and breaker.rejecting()
+        with pytest.raises(CircuitOpen):
+            await breaker.call(succeed)
+
+    asyncio.run(scenario())
+
+
+def test_breaker_half_open_probe_closes_or_reopens():
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_time=60, failures=(ProviderDown,))
+
+    async def scenario():
+        with pytest.raises(ProviderDown):
+            await breaker.call(fail)
+        breaker.opened_at = time.monotonic() - 61  # Recovery time has passed
+        assert not breaker.rejecting()
+
+        with pytest.raises(ProviderDown):
+            await breaker.call(fail)  # Failed probe re-opens at once
+        assert breaker.state == BREAKER_OPEN and breaker.rejecting()
+
+        breaker.opened_at = time.monotonic() - 61
+        assert await breaker.call(succeed) == "ok"
+        assert breaker.state == BREAKER_CLOSED and breaker.consecutive_failures == 0
+
+    asyncio.run(scenario())
+
+
+def test_breaker_admits_a_single_probe_while_half_open():
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_time=0, failures=(ProviderDown,))
+
+    async def scenario():
+        with pytest.raises(ProviderDown):
+            await breaker.call(fail)
+        release = asyncio.Event()
+
+        async def slow_probe():
+            await release.wait()
+            return "ok"
+
+        probe = asyncio.ensure_future(breaker.call(slow_probe))
+        await asyncio.sleep(0)
+        assert breaker.state == BREAKER_HALF_OPEN
+        with pytest.raises(CircuitOpen):
+            await breaker.call(succeed)
+        release.set()
+        assert await probe == "ok"
+
+    asyncio.run(scenario())
+
+
+def test_hedged_call_returns_the_faster_attempt():
+    calls = []
+
+    async def call():
+        calls.append(1)
+        # The first attempt hangs, the hedge answers straight away
+        await asyncio.sleep(10 if len(calls) == 1 else 0)
+        return len(calls)
+
+    async def scenario():
+        start = time.perf_counter()
+        result = await hedged(call, 0.05)
+        return result, time.perf_counter() - start
+
+    result, elapsed = asyncio.run(scenario())
+    assert result == 2 and len(calls) == 2
+    assert elapsed < 1
+
+
+def test_nested_deadline_can_only_shorten():
+    with deadline(10):
+        with deadline(60):
+            assert time_left() <= 10
+        with deadline(1):
+            assert time_left() <= 1
+    assert time_left() is None
+
+
+def test_review_falls_back_immediately_while_breaker_open():
+    create = AsyncMock(return_value=make_fake_response({"summary": "unused"}))
+    for _ in range(openai_breaker.failure_threshold):
+        openai_breaker.record_failure()
+
+    with patch("app.review.get_openai_client", return_value=make_fake_client(create)):
+        result = asyncio.run(review_diff(SAMPLE_DIFF))
+
+    create.assert_not_called()
+    assert "circuit breaker" in result["error"]
+    assert result["lines_in_diff"] > 0
+
+
+def test_review_returns_heuristics_when_model_misses_deadline():
+    async def slow_create(**kwargs):
+        await asyncio.sleep(10)
+
+    with patch("app.review.get_openai_client", return_value=make_fake_client(slow_create)), \
+            patch("app.review.REVIEW_DEADLINE_SECONDS", 0.2):
+        start = time.perf_counter()
+        result = asyncio.run(review_diff(SAMPLE_DIFF))
+        elapsed = time.perf_counter() - start
+
+    assert elapsed < 2
+    assert result["error"] == "AI review timed out"
+    assert result["summary"] == "Heuristic pre-review"
+
+
+def test_github_requests_time_out_with_the_review_deadline():
+    timeouts = []
+
+    def handler(request):
+        timeouts.append(request.extensions["timeout"]["read"])
+        return httpx.Response(200, text=PULL_JSON)
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler), timeout=10)
+
+    async def scenario():
+        await GitHubClient().get_pull("o", "r", 1)
+        with deadline(0.5):
+            await GitHubClient().get_pull("o", "r", 2)
+
+    with patch("app.github.get_http_client", return_value=http_client):
+        asyncio.run(scenario())
+
+    assert timeouts[0] == 10
+    assert 0 < timeouts[1] <= 0.5
+
+
+def test_streamed_review_sends_a_single_half_open_probe():
+    calls, release = [], None
+    content = '{"summary": "Adds logging", "issues": [], "complexity_score": 1, ' \
+              '"risk_level": "low", "recommended_actions": []}'
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        await release.wait()
+        return make_fake_stream(content)
+
+    async def collect():
+        return [event async for event in stream_review_diff(SAMPLE_DIFF)]
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        for _ in range(openai_breaker.failure_threshold):
+            openai_breaker.record_failure()
+        openai_breaker.opened_at = time.monotonic() - openai_breaker.recovery_time - 1
+        probe = asyncio.ensure_future(collect())
+        await asyncio.sleep(0.01)
+        rejected = await collect()
+        release.set()
+        return await probe, rejected
+
+    with patch("app.review.get_openai_client", return_value=make_fake_client(create)):
+        probed, rejected = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert probed[-1][1]["summary"] == "Adds logging" and openai_breaker.state == BREAKER_CLOSED
+    assert rejected[-1][1]["error"]
+
+
+def test_streamed_review_stops_at_the_deadline():
+    async def slow_stream():
+        yield await make_fake_stream("{", pieces=1).__anext__()
+        await asyncio.sleep(10)
+        yield await make_fake_stream("}", pieces=1).__anext__()
+
+    async def create(**kwargs):
+        return slow_stream()
+
+    async def collect():
+        return [event async for event in stream_review_diff(SAMPLE_DIFF)]
+
+    with patch("app.review.get_openai_client", return_value=make_fake_client(create)), \
+            patch("app.review.REVIEW_DEADLINE_SECONDS", 0.2):
+        start = time.perf_counter()
+        events = asyncio.run(collect())
+        elapsed = time.perf_counter() - start
+
+    assert elapsed < 2
+    assert events[-1][1]["error"] == "AI review timed out"
+    assert openai_breaker.consecutive_failures == 0  # The budget ran out, not the provider
+
+
+def test_short_client_deadlines_do_not_open_the_breaker():
+    """Reviews cut off by the caller's own budget say nothing about a healthy provider."""
+    async def healthy_create(**kwargs):
+        await asyncio.sleep(0.3)
+        return make_fake_response({"summary": "Reviewed", "issues": [], "complexity_score": 1,
+                                   "risk_level": "low", "recommended_actions": []})
+
+    async def scenario():
+        for _ in range(openai_breaker.failure_threshold + 1):
+            with deadline(0.05):
+                result = await review_diff(SAMPLE_DIFF)
+            assert result["error"] == "AI review timed out"
+        return await review_diff(SAMPLE_DIFF)
+
+    with patch("app.review.get_openai_client", return_value=make_fake_client(healthy_create)):
+        result = asyncio.run(scenario())
+
+    assert openai_breaker.state == BREAKER_CLOSED
+    assert result["summary"] == "Reviewed" and result["error"] == ""
+
+
+def test_provider_timeouts_count_as_failures():
+    create = AsyncMock(side_effect=APITimeoutError(request=httpx.Request("POST", "https://x")))
+    scheduler = UpstreamScheduler("openai", rate=1000, max_concurrency=8, max_retries=0)
+
+    with patch("app.review.get_openai_client", return_value=make_fake_client(create)), \
+            patch("app.review.get_scheduler", return_value=scheduler):
+        result = asyncio.run(review_diff(SAMPLE_DIFF))
+
+    assert result["error"] and openai_breaker.consecutive_failures == 1
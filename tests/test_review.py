@@ -1,37 +1,20 @@
 # tests/test_review.py
 import json
-import pytest
-from unittest.mock import patch, MagicMock
-import os
+import asyncio
+from unittest.mock import patch
+import httpx
 from openai import OpenAIError
-from app.review import review_diff, AIReview
+from app.review import review_diff, review_github_pr, AIReview
+from app.cache import review_cache
+from tests.conftest import (
+    MULTI_FILE_DIFF, PULL_JSON, SAMPLE_DIFF, make_fake_response, make_fake_stream,
+    make_file_diff, make_github_handler,
+)
 
 # Sample diffs
-SAMPLE_DIFF = """
-diff --git a/example.py b/example.py
-index 123abc..456def 100644
---- a/example.py
-+++ b/example.py
-@@ -1 +1,2 @@
--print("Hello world")
-+print("Hello, world!")
-+print("Another line")
-"""
-
-os.environ["OPENAI_API_KEY"] = "test"  # Prevent OpenAIError
-
 LARGE_DIFF = "\n".join(f"+ line {i}" for i in range(300))
 
-def make_fake_response(content_dict):
-    """Helper to build a fake OpenAI response."""
-    fake_response = MagicMock()
-    fake_response.choices = [
-        MagicMock(message=MagicMock(content=json.dumps(content_dict)))
-    ]
-    return fake_response
-
 
-@patch("app.review.openai.chat.completions.create")
 def test_review_diff_success(mock_create):
     """AI succeeds; result merges AI + heuristic outputs."""
     fake_create_response = make_fake_response({
@@ -43,7 +26,7 @@ def test_review_diff_success(mock_create):
     })
     mock_create.return_value = fake_create_response
 
-    result = review_diff(SAMPLE_DIFF)
+    result = asyncio.run(review_diff(SAMPLE_DIFF))
 
     # AI summary
     assert result["summary"] == "Adds logging"
@@ -62,12 +45,11 @@ def test_review_diff_success(mock_create):
     assert result["lines_in_diff"] == len(SAMPLE_DIFF.splitlines())
 
 
-@patch("app.review.openai.chat.completions.create")
 def test_review_diff_openai_error(mock_create):
     """AI fails; fallback to heuristic review."""
     mock_create.side_effect = OpenAIError("Rate limit exceeded")
 
-    result = review_diff(SAMPLE_DIFF)
+    result = asyncio.run(review_diff(SAMPLE_DIFF))
 
     # Summary falls back to heuristic
     assert result["summary"] == "Heuristic pre-review"
@@ -85,7 +67,6 @@ def test_review_diff_openai_error(mock_create):
     assert result["lines_in_diff"] == len(SAMPLE_DIFF.splitlines())
 
 
-@patch("app.review.openai.chat.completions.create")
 def test_review_diff_large_pr_risk(mock_create):
     """Large PR (>200 lines) triggers high-risk heuristic."""
     fake_create_response = make_fake_response({
@@ -97,7 +78,7 @@ def test_review_diff_large_pr_risk(mock_create):
     })
     mock_create.return_value = fake_create_response
 
-    result = review_diff(LARGE_DIFF)
+    result = asyncio.run(review_diff(LARGE_DIFF))
 
     # Summary matches AI
     assert result["summary"] == "Adds many lines"
@@ -112,7 +93,6 @@ def test_review_diff_large_pr_risk(mock_create):
     assert result["lines_in_diff"] == len(LARGE_DIFF.splitlines())
 
 
-@patch("app.review.openai.chat.completions.create")
 def test_review_diff_todo_detection(mock_create):
     """Heuristic detects TODO/FIXME comments in diff."""
     diff_with_todo = "+ # TODO: fix this\n+print('hello')"
@@ -125,7 +105,7 @@ def test_review_diff_todo_detection(mock_create):
     })
     mock_create.return_value = fake_create_response
 
-    result = review_diff(diff_with_todo)
+    result = asyncio.run(review_diff(diff_with_todo))
 
     # Heuristic issues
     assert "Contains TODO/FIXME comments" in result["issues"]
@@ -136,3 +116,318 @@ def test_review_diff_todo_detection(mock_create):
 
     # Lines in diff
     assert result["lines_in_diff"] == len(diff_with_todo.splitlines())
+
+
+def test_review_github_pr_fetches_diff_async(mock_create):
+    """GitHub diff is fetched through the shared async client and reviewed."""
+    mock_create.return_value = make_fake_response({
+        "summary": "Updates greeting",
+        "issues": [],
+        "complexity_score": 1,
+        "risk_level": "low",
+        "recommended_actions": []
+    })
+
+    calls = []
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(make_github_handler(calls)))
+    with patch("app.github.get_http_client", return_value=http_client):
+        result = asyncio.run(review_github_pr("thitami", "ai-pr-reviewer", 1))
+
+    assert result["summary"] == "Updates greeting"
+    assert "Debug prints detected" in result["issues"]
+    assert ("application/vnd.github.v3.diff", None) in calls
+
+
+def test_review_github_pr_unchanged_head_skips_fetch_and_model(mock_create):
+    """A repeat review sends If-None-Match, gets a 304 and reuses the stored review."""
+    mock_create.return_value = make_fake_response({
+        "summary": "Updates greeting",
+        "issues": [],
+        "complexity_score": 1,
+        "risk_level": "low",
+        "recommended_actions": []
+    })
+
+    calls = []
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(make_github_handler(calls)))
+    with patch("app.github.get_http_client", return_value=http_client):
+        first = asyncio.run(review_github_pr("thitami", "ai-pr-reviewer", 1))
+        calls.clear()
+        second = asyncio.run(review_github_pr("thitami", "ai-pr-reviewer", 1))
+
+    assert first == second
+    assert mock_create.await_count == 1
+    # Only the conditional metadata request is made; the diff is not downloaded again
+    assert calls == [("application/vnd.github+json", '"v1"application/vnd.github+json')]
+
+
+def test_github_etag_store_is_bounded_by_bytes():
+    """Stored bodies are evicted oldest first past max_bytes; oversized ones are not kept."""
+    from app.github import GitHubClient
+
+    calls = []
+
+    def handler(request):
+        calls.append((request.url.path, request.headers.get("If-None-Match")))
+        size = 200 if request.url.path == "/big" else 60
+        return httpx.Response(200, text="x" * size, headers={"ETag": request.url.path})
+
+    github = GitHubClient(base_url="", max_bytes=100)
+    http_client = httpx.AsyncClient(base_url="https://api.github.test",
+                                    transport=httpx.MockTransport(handler))
+
+    async def fetch(*paths):
+        for path in paths:
+            await github._get(path, "application/vnd.github+json")
+
+    with patch("app.github.get_http_client", return_value=http_client):
+        asyncio.run(fetch("/a", "/b", "/big", "/a"))
+
+    assert [etag for _, etag in calls] == [None, None, None, None]
+    assert [path for path, _ in github._responses] == ["/a"]
+    assert github._bytes == 60
+
+
+def test_review_github_pr_skips_filtered_files(mock_create):
+    """Lockfiles never reach the model and are reported in skipped_files."""
+    mock_create.return_value = make_fake_response({
+        "summary": "Updates greeting",
+        "issues": [],
+        "complexity_score": 1,
+        "risk_level": "low",
+        "recommended_actions": []
+    })
+    lockfile = "diff --git a/poetry.lock b/poetry.lock\n@@ -1 +1 @@\n-x = 1\n+x = 2\n"
+
+    def handler(request):
+        if request.headers["Accept"] == "application/vnd.github.v3.diff":
+            return httpx.Response(200, text=SAMPLE_DIFF + lockfile)
+        return httpx.Response(200, text=PULL_JSON)
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with patch("app.github.get_http_client", return_value=http_client):
+        result = asyncio.run(review_github_pr("thitami", "ai-pr-reviewer", 1))
+
+    assert result["skipped_files"] == [{"path": "poetry.lock", "reason": "excluded path"}]
+    sent = mock_create.call_args.kwargs["messages"][-1]["content"]
+    assert "example.py" in sent and "poetry.lock" not in sent
+
+
+def test_github_client_sends_token(monkeypatch):
+    """GITHUB_TOKEN is sent as a bearer token."""
+    from app.github import get_github_client
+
+    monkeypatch.setenv("GITHUB_TOKEN", "secret")
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("Authorization"))
+        return httpx.Response(200, text=PULL_JSON)
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with patch("app.github.get_http_client", return_value=http_client):
+        asyncio.run(get_github_client().get_pull("thitami", "ai-pr-reviewer", 1))
+
+    assert seen == ["Bearer secret"]
+
+
+def test_review_github_pr_github_error(mock_create):
+    """GitHub failures are reported without calling the model."""
+    http_client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(404))
+    )
+    with patch("app.github.get_http_client", return_value=http_client):
+        result = asyncio.run(review_github_pr("thitami", "ai-pr-reviewer", 1))
+
+    assert "GitHub API request failed" in result["error"]
+    mock_create.assert_not_called()
+
+
+def test_review_diff_large_pr_map_reduce(mock_create, monkeypatch):
+    """Large diffs are reviewed per chunk, concurrently, and reduced into one review."""
+
+    monkeypatch.setattr("app.review.REVIEW_CHUNK_TOKENS", 200)
+    monkeypatch.setattr("app.review.REVIEW_MAX_PARALLEL_CHUNKS", 2)
+    in_flight = {"now": 0, "max": 0}
+    responses = iter([
+        {"summary": "Part one", "issues": ["A"], "complexity_score": 2,
+         "risk_level": "low", "recommended_actions": ["Add unit tests"]},
+        {"summary": "Part two", "issues": ["B"], "complexity_score": 7,
+         "risk_level": "high", "recommended_actions": ["Add unit tests"]},
+    ])
+
+    async def fake_create(**kwargs):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return make_fake_response(next(responses, {
+            "summary": "Other part", "issues": [], "complexity_score": 1,
+            "risk_level": "medium", "recommended_actions": []}))
+
+    mock_create.side_effect = fake_create
+
+    result = asyncio.run(review_diff(MULTI_FILE_DIFF))
+
+    assert mock_create.await_count > 2
+    assert in_flight["max"] == 2
+    assert {"A", "B"} <= set(result["issues"])
+    assert result["complexity_score"] == 7
+    assert result["risk_level"] == "high"
+    assert "Part one" in result["summary"] and "Part two" in result["summary"]
+    assert result["error"] == ""
+
+
+def test_review_diff_partial_chunk_failure(mock_create, monkeypatch):
+    """A failed chunk is reported in error while the other chunks are still merged."""
+
+    monkeypatch.setattr("app.review.REVIEW_CHUNK_TOKENS", 200)
+    ok = make_fake_response({"summary": "Fine", "issues": ["A"], "complexity_score": 2,
+                             "risk_level": "low", "recommended_actions": []})
+    calls = {"n": 0}
+
+    async def flaky_create(**kwargs):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise OpenAIError("Rate limit exceeded")
+        return ok
+
+    mock_create.side_effect = flaky_create
+
+    result = asyncio.run(review_diff(MULTI_FILE_DIFF))
+
+    assert result["summary"] == "Fine"
+    assert "A" in result["issues"]
+    assert result["error"].startswith("AI review failed for 1 of")
+
+
+def test_review_diff_heuristics_only(mock_create):
+    """Heuristics-only mode returns the rule results without calling the model."""
+    result = asyncio.run(review_diff(SAMPLE_DIFF, heuristics_only=True))
+
+    mock_create.assert_not_called()
+    assert result["summary"] == "Heuristic pre-review"
+    assert "Debug prints detected" in result["issues"]
+    assert result["risk_level"] == "medium"
+    assert result["error"] == ""
+
+
+def test_review_diff_incremental_reuses_unchanged_files(mock_create):
+    """After a push, only files whose patch changed are sent to the model again."""
+
+    reviewed = []
+
+    async def fake_create(**kwargs):
+        content = kwargs["messages"][-1]["content"]
+        reviewed.append(content.split("\n", 1)[0])
+        return make_fake_response({"summary": f"Reviewed {len(reviewed)}", "issues": [],
+                                   "complexity_score": len(reviewed), "risk_level": "low",
+                                   "recommended_actions": []})
+
+    mock_create.side_effect = fake_create
+    first_push = make_file_diff("a.py") + make_file_diff("b.py") + make_file_diff("c.py")
+    second_push = first_push.replace("+line 3 of b.py", "+changed line of b.py")
+
+    asyncio.run(review_diff(first_push, incremental=True))
+    assert len(reviewed) == 3
+
+    reviewed.clear()
+    result = asyncio.run(review_diff(second_push, incremental=True))
+
+    assert reviewed == ["diff --git a/b.py b/b.py"]
+    # Stored results for a.py and c.py are merged with the fresh one for b.py
+    assert result["complexity_score"] == 3
+    assert result["error"] == ""
+
+
+def test_incremental_file_results_are_kept_per_pr(mock_create):
+    """File results outlive the review cache's entries and are not shared between PRs."""
+
+    mock_create.return_value = make_fake_response({"summary": "ok", "issues": [],
+                                                   "complexity_score": 1, "risk_level": "low",
+                                                   "recommended_actions": []})
+    diff = make_file_diff("a.py") + make_file_diff("b.py")
+
+    asyncio.run(review_diff(diff, incremental=True, pr="o/r#1"))
+    assert mock_create.await_count == 2
+
+    review_cache.clear()  # e.g. evicted by other traffic
+    asyncio.run(review_diff(diff, incremental=True, pr="o/r#1"))
+    assert mock_create.await_count == 2
+
+    review_cache.clear()
+    asyncio.run(review_diff(diff, incremental=True, pr="o/r#2"))
+    assert mock_create.await_count == 4
+
+
+def test_concurrent_reviews_of_same_pr_are_coalesced(mock_create):
+    """Concurrent reviews of one PR at one head SHA share a single diff fetch and model call."""
+    from app.monitoring import COALESCED_REQUESTS
+
+    async def slow_create(**kwargs):
+        await asyncio.sleep(0.05)
+        return make_fake_response({"summary": "Updates greeting", "issues": [],
+                                   "complexity_score": 1, "risk_level": "low",
+                                   "recommended_actions": []})
+
+    mock_create.side_effect = slow_create
+    calls = []
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(make_github_handler(calls)))
+    coalesced_before = COALESCED_REQUESTS._value.get()
+
+    async def review_three_times():
+        return await asyncio.gather(*(
+            review_github_pr("thitami", "ai-pr-reviewer", 1) for _ in range(3)
+        ))
+
+    with patch("app.github.get_http_client", return_value=http_client):
+        results = asyncio.run(review_three_times())
+
+    assert results[0] == results[1] == results[2]
+    assert mock_create.await_count == 1
+    assert [accept for accept, _ in calls].count("application/vnd.github.v3.diff") == 1
+    assert COALESCED_REQUESTS._value.get() - coalesced_before == 2
+
+
+def test_stream_review_diff_emits_stages_in_order(mock_create):
+    """Heuristics come first, then model tokens, then the merged review."""
+    from app.review import stream_review_diff
+
+    content = json.dumps({"summary": "Adds logging", "issues": ["Missing tests"],
+                          "complexity_score": 3, "risk_level": "low",
+                          "recommended_actions": ["Add unit tests"]})
+    mock_create.return_value = make_fake_stream(content)
+
+    async def collect():
+        return [event async for event in stream_review_diff(SAMPLE_DIFF)]
+
+    events = asyncio.run(collect())
+    names = [name for name, _ in events]
+
+    assert names == ["heuristics", "token", "token", "token", "review"]
+    assert "Debug prints detected" in events[0][1]["issues"]
+    assert "".join(data["content"] for name, data in events if name == "token") == content
+    review = events[-1][1]
+    assert review["summary"] == "Adds logging"
+    assert review["risk_level"] == "medium"
+    assert mock_create.call_args.kwargs["stream"] is True
+
+
+def test_stream_review_github_pr_honours_heuristics_only(mock_create):
+    """heuristics_only streams the rule findings without fetching the PR or calling the model."""
+    from app.review import stream_review_github_pr
+
+    calls = []
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(make_github_handler(calls)))
+
+    async def collect():
+        return [event async for event in stream_review_github_pr(
+            "thitami", "ai-pr-reviewer", 1, heuristics_only=True)]
+
+    with patch("app.github.get_http_client", return_value=http_client):
+        events = asyncio.run(collect())
+
+    assert [name for name, _ in events] == ["heuristics", "review"]
+    assert events[-1][1]["summary"] == "Heuristic pre-review"
+    assert [accept for accept, _ in calls] == ["application/vnd.github.v3.diff"]
+    mock_create.assert_not_called()
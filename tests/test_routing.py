@@ -0,0 +1,63 @@
+# tests/test_routing.py
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from pydantic import ValidationError
+
+from app.heuristics import HeuristicResult
+from app.prompts import SYSTEM_PROMPT
+from app.review import review_diff
+from app.routing import RoutingConfig, route_review
+from tests.conftest import make_fake_client, make_fake_response, make_file_diff
+
+CONFIG = RoutingConfig(fast_model="small-model", large_model="big-model",
+                       fast_max_lines=100, fast_max_files=3, fast_max_risk="medium")
+
+
+def make_heuristics(lines=10, files=1, risk="low"):
+    return HeuristicResult(issues=[], recommended_actions=[], risk_level=risk, lines_in_diff=lines,
+                           files_changed=files, lines_added=lines, lines_removed=0, matches={})
+
+
+def test_small_low_risk_diffs_use_fast_model():
+    route = route_review(make_heuristics(), CONFIG)
+    assert (route.tier, route.model) == ("fast", "small-model")
+    assert route_review(make_heuristics(risk="medium"), CONFIG).tier == "fast"
+
+
+def test_big_or_risky_diffs_use_large_model():
+    assert route_review(make_heuristics(lines=101), CONFIG).reason == "101 lines"
+    assert route_review(make_heuristics(files=4), CONFIG).reason == "4 files"
+    route = route_review(make_heuristics(risk="high"), CONFIG)
+    assert (route.tier, route.model, route.reason) == ("large", "big-model", "high heuristic risk")
+
+
+def test_unknown_fast_max_risk_is_rejected(monkeypatch):
+    """A typo in ROUTING_FAST_MAX_RISK fails at startup, not on the first review."""
+    from app.routing import load_routing_config
+
+    monkeypatch.setenv("ROUTING_FAST_MAX_RISK", "meduim")
+    with pytest.raises(ValidationError):
+        load_routing_config()
+
+
+def test_review_diff_records_tier_and_sends_stable_system_prompt(monkeypatch):
+    """The routed model is called with the fixed system prompt first and the tier is reported."""
+    monkeypatch.setattr("app.routing.routing_config", CONFIG)
+    mock_create = AsyncMock(return_value=make_fake_response({
+        "summary": "ok", "issues": [], "complexity_score": 1,
+        "risk_level": "low", "recommended_actions": [],
+    }))
+
+    with patch("app.review.get_openai_client", return_value=make_fake_client(mock_create)):
+        small = asyncio.run(review_diff(make_file_diff("a.py", hunks=1, lines_per_hunk=5)))
+        large = asyncio.run(review_diff(make_file_diff("b.py", hunks=10, lines_per_hunk=20)))
+
+    assert small["tier"] == "fast"
+    assert large["tier"] == "large"
+    calls = mock_create.call_args_list
+    assert calls[0].kwargs["model"] == "small-model"
+    assert calls[-1].kwargs["model"] == "big-model"
+    for call in calls:
+        assert call.kwargs["messages"][0] == {"role": "system", "content": SYSTEM_PROMPT}
@@ -0,0 +1,71 @@
+# tests/test_tracing.py
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.review import review_diff
+from app.tracing import span, to_otlp
+from tests.conftest import make_fake_client, make_fake_response
+
+SAMPLE_DIFF = "diff --git a/app.py b/app.py\n@@ -1 +1 @@\n+print('hello world')\n"
+
+
+def test_spans_nest_and_record_stage_durations():
+    """Child spans share the trace id and point at their parent; durations are observed per stage."""
+    before = REGISTRY.get_sample_value("review_stage_duration_seconds_count",
+                                       {"stage": "test.child"}) or 0
+    finished = []
+
+    with patch("app.tracing.export_trace", side_effect=finished.extend):
+        with span("test.root", repository="o/r") as root:
+            with span("test.child") as child:
+                child.set(tokens=3)
+
+    assert [s.name for s in finished] == ["test.child", "test.root"]
+    assert child.trace_id == root.trace_id
+    assert child.parent_id == root.span_id
+    assert root.end_ns >= child.end_ns >= child.start_ns
+    assert REGISTRY.get_sample_value("review_stage_duration_seconds_count",
+                                     {"stage": "test.child"}) == before + 1
+
+
+def test_failed_span_has_error_status():
+    with patch("app.tracing.export_trace"):
+        with pytest.raises(ValueError):
+            with span("test.failing") as failing:
+                raise ValueError("bad json")
+
+    status = to_otlp([failing])["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["status"]
+    assert status == {"code": 2, "message": "ValueError: bad json"}
+
+
+def test_review_trace_exported_to_file(tmp_path, monkeypatch):
+    """A review writes one OTLP/JSON trace covering every stage, with token and diff-size attributes."""
+    trace_file = tmp_path / "traces.jsonl"
+    monkeypatch.setattr("app.tracing.TRACE_EXPORT_FILE", str(trace_file))
+    mock_create = AsyncMock(return_value=make_fake_response({
+        "summary": "ok", "issues": [], "complexity_score": 1,
+        "risk_level": "low", "recommended_actions": [],
+    }))
+    prompt_tokens = REGISTRY.get_sample_value("ai_review_tokens_total", {"kind": "prompt"}) or 0
+
+    with patch("app.review.get_openai_client", return_value=make_fake_client(mock_create)):
+        asyncio.run(review_diff(SAMPLE_DIFF))
+
+    lines = trace_file.read_text().splitlines()
+    assert len(lines) == 1
+    spans = json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    by_name = {s["name"]: s for s in spans}
+    assert set(by_name) == {"review.diff", "diff.parse", "llm.call", "llm.json_parse",
+                            "heuristics", "review.validate"}
+    assert len({s["traceId"] for s in spans}) == 1
+
+    llm_attributes = {a["key"]: a["value"] for a in by_name["llm.call"]["attributes"]}
+    assert llm_attributes["prompt_tokens"] == {"intValue": "100"}
+    review_attributes = {a["key"]: a["value"] for a in by_name["review.diff"]["attributes"]}
+    assert review_attributes["diff_lines"] == {"intValue": "3"}
+    assert review_attributes["outcome"] == {"stringValue": "ai"}
+    assert REGISTRY.get_sample_value("ai_review_tokens_total", {"kind": "prompt"}) == prompt_tokens + 100
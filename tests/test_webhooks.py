@@ -0,0 +1,108 @@
+# tests/test_webhooks.py
+import asyncio
+import hashlib
+import hmac
+import json
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.webhooks import Debouncer, verify_signature
+
+SECRET = "webhook-secret"
+
+client = TestClient(app)
+
+
+def make_event(action="synchronize", head_sha="abc123"):
+    """Minimal pull_request webhook payload."""
+    return {
+        "action": action,
+        "pull_request": {"number": 7, "head": {"sha": head_sha}},
+        "repository": {"name": "ai-pr-reviewer", "owner": {"login": "thitami"}},
+    }
+
+
+def post_event(payload, event="pull_request", secret=SECRET):
+    """Send a signed webhook delivery."""
+    body = json.dumps(payload).encode()
+    signature = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return client.post("/webhooks/github", content=body, headers={
+        "X-GitHub-Event": event,
+        "X-Hub-Signature-256": signature,
+        "Content-Type": "application/json",
+    })
+
+
+def test_verify_signature():
+    """Only a matching sha256 HMAC of the raw body is accepted."""
+    body = b'{"action": "opened"}'
+    signature = "sha256=" + hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+
+    assert verify_signature(SECRET, body, signature)
+    assert not verify_signature(SECRET, body + b" ", signature)
+    assert not verify_signature(SECRET, body, None)
+    assert not verify_signature("", body, signature)
+
+
+def test_webhook_rejects_bad_signature(monkeypatch):
+    """Deliveries not signed with the configured secret get 401."""
+    monkeypatch.setenv("GITHUB_WEBHOOK_SECRET", SECRET)
+    response = post_event(make_event(), secret="wrong")
+    assert response.status_code == 401
+
+
+def test_webhook_ignores_other_events_and_actions(monkeypatch):
+    """Non pull_request events and actions like 'closed' do not schedule reviews."""
+    monkeypatch.setenv("GITHUB_WEBHOOK_SECRET", SECRET)
+    with patch("app.main.webhook_debouncer.submit") as submit:
+        assert post_event({"zen": "hi"}, event="ping").json() == {"status": "pong"}
+        assert post_event(make_event(action="closed")).json() == {"status": "ignored"}
+        assert post_event({"ref": "main"}, event="push").json() == {"status": "ignored"}
+    submit.assert_not_called()
+
+
+def test_webhook_schedules_debounced_review(monkeypatch):
+    """A synchronize event is handed to the per-PR debouncer."""
+    monkeypatch.setenv("GITHUB_WEBHOOK_SECRET", SECRET)
+    with patch("app.main.webhook_debouncer.submit", return_value=False) as submit:
+        response = post_event(make_event(head_sha="def456"))
+
+    assert response.status_code == 202
+    assert response.json() == {"status": "scheduled", "head_sha": "def456"}
+    key, event = submit.call_args.args
+    assert key == ("thitami", "ai-pr-reviewer", 7)
+    assert event["head_sha"] == "def456"
+
+
+def test_debouncer_fires_once_with_latest_value():
+    """A burst of events for one key triggers a single callback with the last value."""
+    fired = []
+
+    async def burst():
+        debouncer = Debouncer(window=0.05, callback=fired.append)
+        for i in range(20):
+            debouncer.submit("pr-7", {"head_sha": f"sha{i}"})
+            await asyncio.sleep(0.001)
+        debouncer.submit("pr-8", {"head_sha": "other"})
+        await asyncio.sleep(0.1)
+
+    asyncio.run(burst())
+    assert fired == [{"head_sha": "sha19"}, {"head_sha": "other"}]
+
+
+def test_debouncer_max_wait_bounds_delay():
+    """A never-ending burst still fires once max_wait has passed since its first event."""
+    fired = []
+
+    async def storm():
+        debouncer = Debouncer(window=0.05, callback=fired.append, max_wait=0.1)
+        for i in range(30):
+            debouncer.submit("pr-7", {"head_sha": f"sha{i}"})
+            await asyncio.sleep(0.01)
+        await debouncer.stop()
+
+    asyncio.run(storm())
+    assert len(fired) >= 1
+    assert len(fired) < 30